@@ -0,0 +1 @@
+python3 benchmarks/run.py "$@"
\ No newline at end of file
@@ -0,0 +1,109 @@
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from corpus import CorpusSpec, generate_documents
+from extensions import EXTENSIONS, load_extensions
+from markdown import BlockType, block_to_block_type, markdown_to_blocks
+
+def legacy_block_to_block_type(block: str) -> BlockType:
+    # The line-by-line classifier this module replaced, kept for comparison.
+    lines = block.split("\n")
+
+    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
+        return BlockType.HEADING
+
+    if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
+        return BlockType.CODE
+
+    if block.startswith(">"):
+        for line in lines:
+            if not line.startswith(">"):
+                return BlockType.PARAGRAPH
+        return BlockType.QUOTE
+
+    if block.startswith("- "):
+        for line in lines:
+            if not line.startswith("- "):
+                return BlockType.PARAGRAPH
+        return BlockType.UNORDERED_LIST
+
+    if block.startswith("1. "):
+        i = 1
+        for line in lines:
+            if not line.startswith(f"{i}. "):
+                return BlockType.PARAGRAPH
+            i += 1
+        return BlockType.ORDERED_LIST
+
+    return BlockType.PARAGRAPH
+
+def list_heavy_blocks(count: int) -> list[str]:
+    blocks = []
+    for i in range(count):
+        length = 5 + i % 20
+        if i % 2:
+            blocks.append("\n".join(f"{n}. item number {n}" for n in range(1, length + 1)))
+        else:
+            blocks.append("\n".join(f"- item number {n}" for n in range(length)))
+    return blocks
+
+def quote_heavy_blocks(count: int) -> list[str]:
+    return [
+        "\n".join(f"> quoted line {n} of block {i}" for n in range(3 + i % 10))
+        for i in range(count)
+    ]
+
+def corpus_blocks(pages: int) -> list[str]:
+    spec = CorpusSpec(pages=pages)
+    return [
+        block
+        for _, markdown in generate_documents(spec)
+        for block in markdown_to_blocks(markdown)
+    ]
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Compare block classifiers.")
+    parser.add_argument("--blocks", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--extension",
+        action="append",
+        default=[],
+        choices=sorted(EXTENSIONS),
+        help="register a bundled markdown extension first (repeatable)",
+    )
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    load_extensions(args.extension)
+
+    corpora = {
+        "list-heavy": list_heavy_blocks(args.blocks),
+        "quote-heavy": quote_heavy_blocks(args.blocks),
+        "mixed": corpus_blocks(max(1, args.blocks // 40)),
+    }
+    for name, blocks in corpora.items():
+        assert [legacy_block_to_block_type(b) for b in blocks] == [
+            block_to_block_type(b) for b in blocks
+        ]
+        legacy = min(timeit.repeat(
+            lambda: [legacy_block_to_block_type(b) for b in blocks],
+            number=1,
+            repeat=args.repeat,
+        ))
+        current = min(timeit.repeat(
+            lambda: [block_to_block_type(b) for b in blocks],
+            number=1,
+            repeat=args.repeat,
+        ))
+        print(
+            f"{name:>12}: legacy {legacy:.4f}s, current {current:.4f}s "
+            f"({legacy / current:.1f}x faster, {len(blocks)} blocks)"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from corpus import CorpusSpec, generate_documents
+from markdown import markdown_to_html_node
+from profiling import count_nodes
+from textnode import text_to_textnodes
+
+def measure(build) -> tuple[int, object]:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return size, result
+
+def run(spec: CorpusSpec) -> dict:
+    documents = [markdown for _, markdown in generate_documents(spec)]
+    lines = [
+        line
+        for markdown in documents
+        for line in markdown.split("\n")
+        if line and not line.startswith("```")
+    ]
+
+    # Strings are shared with the documents where possible; the sizes below
+    # still include the text each node owns, as a real build would.
+    tree_bytes, trees = measure(lambda: [markdown_to_html_node(markdown) for markdown in documents])
+    html_nodes = sum(count_nodes(tree) for tree in trees)
+    del trees
+
+    text_bytes, text_nodes = measure(lambda: [text_to_textnodes(line) for line in lines])
+    text_node_count = sum(len(nodes) for nodes in text_nodes)
+    del text_nodes
+
+    return {
+        "html_nodes": html_nodes,
+        "html_tree_bytes": tree_bytes,
+        "bytes_per_html_node": tree_bytes / html_nodes,
+        "text_nodes": text_node_count,
+        "text_node_bytes": text_bytes,
+        "bytes_per_text_node": text_bytes / text_node_count,
+    }
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Measure node memory use.")
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--blocks", type=int, default=40)
+    parser.add_argument("-o", "--output", help="write the results as JSON")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    results = run(CorpusSpec(pages=args.pages, blocks=args.blocks))
+    for name, value in results.items():
+        print(f"{name:>20}: {value:,.1f}" if isinstance(value, float) else f"{name:>20}: {value:,}")
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+if __name__ == "__main__":
+    main()
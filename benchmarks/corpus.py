@@ -0,0 +1,123 @@
+import os
+import random
+import shutil
+from pathlib import Path
+
+WORDS = (
+    "ring shire hobbit elf dwarf wizard river mountain forest road tower "
+    "king queen sword song lore age star moon fire shadow light valley "
+    "pipe weed ale bread riddle map door key stone bridge council"
+).split()
+
+CSS = "body { font-family: sans-serif; }\n"
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+class CorpusSpec:
+    def __init__(
+            self,
+            pages: int = 200,
+            blocks: int = 40,
+            link_density: float = 0.05,
+            list_length: int = 8,
+            code_share: float = 0.1,
+            seed: int = 0
+        ):
+        self.pages = pages
+        self.blocks = blocks
+        self.link_density = link_density
+        self.list_length = list_length
+        self.code_share = code_share
+        self.seed = seed
+
+    def __repr__(self):
+        return f"CorpusSpec({self.as_dict()})"
+
+    def as_dict(self) -> dict:
+        return {
+            "pages": self.pages,
+            "blocks": self.blocks,
+            "link_density": self.link_density,
+            "list_length": self.list_length,
+            "code_share": self.code_share,
+            "seed": self.seed,
+        }
+
+def page_path(index: int) -> str:
+    if index == 0:
+        return "index.md"
+    return f"section{index % 10}/page{index}/index.md"
+
+def _inline_text(rng: random.Random, spec: CorpusSpec, words: int) -> str:
+    parts = []
+    for _ in range(words):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < spec.link_density:
+            target = rng.randrange(spec.pages)
+            parts.append(f"[{word}](/{page_path(target)[:-len('index.md')]})")
+        elif roll < spec.link_density * 1.2:
+            parts.append(f"![{word}](/images/{word}.png)")
+        elif roll < spec.link_density * 1.2 + 0.04:
+            parts.append(f"**{word}**")
+        elif roll < spec.link_density * 1.2 + 0.07:
+            parts.append(f"_{word}_")
+        elif roll < spec.link_density * 1.2 + 0.09:
+            parts.append(f"`{word}`")
+        else:
+            parts.append(word)
+    return " ".join(parts)
+
+def _block(rng: random.Random, spec: CorpusSpec) -> str:
+    if rng.random() < spec.code_share:
+        lines = [" ".join(rng.choices(WORDS, k=6)) for _ in range(rng.randint(3, 12))]
+        return "```\n" + "\n".join(lines) + "\n```"
+
+    kind = rng.randrange(5)
+    if kind == 0:
+        return "#" * rng.randint(2, 4) + " " + _inline_text(rng, spec, 5)
+    if kind == 1:
+        return "\n".join(
+            f"- {_inline_text(rng, spec, 8)}" for _ in range(spec.list_length)
+        )
+    if kind == 2:
+        return "\n".join(
+            f"{i}. {_inline_text(rng, spec, 8)}" for i in range(1, spec.list_length + 1)
+        )
+    if kind == 3:
+        return "\n".join(f"> {_inline_text(rng, spec, 12)}" for _ in range(3))
+    return "\n".join(_inline_text(rng, spec, 14) for _ in range(rng.randint(1, 5)))
+
+def generate_page(rng: random.Random, spec: CorpusSpec, index: int) -> str:
+    blocks = [f"# Page {index} about the {rng.choice(WORDS)}"]
+    blocks.extend(_block(rng, spec) for _ in range(spec.blocks))
+    return "\n\n".join(blocks) + "\n"
+
+def generate_documents(spec: CorpusSpec):
+    rng = random.Random(spec.seed)
+    for index in range(spec.pages):
+        yield page_path(index), generate_page(rng, spec, index)
+
+def write_corpus(root: str, spec: CorpusSpec):
+    root_path = Path(root)
+    for name in ("content", "static", "docs"):
+        shutil.rmtree(root_path / name, ignore_errors=True)
+
+    for relative_path, markdown in generate_documents(spec):
+        path = root_path / "content" / relative_path
+        os.makedirs(path.parent, exist_ok=True)
+        path.write_text(markdown)
+
+    os.makedirs(root_path / "static", exist_ok=True)
+    (root_path / "static" / "index.css").write_text(CSS)
+    (root_path / "template.html").write_text(TEMPLATE)
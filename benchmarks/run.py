@@ -0,0 +1,144 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import main as site
+from corpus import CorpusSpec, generate_documents, write_corpus
+from markdown import BlockType, block_to_block_type, markdown_to_blocks, markdown_to_html_node
+from textnode import text_to_textnodes
+
+def _time(function, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "repeat": repeat,
+    }
+
+def _inline_texts(blocks: list[str]) -> list[str]:
+    texts = []
+    for block in blocks:
+        block_type = block_to_block_type(block)
+        if block_type == BlockType.PARAGRAPH:
+            texts.append(" ".join(block.split("\n")))
+        elif block_type in (BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST):
+            texts.extend(line.split(" ", 1)[1] for line in block.split("\n"))
+    return texts
+
+def run_benchmarks(spec: CorpusSpec, repeat: int, jobs: int) -> dict:
+    documents = [markdown for _, markdown in generate_documents(spec)]
+    blocks = [block for markdown in documents for block in markdown_to_blocks(markdown)]
+    inline_texts = _inline_texts(blocks)
+    trees = [markdown_to_html_node(markdown) for markdown in documents]
+
+    results = {
+        "markdown_to_blocks": _time(
+            lambda: [markdown_to_blocks(markdown) for markdown in documents], repeat
+        ),
+        "block_to_block_type": _time(
+            lambda: [block_to_block_type(block) for block in blocks], repeat
+        ),
+        "text_to_textnodes": _time(
+            lambda: [text_to_textnodes(text) for text in inline_texts], repeat
+        ),
+        "to_html": _time(lambda: [tree.to_html() for tree in trees], repeat),
+    }
+    results["markdown_to_blocks"]["items"] = len(documents)
+    results["block_to_block_type"]["items"] = len(blocks)
+    results["text_to_textnodes"]["items"] = len(inline_texts)
+    results["to_html"]["items"] = len(trees)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_corpus(tmp, spec)
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                results["build"] = _time(lambda: site.main(["--jobs", str(jobs)]), repeat)
+        finally:
+            os.chdir(cwd)
+    results["build"]["items"] = len(documents)
+    return results
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for stage, current in results.items():
+        previous = baseline.get("results", {}).get(stage)
+        if previous is None:
+            continue
+        ratio = current["min"] / previous["min"] if previous["min"] else 1.0
+        print(f"{stage:>20}: {previous['min']:.4f}s -> {current['min']:.4f}s ({ratio:.2f}x)")
+        if ratio > 1 + threshold:
+            regressions.append(stage)
+    return regressions
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the site generator.")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--blocks", type=int, default=40, help="blocks per page")
+    parser.add_argument("--link-density", type=float, default=0.05)
+    parser.add_argument("--list-length", type=int, default=8)
+    parser.add_argument("--code-share", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=1, help="--jobs passed to the build")
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier results JSON")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="slowdown ratio over the baseline reported as a regression",
+    )
+    return parser.parse_args(argv)
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    spec = CorpusSpec(
+        args.pages,
+        args.blocks,
+        args.link_density,
+        args.list_length,
+        args.code_share,
+        args.seed,
+    )
+
+    results = run_benchmarks(spec, args.repeat, args.jobs)
+    report = {
+        "corpus": spec.as_dict(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    with open(args.output, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+
+    for stage, timing in results.items():
+        print(f"{stage:>20}: {timing['min']:.4f}s min, {timing['median']:.4f}s median ({timing['items']} items)")
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r") as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.threshold)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable
+
+DEFAULT_IO_WORKERS = 8
+DEFAULT_PREFETCH = 32
+
+class IOStats:
+    def __init__(self):
+        self.reads = 0
+        self.writes = 0
+        self.directories = 0
+        self.read_wait = 0.0
+        self.write_wait = 0.0
+
+    def __repr__(self):
+        return (
+            f"IOStats({self.reads} reads, {self.writes} writes, "
+            f"{self.read_wait:.3f}s read wait, {self.write_wait:.3f}s write wait)"
+        )
+
+    @property
+    def io_wait(self) -> float:
+        return self.read_wait + self.write_wait
+
+async def _pipeline(
+        jobs: list,
+        read: Callable[[Any], Any],
+        render: Callable[[Any, Any], tuple[Any, Any]],
+        write: Callable[[Any, Any], None],
+        destination: Callable[[Any], str],
+        on_error: Callable[[Any, Exception], Any],
+        io_workers: int,
+        prefetch: int,
+        render_executor: Executor | None
+    ) -> tuple[list, IOStats]:
+    loop = asyncio.get_running_loop()
+    stats = IOStats()
+    results = [None] * len(jobs)
+    directories: dict[str, asyncio.Future] = {}
+    next_job = iter(range(len(jobs)))
+
+    with ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="site-io") as io:
+        async def ensure_directory(path: str):
+            # Every page in a directory awaits the same makedirs call.
+            if path not in directories:
+                directories[path] = loop.run_in_executor(
+                    io, lambda: os.makedirs(path, exist_ok=True)
+                )
+                stats.directories += 1
+            await directories[path]
+
+        async def process(job):
+            start = time.perf_counter()
+            data = await loop.run_in_executor(io, read, job)
+            stats.read_wait += time.perf_counter() - start
+            stats.reads += 1
+
+            if render_executor is None:
+                output, result = render(job, data)
+            else:
+                output, result = await loop.run_in_executor(render_executor, render, job, data)
+            if output is None:
+                return result
+
+            await ensure_directory(os.path.dirname(destination(job)))
+            start = time.perf_counter()
+            await loop.run_in_executor(io, write, job, output)
+            stats.write_wait += time.perf_counter() - start
+            stats.writes += 1
+            return result
+
+        # A fixed number of workers pull jobs in order, so at most
+        # `prefetch` sources are read ahead of the renderer or waiting for
+        # their page to be written behind it.
+        async def worker():
+            for index in next_job:
+                try:
+                    results[index] = await process(jobs[index])
+                except Exception as e:
+                    results[index] = on_error(jobs[index], e)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, prefetch))))
+    return results, stats
+
+def run_pipeline(
+        jobs: list,
+        read: Callable[[Any], Any],
+        render: Callable[[Any, Any], tuple[Any, Any]],
+        write: Callable[[Any, Any], None],
+        destination: Callable[[Any], str],
+        on_error: Callable[[Any, Exception], Any],
+        io_workers: int = DEFAULT_IO_WORKERS,
+        prefetch: int = DEFAULT_PREFETCH,
+        render_executor: Executor | None = None
+    ) -> tuple[list, IOStats]:
+    return asyncio.run(_pipeline(
+        jobs,
+        read,
+        render,
+        write,
+        destination,
+        on_error,
+        io_workers,
+        prefetch,
+        render_executor,
+    ))
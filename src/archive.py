@@ -0,0 +1,110 @@
+import io
+import mmap
+import os
+import shutil
+import struct
+import zipfile
+from pathlib import Path
+from typing import Callable, TextIO
+
+# Members are stored uncompressed with a fixed timestamp, so the archive is
+# byte-for-byte reproducible and every member can be served straight out of
+# a memory map of the file.
+ARCHIVE_DATE = (1980, 1, 1, 0, 0, 0)
+LOCAL_HEADER_SIZE = 30
+
+class ArchiveWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.zip = zipfile.ZipFile(self.tmp_path, "w", zipfile.ZIP_STORED, allowZip64=True)
+        self.names: set[str] = set()
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _open(self, name: str):
+        info = zipfile.ZipInfo(name, ARCHIVE_DATE)
+        info.compress_type = zipfile.ZIP_STORED
+        info.external_attr = 0o644 << 16
+        self.names.add(name)
+        return self.zip.open(info, "w", force_zip64=True)
+
+    def write_text(self, name: str, text: str):
+        with self._open(name) as member:
+            member.write(text.encode())
+
+    def write_page(self, name: str, write: Callable[[TextIO], None]):
+        # Same calling convention as main.write_page, so a page can be
+        # streamed into its member without being joined into one string.
+        with self._open(name) as member:
+            with io.TextIOWrapper(member, encoding="utf-8", newline="") as fp:
+                write(fp)
+
+    def add_file(self, name: str, source_path: str):
+        with self._open(name) as member, open(source_path, "rb") as source:
+            shutil.copyfileobj(source, member, 1 << 20)
+
+    def add_directory(self, source_dir: str) -> int:
+        # Pages are packed first; a static file with the same name loses,
+        # just as a copied static file is overwritten by its page.
+        added = 0
+        root = Path(source_dir)
+        for path in sorted(root.rglob("*")):
+            name = path.relative_to(root).as_posix()
+            if path.is_file() and name not in self.names:
+                self.add_file(name, str(path))
+                added += 1
+        return added
+
+    def close(self):
+        self.zip.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.zip.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+class SiteArchive:
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.entries: dict[str, tuple[int, int]] = {}
+
+        # The central directory only records where each local header starts;
+        # the data follows the header's variable-length name and extra field.
+        with zipfile.ZipFile(self.file) as archive:
+            for info in archive.infolist():
+                if info.compress_type != zipfile.ZIP_STORED:
+                    raise ValueError(f"Compressed archive member: {info.filename}")
+                name_length, extra_length = struct.unpack_from(
+                    "<HH", self.map, info.header_offset + 26
+                )
+                start = info.header_offset + LOCAL_HEADER_SIZE + name_length + extra_length
+                self.entries[info.filename] = (start, info.file_size)
+
+    def __repr__(self):
+        return f"SiteArchive({self.path}, {len(self.entries)} entries)"
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.entries
+
+    def get(self, name: str) -> memoryview | None:
+        entry = self.entries.get(name)
+        if entry is None:
+            return None
+        start, size = entry
+        return memoryview(self.map)[start:start + size]
+
+    def close(self):
+        self.map.close()
+        self.file.close()
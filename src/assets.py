@@ -0,0 +1,131 @@
+import errno
+import os
+import shutil
+from pathlib import Path
+
+from manifest import Manifest, file_hash
+
+SYNC_MODES = ("copy", "hardlink", "reflink")
+
+# Linux FICLONE ioctl: share the source's extents on btrfs, XFS and friends.
+FICLONE = 0x40049409
+
+class SyncStats:
+    def __init__(self):
+        self.copied = 0
+        self.unchanged = 0
+        self.removed = 0
+
+    def __repr__(self):
+        return f"SyncStats({self.copied} copied, {self.unchanged} unchanged, {self.removed} removed)"
+
+def remove_empty_dirs(directory: Path, root: Path):
+    while directory != root and directory.is_dir() and not any(directory.iterdir()):
+        directory.rmdir()
+        directory = directory.parent
+
+def _reflink(src: str, dst: str):
+    import fcntl
+
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+    shutil.copystat(src, dst)
+
+def place_file(src: str, dst: str, mode: str = "copy"):
+    if mode not in SYNC_MODES:
+        raise ValueError(f"Unknown sync mode: {mode}")
+
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    tmp_path = dst + ".tmp"
+    try:
+        if mode == "hardlink":
+            try:
+                os.link(src, tmp_path)
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                    raise
+                shutil.copy2(src, tmp_path)
+        elif mode == "reflink":
+            try:
+                _reflink(src, tmp_path)
+            except (OSError, ImportError):
+                shutil.copy2(src, tmp_path)
+        else:
+            shutil.copy2(src, tmp_path)
+        os.replace(tmp_path, dst)
+    finally:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+
+def _is_current(src: str, dst: str, entry: dict | None, src_hash: str | None) -> bool:
+    try:
+        src_stat = os.stat(src)
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        return False
+
+    if src_stat.st_ino == dst_stat.st_ino and src_stat.st_dev == dst_stat.st_dev:
+        return True
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if src_hash is not None:
+        return entry is not None and entry.get("hash") == src_hash
+    return src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+
+def sync_directory(
+        src: str,
+        dst: str,
+        manifest: Manifest,
+        mode: str = "copy",
+        checksum: bool = False
+    ) -> SyncStats:
+    src_path = Path(src)
+    dst_path = Path(dst)
+    stats = SyncStats()
+
+    seen = set()
+    for src_file in sorted(src_path.rglob("*")):
+        if not src_file.is_file():
+            continue
+        relative_path = src_file.relative_to(src_path).as_posix()
+        dst_file = dst_path / relative_path
+        seen.add(relative_path)
+
+        src_stat = src_file.stat()
+        entry = manifest.assets.get(relative_path)
+        src_hash = None
+        if checksum:
+            if (
+                entry is not None
+                and entry.get("mtime_ns") == src_stat.st_mtime_ns
+                and entry.get("size") == src_stat.st_size
+                and "hash" in entry
+            ):
+                src_hash = entry["hash"]
+            else:
+                src_hash = file_hash(str(src_file))
+
+        if _is_current(str(src_file), str(dst_file), entry, src_hash):
+            stats.unchanged += 1
+        else:
+            print(f"Copying {src_file} to {dst_file}")
+            place_file(str(src_file), str(dst_file), mode)
+            stats.copied += 1
+
+        entry = {"size": src_stat.st_size, "mtime_ns": src_stat.st_mtime_ns}
+        if src_hash is not None:
+            entry["hash"] = src_hash
+        manifest.assets[relative_path] = entry
+
+    # Only files this sync placed earlier are pruned; rendered pages and
+    # anything else in the output tree are left alone.
+    for relative_path in sorted(set(manifest.assets) - seen):
+        dst_file = dst_path / relative_path
+        if dst_file.is_file():
+            print(f"Removing stale asset: {dst_file}")
+            dst_file.unlink()
+            remove_empty_dirs(dst_file.parent, dst_path)
+            stats.removed += 1
+        del manifest.assets[relative_path]
+
+    return stats
@@ -0,0 +1,77 @@
+import hashlib
+import os
+import shutil
+
+from markdown import parser_signature
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "pages")
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+class RenderCache:
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return f"RenderCache({self.directory}, {self.max_bytes})"
+
+    def key(self, markdown: str, context: str | None = None) -> str:
+        # The context covers render inputs outside the markdown itself, such
+        # as the attributes its images are rendered with.
+        digest = hashlib.sha256(parser_signature().encode())
+        digest.update(b"\0")
+        digest.update(markdown.encode())
+        if context is not None:
+            digest.update(b"\0")
+            digest.update(context.encode())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".html")
+
+    def get(self, markdown: str, context: str | None = None) -> str | None:
+        path = self._path(self.key(markdown, context))
+        try:
+            with open(path, "r") as cache_file:
+                html = cache_file.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        # The mtime doubles as the last-used time for LRU eviction.
+        os.utime(path)
+        self.hits += 1
+        return html
+
+    def put(self, markdown: str, html: str, context: str | None = None):
+        path = self._path(self.key(markdown, context))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as cache_file:
+            cache_file.write(html)
+        os.replace(tmp_path, path)
+
+    def prune(self) -> int:
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+                total += stat.st_size
+
+        removed = 0
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
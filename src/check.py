@@ -0,0 +1,303 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from depgraph import TEMPLATE_REFERENCE_PATTERN, is_internal, output_candidates, resolve_url
+from frontmatter import page_metadata, split_front_matter_lines
+from listings import LISTING_PAGE_SIZE, Listings
+from manifest import Manifest
+from markdown import is_fence_line
+from template import PLACEHOLDER_PATTERN
+from textnode import IMAGE_PATTERN, LINK_PATTERN
+
+REPORT_VERSION = 1
+
+# Every page and static file of the site, sent once to each worker so that
+# resolving a link is a few set lookups rather than filesystem calls.
+_targets: frozenset[str] = frozenset()
+# Site-absolute URLs resolve the same from every page, so each one is only
+# looked up once per process.
+_resolved: dict[str, bool] = {}
+
+def _set_targets(targets: frozenset[str]):
+    global _targets
+    _targets = targets
+    _resolved.clear()
+
+class CheckStats:
+    def __init__(self):
+        self.files = 0
+        self.links = 0
+        self.images = 0
+        self.external = 0
+
+    def __repr__(self):
+        return (
+            f"CheckStats({self.files} files, {self.links} links, "
+            f"{self.images} images, {self.external} external)"
+        )
+
+    def merge(self, other: "CheckStats"):
+        self.files += other.files
+        self.links += other.links
+        self.images += other.images
+        self.external += other.external
+
+def site_path(url: str, page: str) -> str | None:
+    # The path relative to the output root that an internal URL points at,
+    # as depgraph.resolve_url would give it; None for external URLs and bare
+    # fragments. Plain site-absolute URLs, by far the most common, skip
+    # urlsplit and normpath.
+    if url.startswith("/") and not url.startswith("//"):
+        path = url.partition("#")[0].partition("?")[0]
+        if "/." not in path and "//" not in path:
+            path = path.strip("/")
+            return unquote(path) if "%" in path else path
+    elif not is_internal(url):
+        return None
+    return unquote(resolve_url(url, page))
+
+def resolve_target(url: str, page: str, targets: frozenset[str]) -> str | None:
+    path = site_path(url, page)
+    if path is None:
+        return None
+    for candidate in output_candidates(path):
+        if candidate in targets:
+            return candidate
+    return None
+
+def _blank_fences(text: str) -> str:
+    # Links inside fenced code blocks are shown, not followed; their lines
+    # are emptied so the line numbers of everything else stay put.
+    lines = text.split("\n")
+    blanked = list(lines)
+    in_fence = False
+    opened = 0
+    for index, line in enumerate(lines):
+        if is_fence_line(line, in_fence):
+            in_fence = not in_fence
+            opened = index
+            blanked[index] = ""
+        elif in_fence:
+            blanked[index] = ""
+    # A fence that never closes renders as ordinary text, links included.
+    if in_fence:
+        blanked[opened:] = lines[opened:]
+    return "\n".join(blanked)
+
+def check_text(
+        text: str,
+        source: str,
+        page: str,
+        basepath: str,
+        stats: CheckStats,
+        broken: list[dict]
+    ):
+    stats.files += 1
+    if "```" in text:
+        text = _blank_fences(text)
+    for kind, pattern in (("image", IMAGE_PATTERN), ("link", LINK_PATTERN)):
+        for match in pattern.finditer(text):
+            url = match.group(2)
+            if kind == "image":
+                stats.images += 1
+            else:
+                stats.links += 1
+            found = _resolved.get(url)
+            if found is None:
+                path = site_path(url, page)
+                if path is None:
+                    parts = urlsplit(url)
+                    if parts.scheme or parts.netloc:
+                        stats.external += 1
+                    continue
+                found = any(candidate in _targets for candidate in output_candidates(path))
+                if url.startswith("/"):
+                    _resolved[url] = found
+            if found:
+                continue
+            broken.append({
+                "source": source,
+                # Only counted for the rare broken link.
+                "line": text.count("\n", 0, match.start()) + 1,
+                "kind": kind,
+                "url": url,
+                # Site-absolute URLs are rewritten under the basepath when the
+                # page is built; this is what the page will actually contain.
+                "rendered": basepath + url[1:] if url.startswith("/") else url,
+            })
+
+def check_markdown(job: tuple[str, str, str]) -> tuple[CheckStats, list[dict]]:
+    source, page, basepath = job
+    stats = CheckStats()
+    broken = []
+    with open(source, "r") as markdown_file:
+        check_text(markdown_file.read(), source, page, basepath, stats, broken)
+    broken.sort(key=lambda problem: problem["line"])
+    return stats, broken
+
+def check_template(template_path: str, basepath: str) -> tuple[CheckStats, list[dict]]:
+    stats = CheckStats()
+    broken = []
+    stats.files += 1
+    with open(template_path, "r") as template_file:
+        for line_number, line in enumerate(template_file, start=1):
+            for url in TEMPLATE_REFERENCE_PATTERN.findall(PLACEHOLDER_PATTERN.sub("", line)):
+                stats.links += 1
+                if resolve_target(url, "", _targets) is None:
+                    broken.append({
+                        "source": template_path,
+                        "line": line_number,
+                        "kind": "link",
+                        "url": url,
+                        "rendered": basepath + url[1:],
+                    })
+    return stats, broken
+
+def listing_targets(pages: dict[str, str], listings: Listings) -> set[str]:
+    # The listing, tag and feed pages a build with these listings generates,
+    # planned from the front matter alone.
+    manifest = Manifest("")
+    prefixes = tuple(section + "/" for section in listings.sections)
+    for page, source in pages.items():
+        if not page.startswith(prefixes):
+            continue
+        try:
+            with open(source, "r") as markdown_file:
+                front_matter, _ = split_front_matter_lines(markdown_file)
+            metadata = page_metadata(front_matter, "")
+        except (OSError, ValueError):
+            # The page fails to build, so it appears on no listing.
+            continue
+        # Summaries do not change which pages are planned.
+        metadata["summary"] = ""
+        manifest.pages[page] = {"source": source, "meta": metadata}
+    return set(listings.plan(manifest))
+
+def site_targets(
+        content_dir: str,
+        static_dir: str,
+        listings: Listings | None = None
+    ) -> tuple[dict[str, str], frozenset[str]]:
+    content_path = Path(content_dir)
+    pages = {}
+    for md_file in content_path.rglob("*.md"):
+        pages[md_file.relative_to(content_path).with_suffix(".html").as_posix()] = str(md_file)
+    targets = set(pages)
+    if listings is not None:
+        targets |= listing_targets(pages, listings)
+    for root, _, files in os.walk(static_dir):
+        for name in files:
+            targets.add(Path(root, name).relative_to(static_dir).as_posix())
+    return pages, frozenset(targets)
+
+def check_site(
+        content_dir: str,
+        static_dir: str,
+        template_path: str | None = None,
+        basepath: str = "/",
+        workers: int = 1,
+        listings: Listings | None = None
+    ) -> tuple[CheckStats, list[dict], int]:
+    pages, targets = site_targets(content_dir, static_dir, listings)
+    _set_targets(targets)
+    jobs = [(source, page, basepath) for page, source in sorted(pages.items())]
+
+    stats = CheckStats()
+    broken = []
+    if template_path is not None:
+        template_stats, template_broken = check_template(template_path, basepath)
+        stats.merge(template_stats)
+        broken.extend(template_broken)
+
+    if workers > 1 and len(jobs) > 1:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_set_targets, initargs=(targets,)
+        ) as executor:
+            results = executor.map(check_markdown, jobs, chunksize=chunksize)
+            for page_stats, page_broken in results:
+                stats.merge(page_stats)
+                broken.extend(page_broken)
+    else:
+        for job in jobs:
+            page_stats, page_broken = check_markdown(job)
+            stats.merge(page_stats)
+            broken.extend(page_broken)
+    return stats, broken, len(targets)
+
+def check_main(argv: list[str], content_dir: str, static_dir: str, template_path: str) -> int:
+    parser = argparse.ArgumentParser(
+        prog="main.py check",
+        description="Find links and images in the content that resolve to no page or static file.",
+    )
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument("--content", default=content_dir, metavar="DIR")
+    parser.add_argument("--static", default=static_dir, metavar="DIR")
+    parser.add_argument("--template", default=template_path, metavar="FILE")
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="scan pages in N worker processes (0 uses every CPU)",
+    )
+    parser.add_argument(
+        "--listings",
+        action="append",
+        default=[],
+        metavar="SECTION",
+        help="count the listing, tag and feed pages built for SECTION as targets (repeatable)",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=LISTING_PAGE_SIZE,
+        metavar="N",
+        help="posts per listing page, as given to the build",
+    )
+    parser.add_argument(
+        "--report",
+        metavar="FILE",
+        help="write the findings as JSON to FILE (- for standard output)",
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 0:
+        parser.error("--jobs must be zero or a positive integer")
+    if args.page_size < 1:
+        parser.error("--page-size must be a positive integer")
+    workers = args.jobs or os.cpu_count() or 1
+    listings = Listings(args.listings, args.page_size) if args.listings else None
+
+    stats, broken, targets = check_site(
+        args.content, args.static, args.template, args.basepath, workers, listings
+    )
+    report = {
+        "version": REPORT_VERSION,
+        "basepath": args.basepath,
+        "files": stats.files,
+        "targets": targets,
+        "links": stats.links,
+        "images": stats.images,
+        "external": stats.external,
+        "broken": broken,
+    }
+    if args.report == "-":
+        json.dump(report, sys.stdout, indent=1)
+        print()
+    else:
+        for problem in broken:
+            print(f"{problem['source']}:{problem['line']}: broken {problem['kind']} {problem['url']}")
+        print(
+            f"Checked {stats.links} link(s) and {stats.images} image(s) in {stats.files} file(s): "
+            f"{len(broken)} broken, {stats.external} external not checked"
+        )
+        if args.report:
+            with open(args.report, "w") as report_file:
+                json.dump(report, report_file, indent=1)
+            print(f"Check report written to {args.report}")
+    return 1 if broken else 0
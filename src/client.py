@@ -0,0 +1,61 @@
+import json
+import os
+import socket
+import sys
+from typing import TextIO
+
+# Kept to the standard library's socket and json so a build request starts
+# in a fraction of the time importing the generator itself would take.
+DEFAULT_SOCKET = ".cache/site.sock"
+
+USAGE = """usage: client.py [--socket PATH] [--stop] [BUILD ARGS...]
+
+Forward BUILD ARGS (the same arguments src/main.py takes) to a running
+'main.py daemon' and print its output. --stop shuts the daemon down."""
+
+def request_build(
+        socket_path: str,
+        argv: list[str],
+        cwd: str,
+        out: TextIO = sys.stdout,
+        stop: bool = False
+    ) -> int:
+    request = {"argv": argv, "cwd": cwd, "stop": stop}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        connection.sendall((json.dumps(request) + "\n").encode())
+        with connection.makefile("r") as replies:
+            for line in replies:
+                reply = json.loads(line)
+                if "output" in reply:
+                    out.write(reply["output"] + "\n")
+                if "status" in reply:
+                    return reply["status"]
+    raise ConnectionError("The build daemon closed the connection mid-build")
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    socket_path = os.environ.get("SITE_DAEMON_SOCKET", DEFAULT_SOCKET)
+    stop = False
+    while argv and argv[0] in ("--socket", "--stop"):
+        option = argv.pop(0)
+        if option == "--stop":
+            stop = True
+        elif argv:
+            socket_path = argv.pop(0)
+        else:
+            print(USAGE, file=sys.stderr)
+            return 2
+
+    try:
+        return request_build(socket_path, argv, os.getcwd(), stop=stop)
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(
+            f"No build daemon on {socket_path}; start one with "
+            "'python3 src/main.py daemon' or run src/main.py directly",
+            file=sys.stderr,
+        )
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import gzip
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from manifest import Manifest
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_SUFFIXES = (".html", ".css", ".svg", ".js", ".xml")
+VARIANTS = (".gz", ".br") if brotli is not None else (".gz",)
+
+# A variant is only kept when it is at least this much smaller than the
+# original; below MIN_SIZE bytes the headers eat most of any saving.
+MAX_RATIO = 0.9
+MIN_SIZE = 256
+
+class CompressStats:
+    def __init__(self):
+        self.compressed = 0
+        self.unchanged = 0
+        self.skipped = 0
+        self.removed = 0
+
+    def __repr__(self):
+        return (
+            f"CompressStats({self.compressed} compressed, {self.unchanged} unchanged, "
+            f"{self.skipped} skipped, {self.removed} removed)"
+        )
+
+def _encode(suffix: str, data: bytes) -> bytes:
+    if suffix == ".gz":
+        # A fixed mtime keeps the variant identical for identical input.
+        return gzip.compress(data, 9, mtime=0)
+    return brotli.compress(data, quality=11)
+
+def _write_variant(path: str, data: bytes):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as variant_file:
+        variant_file.write(data)
+    os.replace(tmp_path, path)
+
+def _remove_variants(path: str, keep: tuple[str, ...] = ()) -> int:
+    removed = 0
+    for suffix in (".gz", ".br"):
+        if suffix not in keep and os.path.exists(path + suffix):
+            os.remove(path + suffix)
+            removed += 1
+    return removed
+
+def compress_file(path: str, entry: dict | None) -> tuple[str, list[str] | None]:
+    with open(path, "rb") as source:
+        data = source.read()
+    digest = hashlib.sha256(data).hexdigest()
+    if (
+        entry is not None
+        and entry["hash"] == digest
+        and all(os.path.exists(path + suffix) for suffix in entry["variants"])
+    ):
+        return digest, None
+
+    variants = []
+    if len(data) >= MIN_SIZE:
+        for suffix in VARIANTS:
+            compressed = _encode(suffix, data)
+            if len(compressed) <= len(data) * MAX_RATIO:
+                _write_variant(path + suffix, compressed)
+                variants.append(suffix)
+    _remove_variants(path, tuple(variants))
+    return digest, variants
+
+def _compress_job(job: tuple[str, dict | None]) -> tuple[str, list[str] | None]:
+    return compress_file(*job)
+
+def remove_compressed(dest_dir: str, manifest: Manifest) -> int:
+    # A build without compression rewrites outputs without refreshing their
+    # variants, which a server would otherwise keep sending in their place.
+    removed = 0
+    for name in sorted(manifest.compressed):
+        removed += _remove_variants(os.path.join(dest_dir, name))
+    manifest.compressed.clear()
+    return removed
+
+def compress_outputs(dest_dir: str, manifest: Manifest, workers: int = 1) -> CompressStats:
+    stats = CompressStats()
+    dest_path = Path(dest_dir)
+    names = sorted(
+        path.relative_to(dest_path).as_posix()
+        for path in dest_path.rglob("*")
+        if path.suffix in COMPRESSIBLE_SUFFIXES and path.is_file()
+    )
+
+    # Variants of outputs that no longer exist are removed with them.
+    for name in sorted(set(manifest.compressed) - set(names)):
+        stats.removed += _remove_variants(str(dest_path / name))
+        del manifest.compressed[name]
+
+    jobs = [(str(dest_path / name), manifest.compressed.get(name)) for name in names]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunksize = max(1, len(jobs) // (workers * 4))
+            results = list(executor.map(_compress_job, jobs, chunksize=chunksize))
+    else:
+        results = [_compress_job(job) for job in jobs]
+
+    for name, (digest, variants) in zip(names, results):
+        if variants is None:
+            stats.unchanged += 1
+            continue
+        manifest.compressed[name] = {"hash": digest, "variants": variants}
+        if variants:
+            stats.compressed += 1
+        else:
+            stats.skipped += 1
+    return stats
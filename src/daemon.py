@@ -0,0 +1,138 @@
+import argparse
+import contextlib
+import json
+import os
+import socket
+import socketserver
+import threading
+import traceback
+
+import main as site
+
+DEFAULT_SOCKET = ".cache/site.sock"
+
+# Subcommands that never return or would start another daemon are refused.
+REFUSED_COMMANDS = ("serve", "daemon")
+
+class SocketWriter:
+    # Stands in for stdout and stderr during a build and forwards every
+    # complete line to the client. Pool workers forked mid-build inherit
+    # it, so their output reaches the client too.
+    def __init__(self, connection: socket.socket):
+        self.connection = connection
+        self.buffer = ""
+
+    def write(self, text: str) -> int:
+        *lines, self.buffer = (self.buffer + text).split("\n")
+        for line in lines:
+            self.send({"output": line})
+        return len(text)
+
+    def flush(self):
+        if self.buffer:
+            self.send({"output": self.buffer})
+            self.buffer = ""
+
+    def send(self, message: dict):
+        self.connection.sendall((json.dumps(message) + "\n").encode())
+
+def run_build(argv: list[str], cwd: str, out: SocketWriter) -> int:
+    if argv and argv[0] in REFUSED_COMMANDS:
+        out.write(f"The daemon does not run '{argv[0]}'\n")
+        return 2
+
+    # Builds resolve their paths against the client's working directory,
+    # which is process-wide state, so the caller must hold the build lock.
+    previous = os.getcwd()
+    try:
+        os.chdir(cwd)
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(out):
+            try:
+                status = site.main(argv)
+            except SystemExit as e:
+                if isinstance(e.code, str):
+                    print(e.code)
+                status = e.code if isinstance(e.code, int) else int(bool(e.code))
+            except Exception:
+                traceback.print_exc()
+                status = 1
+    finally:
+        os.chdir(previous)
+    return status or 0
+
+class BuildRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        out = SocketWriter(self.connection)
+        try:
+            request = json.loads(self.rfile.readline())
+            argv = [str(arg) for arg in request["argv"]]
+            cwd = str(request["cwd"])
+        except (ValueError, KeyError, TypeError):
+            out.send({"output": "Malformed build request", "status": 2})
+            return
+
+        if request.get("stop"):
+            out.send({"output": "Stopping build daemon", "status": 0})
+            threading.Thread(target=self.server.shutdown).start()
+            return
+
+        with self.server.build_lock:
+            status = run_build(argv, cwd, out)
+        out.flush()
+        out.send({"status": status})
+
+class BuildDaemon(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str):
+        self.build_lock = threading.Lock()
+        super().__init__(socket_path, BuildRequestHandler)
+
+def _clear_stale_socket(socket_path: str):
+    if not os.path.exists(socket_path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.remove(socket_path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"A build daemon is already listening on {socket_path}")
+
+def make_daemon(socket_path: str) -> BuildDaemon:
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+    _clear_stale_socket(socket_path)
+    return BuildDaemon(socket_path)
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="main.py daemon",
+        description="Keep a warm build process and run builds sent by src/client.py.",
+    )
+    parser.add_argument(
+        "--socket",
+        default=DEFAULT_SOCKET,
+        metavar="PATH",
+        help=f"Unix socket to listen on (default {DEFAULT_SOCKET})",
+    )
+    return parser.parse_args(argv)
+
+def daemon_main(argv: list[str]):
+    args = parse_args(argv)
+    try:
+        daemon = make_daemon(args.socket)
+    except RuntimeError as e:
+        print(e)
+        return 1
+    print(f"Build daemon listening on {args.socket}")
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.server_close()
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+    print("Build daemon stopped")
@@ -0,0 +1,124 @@
+import posixpath
+import re
+from typing import Iterable
+from urllib.parse import urlsplit
+
+from manifest import Manifest
+from template import PLACEHOLDER_PATTERN
+from textnode import extract_markdown_images, extract_markdown_links
+
+TEMPLATE_REFERENCE_PATTERN = re.compile(r'(?:href|src)="(/[^"]*)"')
+
+def page_references(markdown: str) -> dict[str, list[str]]:
+    return {
+        "images": sorted({url for _, url in extract_markdown_images(markdown)}),
+        "links": sorted({url for _, url in extract_markdown_links(markdown)}),
+    }
+
+def page_references_from_lines(lines: Iterable[str]) -> dict[str, list[str]]:
+    images = set()
+    links = set()
+    for line in lines:
+        images.update(url for _, url in extract_markdown_images(line))
+        links.update(url for _, url in extract_markdown_links(line))
+    return {"images": sorted(images), "links": sorted(links)}
+
+def is_internal(url: str) -> bool:
+    parts = urlsplit(url)
+    return not parts.scheme and not parts.netloc and bool(parts.path)
+
+def resolve_url(url: str, page: str) -> str:
+    # Turn a link as written in a page into a path relative to the output
+    # root, the same way the server would resolve it.
+    path = urlsplit(url).path
+    if not path.startswith("/"):
+        path = posixpath.join("/" + posixpath.dirname(page), path)
+    return posixpath.normpath(path).lstrip("/") if path != "/" else ""
+
+def output_candidates(path: str) -> list[str]:
+    if not path:
+        return ["index.html"]
+    return [path, f"{path}/index.html", f"{path}.html"]
+
+class DependencyGraph:
+    def __init__(self, manifest: Manifest, template_path: str | None = None):
+        self.manifest = manifest
+        self.template_references = []
+        if template_path is not None:
+            with open(template_path, "r") as template_file:
+                template = PLACEHOLDER_PATTERN.sub("", template_file.read())
+            self.template_references = TEMPLATE_REFERENCE_PATTERN.findall(template)
+
+    @classmethod
+    def load(cls, dest_dir: str, template_path: str | None = None) -> "DependencyGraph":
+        return cls(Manifest.load(dest_dir), template_path)
+
+    def find_page(self, query: str) -> str | None:
+        if query in self.manifest.pages:
+            return query
+        for page, entry in self.manifest.pages.items():
+            if entry.get("source") == query:
+                return page
+        for candidate in output_candidates(resolve_url(query, "")):
+            if candidate in self.manifest.pages:
+                return candidate
+        return None
+
+    def resolve(self, url: str, page: str) -> str | None:
+        for candidate in output_candidates(resolve_url(url, page)):
+            if candidate in self.manifest.pages or candidate in self.manifest.assets:
+                return candidate
+        return None
+
+    def explain(self, query: str) -> dict:
+        page = self.find_page(query)
+        if page is None:
+            raise KeyError(f"No page built for: {query}")
+        entry = self.manifest.pages[page]
+        return {
+            "page": page,
+            "source": entry["source"],
+            "template": entry.get("template"),
+            "basepath": entry["basepath"],
+            "images": entry.get("images", []),
+            "links": entry.get("links", []),
+            "linked_from": sorted(
+                other
+                for other, other_entry in self.manifest.pages.items()
+                if other != page
+                and any(
+                    is_internal(url) and self.resolve(url, other) == page
+                    for url in other_entry.get("links", [])
+                )
+            ),
+        }
+
+    def dependents(self, path: str) -> list[str]:
+        pages = []
+        for page, entry in self.manifest.pages.items():
+            if path in (entry["source"], entry.get("template")):
+                pages.append(page)
+            elif any(
+                is_internal(url) and self.resolve(url, page) == path
+                for url in entry.get("images", [])
+            ):
+                pages.append(page)
+        return sorted(pages)
+
+    def dead_links(self) -> list[tuple[str, str]]:
+        dead = []
+        for page, entry in sorted(self.manifest.pages.items()):
+            for url in entry.get("links", []) + entry.get("images", []):
+                if is_internal(url) and self.resolve(url, page) is None:
+                    dead.append((page, url))
+        return dead
+
+    def unused_assets(self) -> list[str]:
+        used = set()
+        for url in self.template_references:
+            used.add(self.resolve(url, ""))
+        for page, entry in self.manifest.pages.items():
+            for url in entry.get("links", []) + entry.get("images", []):
+                if is_internal(url):
+                    used.add(self.resolve(url, page))
+        return sorted(asset for asset in self.manifest.assets if asset not in used)
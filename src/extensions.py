@@ -0,0 +1,177 @@
+import importlib
+import re
+
+from htmlnode import HTMLNode, LeafNode, ParentNode
+from markdown import (
+    BlockExtension,
+    InlineExtension,
+    block_to_html_node,
+    parser_signature,
+    register_block,
+    register_inline_delimiter,
+    register_inline_pattern,
+    reset_extensions,
+    text_to_childen,
+)
+from textnode import TextNode
+
+# | Name | Size |
+# |:-----|-----:|
+# | tom  |    3 |
+TABLE_DELIMITER_PATTERN = re.compile(r"\|?\s*:?-+:?\s*(?:\|\s*:?-+:?\s*)*\|?\s*\Z")
+
+def _table_cells(line: str) -> list[str]:
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|"):
+        line = line[:-1]
+    return [cell.strip() for cell in line.split("|")]
+
+def _is_table(block: str) -> bool:
+    lines = block.split("\n")
+    return (
+        len(lines) >= 2
+        and all(line.startswith("|") for line in lines)
+        and TABLE_DELIMITER_PATTERN.match(lines[1]) is not None
+    )
+
+def _alignment(cell: str) -> str | None:
+    if cell.startswith(":") and cell.endswith(":"):
+        return "center"
+    if cell.endswith(":"):
+        return "right"
+    if cell.startswith(":"):
+        return "left"
+    return None
+
+def _table_row(tag: str, cells: list[str], alignments: list[str | None]) -> HTMLNode:
+    children = []
+    for index, alignment in enumerate(alignments):
+        text = cells[index] if index < len(cells) else ""
+        props = {"style": f"text-align: {alignment}"} if alignment else None
+        if text:
+            children.append(ParentNode(tag, text_to_childen(text), props))
+        else:
+            children.append(LeafNode(tag, "", props))
+    return ParentNode("tr", children)
+
+def table_to_html_node(block: str) -> HTMLNode:
+    lines = block.split("\n")
+    alignments = [_alignment(cell) for cell in _table_cells(lines[1])]
+    children = [ParentNode("thead", [_table_row("th", _table_cells(lines[0]), alignments)])]
+    if len(lines) > 2:
+        children.append(ParentNode(
+            "tbody", [_table_row("td", _table_cells(line), alignments) for line in lines[2:]]
+        ))
+    return ParentNode("table", children)
+
+# !!! note "Optional title"
+#     Any single block of markdown, indented by four spaces.
+ADMONITION_PATTERN = re.compile(r'!!! ([\w-]+)(?: +"(.*)")? *(?:\n|\Z)')
+
+def admonition_to_html_node(block: str) -> HTMLNode:
+    match = ADMONITION_PATTERN.match(block)
+    kind = match.group(1)
+    title = match.group(2)
+    if title is None:
+        title = kind.replace("-", " ").capitalize()
+    body = "\n".join(
+        line[4:] if line.startswith("    ") else line.lstrip()
+        for line in block[match.end():].split("\n")
+    ).strip()
+
+    children = []
+    if title:
+        children.append(ParentNode("p", text_to_childen(title), {"class": "admonition-title"}))
+    if body:
+        children.append(block_to_html_node(body))
+    return ParentNode("div", children, {"class": f"admonition {kind}"})
+
+# Text with a reference[^1].
+#
+# [^1]: The note, rendered where it is defined.
+FOOTNOTE_REFERENCE_PATTERN = re.compile(r"\[\^([^\]\s]+)\](?!:)")
+FOOTNOTE_DEFINITION_PATTERN = re.compile(r"\[\^([^\]\s]+)\]: ?(.*)")
+
+def _is_footnotes(block: str) -> bool:
+    return all(FOOTNOTE_DEFINITION_PATTERN.match(line) for line in block.split("\n"))
+
+def footnote_reference_to_html_node(text_node: TextNode) -> HTMLNode:
+    label = text_node.text
+    return ParentNode(
+        "sup", [LeafNode("a", label, {"href": f"#fn-{label}"})], {"id": f"fnref-{label}"}
+    )
+
+def footnotes_to_html_node(block: str) -> HTMLNode:
+    items = []
+    for line in block.split("\n"):
+        label, text = FOOTNOTE_DEFINITION_PATTERN.match(line).groups()
+        children = text_to_childen(text) if text else []
+        children.append(LeafNode("a", "&#8617;", {"href": f"#fnref-{label}"}))
+        items.append(ParentNode("li", children, {"id": f"fn-{label}"}))
+    return ParentNode("ol", items, {"class": "footnotes"})
+
+def register_tables():
+    register_block(BlockExtension("tables", ("|",), _is_table, table_to_html_node))
+
+def register_admonitions():
+    register_block(BlockExtension(
+        "admonitions", ("!!! ",), ADMONITION_PATTERN.match, admonition_to_html_node
+    ))
+
+def register_footnotes():
+    register_block(BlockExtension("footnotes", ("[^",), _is_footnotes, footnotes_to_html_node))
+    register_inline_pattern(
+        "[^",
+        FOOTNOTE_REFERENCE_PATTERN,
+        InlineExtension("footnote-references", footnote_reference_to_html_node),
+    )
+
+def register_strikethrough():
+    register_inline_delimiter(
+        "~~", InlineExtension("strikethrough", lambda node: LeafNode("del", node.text))
+    )
+
+EXTENSIONS = {
+    "tables": register_tables,
+    "admonitions": register_admonitions,
+    "footnotes": register_footnotes,
+    "strikethrough": register_strikethrough,
+}
+
+def extension_loader(name: str):
+    # A bundled extension by name, or a module whose register() adds its own.
+    if name in EXTENSIONS:
+        return EXTENSIONS[name]
+    try:
+        module = importlib.import_module(name)
+    except ImportError:
+        raise ValueError(f"Unknown markdown extension: {name}")
+    if not callable(getattr(module, "register", None)):
+        raise ValueError(f"Markdown extension module {name} has no register()")
+    return module.register
+
+_loaded: list[str] = []
+# The parser signature right after the last load; a reset or registration
+# made directly through markdown since then changes it.
+_loaded_signature: str | None = None
+
+def loaded_extensions() -> list[str]:
+    if parser_signature() != _loaded_signature:
+        return []
+    return list(_loaded)
+
+def load_extensions(names: list[str]):
+    # Replaces whatever was registered before, so a long-lived process
+    # builds each site with exactly the extensions it asks for.
+    global _loaded_signature
+    if list(names) == loaded_extensions():
+        return
+    loaders = [extension_loader(name) for name in names]
+    reset_extensions()
+    _loaded.clear()
+    for name, loader in zip(names, loaders):
+        loader()
+        _loaded.append(name)
+    _loaded_signature = parser_signature()
@@ -0,0 +1,93 @@
+from datetime import date
+from itertools import chain
+from typing import Iterable, Iterator
+
+from markdown import BlockType, block_to_block_type, iter_blocks
+from textnode import TextType, text_to_textnodes
+
+FRONT_MATTER_DELIMITER = "---"
+LIST_KEYS = ("tags",)
+
+def _parse_value(key: str, value: str) -> str | list[str]:
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    if key not in LIST_KEYS:
+        return value
+    if value.startswith("[") and value.endswith("]"):
+        value = value[1:-1]
+    return [item.strip().strip("\"'") for item in value.split(",") if item.strip()]
+
+def parse_front_matter(lines: Iterable[str]) -> dict:
+    front_matter = {}
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        key, separator, value = line.partition(":")
+        if not separator or not key.strip():
+            raise ValueError(f"Invalid front matter line: {line}")
+        key = key.strip().lower()
+        front_matter[key] = _parse_value(key, value.strip())
+    return front_matter
+
+def split_front_matter(markdown: str) -> tuple[dict, str]:
+    if not markdown.startswith(FRONT_MATTER_DELIMITER):
+        return {}, markdown
+    lines = markdown.split("\n")
+    if lines[0].strip() != FRONT_MATTER_DELIMITER:
+        return {}, markdown
+    for index in range(1, len(lines)):
+        if lines[index].strip() == FRONT_MATTER_DELIMITER:
+            return parse_front_matter(lines[1:index]), "\n".join(lines[index + 1:])
+    raise ValueError("Front matter is missing its closing ---")
+
+def split_front_matter_lines(lines: Iterator[str]) -> tuple[dict, Iterator[str]]:
+    first = next(lines, None)
+    if first is None:
+        return {}, iter(())
+    if first.strip() != FRONT_MATTER_DELIMITER:
+        return {}, chain((first,), lines)
+    front_lines = []
+    for line in lines:
+        if line.strip() == FRONT_MATTER_DELIMITER:
+            return parse_front_matter(front_lines), lines
+        front_lines.append(line)
+    raise ValueError("Front matter is missing its closing ---")
+
+def _is_prose(paragraph: str) -> bool:
+    # Skips paragraphs that are only links or images, like "[< Back Home](/)".
+    for node in text_to_textnodes(paragraph):
+        if node.text_type not in (TextType.LINK, TextType.IMAGE) and node.text.strip():
+            return True
+    return False
+
+def first_paragraph(lines: Iterable[str]) -> str:
+    for block in iter_blocks(lines):
+        if block_to_block_type(block) == BlockType.PARAGRAPH:
+            paragraph = " ".join(block.split("\n"))
+            if _is_prose(paragraph):
+                return paragraph
+    return ""
+
+def page_metadata(front_matter: dict, title: str, markdown: str | None = None) -> dict:
+    published = front_matter.get("date")
+    if published:
+        try:
+            published = date.fromisoformat(published).isoformat()
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid date in front matter: {published}")
+    tags = front_matter.get("tags", [])
+    if isinstance(tags, str):
+        tags = [tags]
+    metadata = {"title": title, "date": published or None, "tags": tags}
+    # Without the markdown the summary is left to page_summary, which only
+    # runs for pages that a listing shows.
+    summary = front_matter.get("summary")
+    if summary or markdown is not None:
+        metadata["summary"] = summary or first_paragraph(markdown.split("\n"))
+    return metadata
+
+def page_summary(source_path: str) -> str:
+    with open(source_path, "r") as markdown_file:
+        front_matter, lines = split_front_matter_lines(markdown_file)
+        return front_matter.get("summary") or first_paragraph(lines)
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Iterator, TextIO
 
 class HTMLNode():
+    # Slots instead of a per-instance __dict__: node trees are the bulk of
+    # a page's memory. props stays None when a node has no attributes, so
+    # no empty dict is ever allocated for them.
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(
             self, 
             tag:str | None = None, 
@@ -28,6 +33,26 @@ class HTMLNode():
 
     def to_html(self):
         raise NotImplementedError
+
+    def iter_html(self) -> Iterator[str]:
+        # Walk the tree with an explicit stack instead of recursing, so deep
+        # documents can't hit the recursion limit and no child string is
+        # copied into its parent's string more than once.
+        stack: list[HTMLNode | str] = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                yield node
+            elif isinstance(node, ParentNode):
+                node._validate()
+                yield f"<{node.tag}{node.props_to_html()}>"
+                stack.append(f"</{node.tag}>")
+                stack.extend(reversed(node.children))
+            else:
+                yield node.to_html()
+
+    def write_html(self, fp: TextIO):
+        fp.writelines(self.iter_html())
     
     def props_to_html(self):
         if self.props is None:
@@ -37,6 +62,8 @@ class HTMLNode():
     
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
             self, 
             tag: str | None, 
@@ -58,7 +85,26 @@ class LeafNode(HTMLNode):
 
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
 
+class FragmentNode(LeafNode):
+    # Markup rendered ahead of time and kept as a single leaf; nodes is how
+    # many nodes it was rendered from, so profiles count it the same way.
+    __slots__ = ("nodes",)
+
+    def __init__(self, value: str, nodes: int):
+        # Built once per inline fragment, so the base initialisers are
+        # skipped.
+        self.tag = None
+        self.value = value
+        self.children = None
+        self.props = None
+        self.nodes = nodes
+
+    def __repr__(self):
+        return f"FragmentNode({self.value}, {self.nodes})"
+
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
             self, 
             tag: str, 
@@ -67,14 +113,12 @@ class ParentNode(HTMLNode):
         ):
         super().__init__(tag, None, children, props)
     
-    def to_html(self) -> str:
+    def _validate(self):
         if not self.tag:
             raise ValueError("All parents nodes must have a tag")
         
         if not self.children:
-            return ValueError("Missing children attribute")
-        
-        children_html = ""
-        for child in self.children:
-            children_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
\ No newline at end of file
+            raise ValueError("Missing children attribute")
+
+    def to_html(self) -> str:
+        return "".join(self.iter_html())
\ No newline at end of file
@@ -0,0 +1,215 @@
+import hashlib
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path, PurePosixPath
+from urllib.parse import unquote, urlsplit
+
+from assets import place_file
+from manifest import Manifest, file_hash
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Bump whenever derivatives would be encoded differently, so cached ones
+# made by an older pipeline are not reused.
+IMAGE_PIPELINE_VERSION = "1"
+IMAGE_WIDTHS = (480, 960, 1600)
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+DEFAULT_IMAGE_CACHE_DIR = os.path.join(".cache", "images")
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+def image_size(path: str) -> tuple[int, int] | None:
+    # PNG and GIF carry their size in the first bytes; anything else needs
+    # Pillow, which only reads the header as well.
+    with open(path, "rb") as image_file:
+        header = image_file.read(24)
+    if header.startswith(PNG_SIGNATURE) and header[12:16] == b"IHDR":
+        return struct.unpack(">II", header[16:24])
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return struct.unpack("<HH", header[6:10])
+    if Image is not None:
+        try:
+            with Image.open(path) as image:
+                return image.size
+        except OSError:
+            return None
+    return None
+
+def derivative_name(relative_path: str, width: int) -> str:
+    path = PurePosixPath(relative_path)
+    return str(path.with_name(f"{path.stem}-{width}w{path.suffix}"))
+
+def _encode_job(job: tuple[str, list[tuple[int, str]]]):
+    source_path, targets = job
+    with Image.open(source_path) as image:
+        for width, cache_path in targets:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.Resampling.LANCZOS)
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            resized.save(tmp_path, format=image.format, optimize=True)
+            os.replace(tmp_path, cache_path)
+
+def remove_image_variants(manifest: Manifest, dest_dir: str, keep: set[str] = frozenset()) -> int:
+    # Derivatives placed by an earlier build, except those listed in keep.
+    removed = 0
+    for url, entry in manifest.image_variants.items():
+        relative_path = unquote(urlsplit(url).path).lstrip("/")
+        for width in entry["widths"]:
+            stale_file = Path(dest_dir) / derivative_name(relative_path, width)
+            if str(stale_file) not in keep and stale_file.is_file():
+                stale_file.unlink()
+                removed += 1
+    manifest.image_variants = {}
+    return removed
+
+class ImageStats:
+    def __init__(self):
+        self.images = 0
+        self.encoded = 0
+        self.cached = 0
+        self.removed = 0
+
+    def __repr__(self):
+        return (
+            f"ImageStats({self.images} images, {self.encoded} encoded, "
+            f"{self.cached} from cache, {self.removed} removed)"
+        )
+
+class ImagePipeline:
+    def __init__(
+            self,
+            static_dir: str,
+            cache_dir: str = DEFAULT_IMAGE_CACHE_DIR,
+            widths: tuple[int, ...] = IMAGE_WIDTHS,
+            link_mode: str = "copy"
+        ):
+        self.static_dir = Path(static_dir)
+        self.cache_dir = cache_dir
+        self.widths = tuple(sorted(widths))
+        self.link_mode = link_mode
+        self.attributes: dict[str, dict[str, str]] = {}
+
+    def __repr__(self):
+        return f"ImagePipeline({self.static_dir}, {self.widths})"
+
+    def _cache_path(self, source_hash: str, width: int, suffix: str) -> str:
+        key = hashlib.sha256(
+            f"{IMAGE_PIPELINE_VERSION}:{source_hash}:{width}".encode()
+        ).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key + suffix)
+
+    def _source(self, url: str) -> Path | None:
+        # Only site-absolute URLs map to one static file for every page.
+        parts = urlsplit(url)
+        if parts.scheme or parts.netloc or not parts.path.startswith("/"):
+            return None
+        source = self.static_dir / unquote(parts.path).lstrip("/")
+        if source.suffix.lower() not in IMAGE_SUFFIXES or not source.is_file():
+            return None
+        return source
+
+    def _entry(self, url: str, source: Path, manifest: Manifest) -> dict | None:
+        # The recorded hash and size are reused while size and mtime are
+        # untouched, so an unchanged image is not even read.
+        stat = source.stat()
+        entry = manifest.image_variants.get(url)
+        if entry is not None and (entry["mtime_ns"], entry["size"]) == (stat.st_mtime_ns, stat.st_size):
+            source_hash = entry["source_hash"]
+        else:
+            source_hash = file_hash(str(source))
+        if entry is not None and entry["source_hash"] == source_hash:
+            size = (entry["width"], entry["height"])
+        else:
+            size = image_size(str(source))
+        if size is None:
+            return None
+        width, height = size
+        return {
+            "source_hash": source_hash,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "width": width,
+            "height": height,
+            # Only downscaled variants; without Pillow there are none.
+            "widths": [w for w in self.widths if w < width] if Image is not None else [],
+        }
+
+    def prepare(
+            self,
+            urls: set[str],
+            dest_dir: str,
+            manifest: Manifest,
+            workers: int = 1
+        ) -> ImageStats:
+        stats = ImageStats()
+        dest_path = Path(dest_dir)
+        entries = {}
+        encode_jobs = []
+        placements = []
+        for url in sorted(urls):
+            source = self._source(url)
+            entry = self._entry(url, source, manifest) if source is not None else None
+            if entry is None:
+                continue
+            entries[url] = entry
+            stats.images += 1
+
+            relative_path = source.relative_to(self.static_dir).as_posix()
+            previous = manifest.image_variants.get(url)
+            placed_before = previous is not None and previous["source_hash"] == entry["source_hash"]
+            missing = []
+            for width in entry["widths"]:
+                cache_path = self._cache_path(entry["source_hash"], width, source.suffix)
+                encoded = not os.path.exists(cache_path)
+                if encoded:
+                    missing.append((width, cache_path))
+                current = placed_before and width in previous["widths"] and not encoded
+                placements.append(
+                    (cache_path, dest_path / derivative_name(relative_path, width), current)
+                )
+            if missing:
+                encode_jobs.append((str(source), missing))
+            stats.encoded += len(missing)
+            stats.cached += len(entry["widths"]) - len(missing)
+
+        if workers > 1 and len(encode_jobs) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(_encode_job, encode_jobs))
+        else:
+            for job in encode_jobs:
+                _encode_job(job)
+
+        # A derivative already in the output is only trusted when it was
+        # placed from the same source by an earlier build; a size check alone
+        # misses an edited image that encodes to the same number of bytes.
+        for cache_path, dest_file, current in placements:
+            if (
+                not current
+                or not dest_file.is_file()
+                or dest_file.stat().st_size != os.path.getsize(cache_path)
+            ):
+                place_file(cache_path, str(dest_file), self.link_mode)
+
+        placed = {str(dest_file) for _, dest_file, _ in placements}
+        stats.removed = remove_image_variants(manifest, dest_dir, placed)
+        manifest.image_variants = entries
+        self.attributes = {url: self._props(url, entry) for url, entry in entries.items()}
+        return stats
+
+    def _props(self, url: str, entry: dict) -> dict[str, str]:
+        props = {
+            "width": str(entry["width"]),
+            "height": str(entry["height"]),
+            "loading": "lazy",
+        }
+        if entry["widths"]:
+            path = urlsplit(url).path
+            candidates = [f"{derivative_name(path, width)} {width}w" for width in entry["widths"]]
+            candidates.append(f"{path} {entry['width']}w")
+            props["srcset"] = ", ".join(candidates)
+        return props
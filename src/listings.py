@@ -0,0 +1,240 @@
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Callable, TextIO
+from xml.sax.saxutils import escape, quoteattr
+
+from assets import remove_empty_dirs
+from frontmatter import page_summary
+from htmlnode import HTMLNode, LeafNode, ParentNode
+from manifest import Manifest
+from markdown import render_inline
+from template import Template, rebase_links
+
+LISTING_PAGE_SIZE = 10
+FEED_SIZE = 20
+FEED_NAME = "feed.xml"
+EPOCH = "1970-01-01"
+
+SLUG_PATTERN = re.compile(r"[^a-z0-9]+")
+
+def tag_slug(tag: str) -> str:
+    return SLUG_PATTERN.sub("-", tag.lower()).strip("-") or "tag"
+
+def page_url(page: str) -> str:
+    return "/" + page.removesuffix("index.html")
+
+class ListingPage:
+    def __init__(
+            self,
+            kind: str,
+            section: str,
+            title: str,
+            posts: list[tuple[str, dict]],
+            newer: str | None = None,
+            older: str | None = None
+        ):
+        self.kind = kind
+        # The section the page lists, which may be nested like docs/posts.
+        self.section = section
+        self.title = title
+        self.posts = posts
+        self.newer = newer
+        self.older = older
+
+    def __repr__(self):
+        return f"ListingPage({self.kind}, {self.title}, {len(self.posts)} posts)"
+
+    def signature(self, template_hash: str, basepath: str, site_url: str) -> str:
+        # Everything the page is rendered from; a post edit that leaves its
+        # metadata alone leaves every listing it appears on untouched.
+        inputs = [
+            self.kind, template_hash, basepath, site_url,
+            self.section, self.title, self.posts, self.newer, self.older,
+        ]
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+    def _post_node(self, page: str, meta: dict) -> HTMLNode:
+        children = [LeafNode("a", meta["title"], {"href": page_url(page)})]
+        if meta["date"]:
+            children.append(LeafNode("time", meta["date"], {"datetime": meta["date"]}))
+        if meta["summary"]:
+            children.append(LeafNode("p", render_inline(meta["summary"])))
+        if meta["tags"]:
+            tag_links = [
+                LeafNode("a", tag, {"href": f"/{self.section}/tags/{tag_slug(tag)}/"})
+                for tag in meta["tags"]
+            ]
+            children.append(ParentNode("p", tag_links, {"class": "tags"}))
+        return ParentNode("li", children)
+
+    def to_html_node(self) -> HTMLNode:
+        children = [LeafNode("h1", self.title)]
+        if self.posts:
+            children.append(
+                ParentNode("ul", [self._post_node(page, meta) for page, meta in self.posts])
+            )
+        links = []
+        if self.newer is not None:
+            links.append(LeafNode("a", "Newer posts", {"href": self.newer, "rel": "prev"}))
+        if self.older is not None:
+            links.append(LeafNode("a", "Older posts", {"href": self.older, "rel": "next"}))
+        if links:
+            children.append(ParentNode("nav", links))
+        return ParentNode("div", children)
+
+    def to_feed(self, basepath: str, site_url: str) -> str:
+        base = site_url.rstrip("/") + basepath.rstrip("/")
+        index_url = f"{base}/{self.section}/"
+        dates = [meta["date"] for _, meta in self.posts]
+        lines = [
+            '<?xml version="1.0" encoding="utf-8"?>',
+            '<feed xmlns="http://www.w3.org/2005/Atom">',
+            f"  <title>{escape(self.title)}</title>",
+            f"  <link href={quoteattr(index_url)}/>",
+            f'  <link rel="self" href={quoteattr(f"{index_url}{FEED_NAME}")}/>',
+            f"  <id>{escape(index_url)}</id>",
+            f"  <updated>{max(dates, default=EPOCH)}T00:00:00Z</updated>",
+        ]
+        for page, meta in self.posts:
+            url = base + page_url(page)
+            lines.append("  <entry>")
+            lines.append(f"    <title>{escape(meta['title'])}</title>")
+            lines.append(f"    <link href={quoteattr(url)}/>")
+            lines.append(f"    <id>{escape(url)}</id>")
+            lines.append(f"    <updated>{meta['date']}T00:00:00Z</updated>")
+            for tag in meta["tags"]:
+                lines.append(f"    <category term={quoteattr(tag)}/>")
+            if meta["summary"]:
+                summary = escape(render_inline(meta["summary"]))
+                lines.append(f'    <summary type="html">{summary}</summary>')
+            lines.append("  </entry>")
+        lines.append("</feed>")
+        return "\n".join(lines) + "\n"
+
+class Listings:
+    def __init__(
+            self,
+            sections: list[str],
+            page_size: int = LISTING_PAGE_SIZE,
+            site_url: str = ""
+        ):
+        self.sections = [section.strip("/") for section in sections]
+        self.page_size = page_size
+        self.site_url = site_url
+
+    def __repr__(self):
+        return f"Listings({self.sections}, {self.page_size} per page)"
+
+    def posts(self, manifest: Manifest, section: str) -> list[tuple[str, dict]]:
+        # Newest first; undated posts follow the dated ones.
+        prefix = section + "/"
+        posts = [
+            (page, entry["meta"])
+            for page, entry in manifest.pages.items()
+            if page.startswith(prefix) and page != prefix + "index.html" and "meta" in entry
+        ]
+        # Pages record no summary of their own unless the front matter gives
+        # one; it is read from the source once and kept with the metadata.
+        for page, meta in posts:
+            if "summary" not in meta:
+                try:
+                    meta["summary"] = page_summary(manifest.pages[page]["source"])
+                except (OSError, ValueError):
+                    meta["summary"] = ""
+        posts.sort(key=lambda post: (post[1]["date"] or "", post[0]), reverse=True)
+        return posts
+
+    def _paginate(
+            self,
+            planned: dict[str, ListingPage],
+            section: str,
+            directory: str,
+            title: str,
+            posts: list[tuple[str, dict]]
+        ):
+        chunks = [posts[i:i + self.page_size] for i in range(0, len(posts), self.page_size)]
+        chunks = chunks or [[]]
+        pages = [
+            f"{directory}/index.html" if number == 1 else f"{directory}/page/{number}/index.html"
+            for number in range(1, len(chunks) + 1)
+        ]
+        for number, (page, chunk) in enumerate(zip(pages, chunks), start=1):
+            planned[page] = ListingPage(
+                "html",
+                section,
+                title if number == 1 else f"{title} (page {number})",
+                chunk,
+                page_url(pages[number - 2]) if number > 1 else None,
+                page_url(pages[number]) if number < len(pages) else None,
+            )
+
+    def plan(self, manifest: Manifest) -> dict[str, ListingPage]:
+        planned = {}
+        for section in self.sections:
+            posts = self.posts(manifest, section)
+            self._paginate(planned, section, section, section.replace("-", " ").title(), posts)
+
+            tagged: dict[str, tuple[str, list]] = {}
+            for post in posts:
+                for tag in post[1]["tags"]:
+                    tagged.setdefault(tag_slug(tag), (tag, []))[1].append(post)
+            for slug, (tag, tag_posts) in sorted(tagged.items()):
+                self._paginate(
+                    planned, section, f"{section}/tags/{slug}", f"Posts tagged {tag}", tag_posts
+                )
+
+            dated = [post for post in posts if post[1]["date"]][:FEED_SIZE]
+            planned[f"{section}/{FEED_NAME}"] = ListingPage(
+                "feed", section, section.replace("-", " ").title(), dated
+            )
+        return planned
+
+    def update(
+            self,
+            manifest: Manifest,
+            template: Template,
+            template_hash: str,
+            basepath: str,
+            dest_path: Path,
+            content_pages: set[str],
+            write: Callable[[str, Callable[[TextIO], None]], None]
+        ) -> int:
+        planned = self.plan(manifest)
+        written = 0
+        for page, listing in planned.items():
+            if page in content_pages:
+                print(f"Skipping listing {page}: a content page has the same path")
+                continue
+            signature = listing.signature(template_hash, basepath, self.site_url)
+            if manifest.listings.get(page) == signature and (dest_path / page).is_file():
+                continue
+
+            if listing.kind == "feed":
+                text = listing.to_feed(basepath, self.site_url)
+            else:
+                body = listing.to_html_node().to_html()
+                text = template.render(Title=listing.title, Content=rebase_links(body, basepath))
+            print(f"Generating listing {dest_path / page}")
+            write(str(dest_path / page), lambda fp: fp.write(text))
+            manifest.listings[page] = signature
+            written += 1
+
+        remove_listings(manifest, dest_path, set(planned) - content_pages, content_pages)
+        return written
+
+def remove_listings(
+        manifest: Manifest,
+        dest_path: Path,
+        keep: set[str] = frozenset(),
+        content_pages: set[str] = frozenset()
+    ):
+    for page in sorted(set(manifest.listings) - keep):
+        stale_file = dest_path / page
+        # A content page now rendered to the same path owns the file.
+        if page not in content_pages and stale_file.is_file():
+            print(f"Removing stale listing: {stale_file}")
+            stale_file.unlink()
+            remove_empty_dirs(stale_file.parent, dest_path)
+        del manifest.listings[page]
@@ -1,77 +1,932 @@
+import argparse
+import cProfile
 import os
 import shutil
 import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Callable, Iterator, NamedTuple, TextIO
 
-from markdown import markdown_to_html_node
+from aio import DEFAULT_IO_WORKERS, DEFAULT_PREFETCH, run_pipeline
+from archive import ArchiveWriter
+from assets import SYNC_MODES, remove_empty_dirs, sync_directory
+from cache import DEFAULT_CACHE_BYTES, DEFAULT_CACHE_DIR, RenderCache
+from compress import VARIANTS, compress_outputs, remove_compressed
+from depgraph import DependencyGraph, page_references, page_references_from_lines
+from extensions import extension_loader, load_extensions, loaded_extensions
+from frontmatter import page_metadata, split_front_matter, split_front_matter_lines
+from images import DEFAULT_IMAGE_CACHE_DIR, IMAGE_WIDTHS, ImagePipeline, remove_image_variants
+from listings import LISTING_PAGE_SIZE, Listings, remove_listings
+from manifest import MANIFEST_NAME, Manifest, file_hash
+from markdown import (
+    INLINE_CACHE_SIZE,
+    image_attributes_digest,
+    inline_cache_info,
+    iter_markdown_html,
+    markdown_to_html_node,
+    parser_signature,
+    set_image_attributes,
+    set_inline_cache_size,
+)
+from profiling import BuildProfile, PageProfile, count_nodes, untimed
+from search import PageText, SearchIndex
+from shards import parse_shard, shard_of
+from template import Template, load_template, rebase_links
+from textnode import IMAGE_ATTRIBUTES
 
-def copy_directory(src: str, dst: str):
-    if os.path.exists(dst):
-        print(f"Removing existing directory: {dst}")
-        shutil.rmtree(dst)
-    
-    def custom_copy(src, dst):
-        print(f"Copying {src} to {dst}")
-        shutil.copy2(src, dst)
-    
-    print(f"Copying directory from {src} to {dst}")
-    shutil.copytree(src, dst, copy_function=custom_copy)
+CONTENT_DIR = "content"
+STATIC_DIR = "static"
+TEMPLATE_PATH = "template.html"
+OUTPUT_DIR = "docs"
 
-def extract_title(markdown: str) -> str:
-    lines = markdown.split("\n")
+# Sources larger than this are rendered block by block straight from disk
+# instead of being read and parsed as a whole.
+STREAM_THRESHOLD = 32 * 1024 * 1024
+
+def extract_title_from_lines(lines) -> str:
     for line in lines:
         if line.startswith("# "):
             return line[2:].strip()
     raise Exception("No H1 header found in markdown.")
 
-def generate_page(from_path: str, template_path: str, dest_path: str, basepath: str):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+def extract_title(markdown: str) -> str:
+    return extract_title_from_lines(markdown.split("\n"))
 
+def split_page_source(markdown_content: str) -> tuple[str, str, dict]:
+    front_matter, markdown_content = split_front_matter(markdown_content)
+    title = front_matter.get("title") or extract_title(markdown_content)
+    return title, markdown_content, page_metadata(front_matter, title)
+
+def _stream_markdown(from_path: str, basepath: str):
     with open(from_path, "r") as markdown_file:
-        markdown_content = markdown_file.read()
+        front_matter, lines = split_front_matter_lines(markdown_file)
+        title = front_matter.get("title") or extract_title_from_lines(lines)
+
+    def content():
+        with open(from_path, "r") as markdown_file:
+            _, lines = split_front_matter_lines(markdown_file)
+            for fragment in iter_markdown_html(lines):
+                yield rebase_links(fragment, basepath)
+
+    return title, content(), page_metadata(front_matter, title)
+
+def write_page(dest_path: str, write: Callable[[TextIO], None], makedirs: bool = True):
+    # Write next to the destination and only move the file into place once
+    # the whole page rendered, so a failure leaves no partial page.
+    if makedirs:
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    tmp_path = dest_path + ".tmp"
+    try:
+        with open(tmp_path, "w") as dest_file:
+            write(dest_file)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def render_page(
+        markdown_content: str,
+        template: Template,
+        basepath: str,
+        cache: RenderCache | None = None,
+        profile: PageProfile | None = None,
+        text: PageText | None = None
+    ) -> tuple[str, dict]:
+    stage = profile.stage if profile is not None else untimed
+
+    title, markdown_content, metadata = split_page_source(markdown_content)
+    if text is not None:
+        text.title = title
+    references = page_references(markdown_content)
+    references["meta"] = metadata
+    image_context = image_attributes_digest(references["images"])
+    body = cache.get(markdown_content, image_context) if cache is not None else None
+    if body is not None:
+        if profile is not None:
+            profile.cached = True
+    else:
+        with stage("parse"):
+            html_node = markdown_to_html_node(
+                markdown_content, profile.blocks if profile is not None else None
+            )
+        with stage("to_html"):
+            body = html_node.to_html()
+        if profile is not None:
+            profile.nodes = count_nodes(html_node)
+        if cache is not None:
+            cache.put(markdown_content, body, image_context)
+    if text is not None:
+        text.add(body)
+
+    with stage("render"):
+        page = template.render(Title=title, Content=rebase_links(body, basepath))
+    return page, references
+
+def generate_page(
+        from_path: str,
+        template_path: str,
+        dest_path: str,
+        basepath: str,
+        template: Template | None = None,
+        cache: RenderCache | None = None,
+        profile: PageProfile | None = None,
+        output: Callable[[str, Callable[[TextIO], None]], None] = write_page,
+        text: PageText | None = None
+    ) -> dict:
+    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    stage = profile.stage if profile is not None else untimed
+
+    if template is None:
+        with stage("read"):
+            template = Template.from_file(template_path, basepath)
+
+    if os.path.getsize(from_path) > STREAM_THRESHOLD:
+        title, content, metadata = _stream_markdown(from_path, basepath)
+        if profile is not None:
+            profile.streamed = True
+        if text is not None:
+            text.title = title
+            content = text.collect(content)
+        with stage("write"):
+            output(dest_path, lambda fp: template.write(fp, Title=title, Content=content))
+        with open(from_path, "r") as markdown_file:
+            references = page_references_from_lines(markdown_file)
+        references["meta"] = metadata
+        return references
+
+    with stage("read"):
+        with open(from_path, "r") as markdown_file:
+            markdown_content = markdown_file.read()
 
-    with open(template_path, "r") as template_file:
-        template_content = template_file.read()
+    if cache is not None or profile is not None:
+        page, references = render_page(markdown_content, template, basepath, cache, profile, text)
+        with stage("write"):
+            output(dest_path, lambda fp: fp.write(page))
+        return references
 
-    html_content = markdown_to_html_node(markdown_content).to_html()
-    title = extract_title(markdown_content)
+    # Without a cache to fill, the body fragments are streamed straight
+    # into the file instead of being joined into one string first.
+    title, markdown_content, metadata = split_page_source(markdown_content)
+    html_node = markdown_to_html_node(markdown_content)
+    content = (rebase_links(fragment, basepath) for fragment in html_node.iter_html())
+    if text is not None:
+        text.title = title
+        content = text.collect(content)
+    output(dest_path, lambda fp: template.write(fp, Title=title, Content=content))
+    references = page_references(markdown_content)
+    references["meta"] = metadata
+    return references
 
-    full_html = template_content.replace("{{ Title }}", title)
-    full_html = template_content.replace("{{ Content }}", html_content)
+class PageJob(NamedTuple):
+    # Everything a worker needs to render one page; sent to worker processes
+    # as is, so it stays a plain tuple underneath.
+    source: str
+    template_path: str
+    dest: str
+    basepath: str
+    template: Template
+    cache: RenderCache | None
+    profiled: bool
+    indexed: bool
+
+def _inline_cache_delta(before) -> tuple[int, int]:
+    after = inline_cache_info()
+    return after.hits - before.hits, after.misses - before.misses
+
+def _generate_page_job(
+        job: PageJob,
+        output: Callable = write_page
+    ) -> tuple[str | None, PageProfile | None, dict | None, tuple, PageText | None]:
+    profile = PageProfile(job.source) if job.profiled else None
+    text = PageText() if job.indexed else None
+    before = inline_cache_info()
+    try:
+        references = generate_page(
+            job.source,
+            job.template_path,
+            job.dest,
+            job.basepath,
+            job.template,
+            job.cache,
+            profile,
+            output,
+            text,
+        )
+    except Exception as e:
+        return f"Error processing {job.source}: {e}", profile, None, _inline_cache_delta(before), None
+    return None, profile, references, _inline_cache_delta(before), text
+
+def _read_job(job: PageJob) -> str | None:
+    # Sources big enough to stream are left to generate_page as a whole.
+    if os.path.getsize(job.source) > STREAM_THRESHOLD:
+        return None
+    with open(job.source, "r") as markdown_file:
+        return markdown_file.read()
+
+def _render_job(job: PageJob, markdown_content: str | None) -> tuple[str | None, tuple]:
+    if markdown_content is None:
+        return None, _generate_page_job(job)
+
+    print(f"Generating page from {job.source} to {job.dest} using {job.template_path}")
+    profile = PageProfile(job.source) if job.profiled else None
+    text = PageText() if job.indexed else None
+    before = inline_cache_info()
+    try:
+        page, references = render_page(
+            markdown_content, job.template, job.basepath, job.cache, profile, text
+        )
+    except Exception as e:
+        error = f"Error processing {job.source}: {e}"
+        return None, (error, profile, None, _inline_cache_delta(before), None)
+    return page, (None, profile, references, _inline_cache_delta(before), text)
+
+def _write_job(job: PageJob, page: str):
+    write_page(job.dest, lambda fp: fp.write(page), makedirs=False)
+
+def _job_error(job: PageJob, error: Exception) -> tuple:
+    return f"Error processing {job.source}: {error}", None, None, (0, 0), None
+
+def _archive_job(job: PageJob) -> tuple[str | None, tuple | None]:
+    # Pages are rendered wherever the job runs but only the parent writes to
+    # the archive. Sources big enough to stream are left to the parent too.
+    try:
+        markdown_content = _read_job(job)
+    except OSError as e:
+        return None, _job_error(job, e)
+    if markdown_content is None:
+        return None, None
+    return _render_job(job, markdown_content)
+
+def _init_worker(
+        inline_cache_size: int,
+        image_attributes: dict[str, dict[str, str]],
+        extensions: list[str]
+    ):
+    load_extensions(extensions)
+    set_inline_cache_size(inline_cache_size)
+    set_image_attributes(image_attributes)
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    # Each worker keeps its own inline cache; sharing one across processes
+    # would cost more in IPC than rendering the fragment again.
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(inline_cache_info().maxsize, dict(IMAGE_ATTRIBUTES), loaded_extensions()),
+    )
+
+def _referenced_images(manifest: Manifest, sources: list[tuple]) -> set[str]:
+    # Unchanged pages reuse the images recorded for them; the rest are
+    # scanned without rendering.
+    urls = set()
+    for page, md_file, _, source_hash, _ in sources:
+        entry = manifest.pages.get(page)
+        if entry is not None and entry["source_hash"] == source_hash and "images" in entry:
+            urls.update(entry["images"])
+            continue
+        try:
+            with open(md_file, "r") as markdown_file:
+                urls.update(page_references_from_lines(markdown_file)["images"])
+        except OSError:
+            # Reported when the page itself fails to render.
+            continue
+    return urls
+
+def _run_page_jobs(
+        jobs: list[PageJob],
+        workers: int,
+        io_workers: int = 0,
+        prefetch: int = DEFAULT_PREFETCH
+    ) -> list[tuple]:
+    if io_workers > 0 and jobs:
+        executor = _process_pool(workers) if workers > 1 else None
+        try:
+            results, stats = run_pipeline(
+                jobs,
+                _read_job,
+                _render_job,
+                _write_job,
+                lambda job: job.dest,
+                _job_error,
+                io_workers,
+                prefetch,
+                executor,
+            )
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        print(
+            f"I/O: {stats.reads} read(s), {stats.writes} write(s), "
+            f"{stats.directories} directory(ies); waited {stats.read_wait:.3f}s on reads "
+            f"and {stats.write_wait:.3f}s on writes"
+        )
+        return results
 
-    full_html = full_html.replace('href="/', f'href="{basepath}')
-    full_html = full_html.replace('src="/', f'src="{basepath}')
+    return list(_map_jobs(_generate_page_job, jobs, workers))
 
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-    with open(dest_path, "w") as dest_file:
-        dest_file.write(full_html)
+def _map_jobs(function: Callable, jobs: list[tuple], workers: int) -> Iterator:
+    if workers <= 1 or len(jobs) <= 1:
+        yield from map(function, jobs)
+        return
+
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with _process_pool(workers) as executor:
+        yield from executor.map(function, jobs, chunksize=chunksize)
+
+def _run_archive_jobs(jobs: list[PageJob], workers: int, archive: ArchiveWriter) -> list[tuple]:
+    results = []
+    for job, (page, result) in zip(jobs, _map_jobs(_archive_job, jobs, workers)):
+        if result is None:
+            result = _generate_page_job(job, archive.write_page)
+        elif result[0] is None:
+            archive.write_text(job.dest, page)
+        results.append(result)
+    return results
 
 def generate_pages_recursive(
         dir_path_content: str, 
         template_path: str, 
         dest_dir_path: str,
-        basepath: str
-    ):
+        basepath: str,
+        incremental: bool = False,
+        workers: int = 1,
+        manifest: Manifest | None = None,
+        cache: RenderCache | None = None,
+        profile: BuildProfile | None = None,
+        io_workers: int = 0,
+        prefetch: int = DEFAULT_PREFETCH,
+        shard: tuple[int, int] | None = None,
+        inline_stats: Counter | None = None,
+        archive: ArchiveWriter | None = None,
+        search: SearchIndex | None = None,
+        listings: Listings | None = None,
+        images: ImagePipeline | None = None
+    ) -> int:
     content_path = Path(dir_path_content)
     template_path = Path(template_path)
     dest_path = Path(dest_dir_path)
 
     if not template_path.is_file():
         raise FileNotFoundError(f"Template file not found: {template_path}")
-    
-    for md_file in content_path.rglob("*.md"):
-        try:
-            relative_path = md_file.relative_to(content_path)
-            dest_file = dest_path / relative_path.with_suffix(".html")
 
-            generate_page(str(md_file), str(template_path), str(dest_file), basepath)
-        except Exception as e:
+    # The manifest is always written so that a full build can be followed by
+    # an incremental one; it is only trusted when incremental is requested.
+    if manifest is None and incremental:
+        manifest = Manifest.load(str(dest_path))
+    elif manifest is None:
+        manifest = Manifest(str(dest_path / MANIFEST_NAME))
+    manifest.shard = list(shard) if shard is not None else None
+    template_hash = file_hash(str(template_path))
+    template = load_template(str(template_path), basepath)
+    # Pages rendered by another parser version or set of extensions are stale.
+    parser = parser_signature()
+
+    seen = set()
+    sources = []
+    for md_file in sorted(content_path.rglob("*.md")):
+        relative_path = md_file.relative_to(content_path)
+        if shard is not None and shard_of(relative_path.as_posix(), shard[1]) != shard[0]:
+            continue
+        page = relative_path.with_suffix(".html").as_posix()
+        # Archive members are named by the page alone.
+        dest_file = dest_path / page if archive is None else page
+        seen.add(page)
+
+        try:
+            stat = md_file.stat()
+            source_hash = manifest.source_hash(page, str(md_file), stat)
+        except OSError as e:
             print(f"Error processing {md_file}: {e}")
+            manifest.forget(page)
+            continue
+        sources.append((page, md_file, dest_file, source_hash, stat))
+
+    # Image attributes are settled before any page renders, since they are
+    # baked into the HTML of every page showing the image.
+    if images is not None:
+        image_stats = images.prepare(
+            _referenced_images(manifest, sources), str(dest_path), manifest, workers
+        )
+        print(f"Images: {image_stats}")
+        set_image_attributes(images.attributes)
+    else:
+        set_image_attributes({})
+        if archive is None:
+            removed = remove_image_variants(manifest, str(dest_path))
+            if removed:
+                print(f"Removed {removed} image variant(s) of the previous build")
+
+    pending = []
+    for page, md_file, dest_file, source_hash, stat in sources:
+        entry = manifest.pages.get(page)
+        if (
+            incremental
+            and archive is None
+            and dest_file.is_file()
+            and manifest.is_fresh(page, source_hash, template_hash, basepath, parser)
+            and entry.get("image_props") == image_attributes_digest(entry.get("images", ()))
+            and (search is None or search.is_current(page, source_hash))
+        ):
+            continue
+        job = PageJob(
+            str(md_file),
+            str(template_path),
+            str(dest_file),
+            basepath,
+            template,
+            cache,
+            profile is not None,
+            search is not None,
+        )
+        pending.append((page, source_hash, stat, job))
+
+    generated = 0
+    jobs = [job for _, _, _, job in pending]
+    if archive is not None:
+        results = _run_archive_jobs(jobs, workers, archive)
+    else:
+        results = _run_page_jobs(jobs, workers, io_workers, prefetch)
+    for (page, source_hash, stat, job), result in zip(pending, results):
+        error, page_profile, references, inline, text = result
+        if page_profile is not None:
+            profile.add(page_profile)
+        if inline_stats is not None:
+            inline_stats["hits"] += inline[0]
+            inline_stats["misses"] += inline[1]
+        if error is not None:
+            print(error)
+            manifest.forget(page)
+            if search is not None:
+                search.remove(page)
+            continue
+        if search is not None:
+            search.add(page, basepath + page.removesuffix("index.html"), source_hash, text)
+
+        manifest.record(
+            page,
+            job.source,
+            source_hash,
+            stat,
+            template_hash,
+            basepath,
+            str(template_path),
+            references,
+            parser,
+        )
+        image_props = image_attributes_digest(references["images"])
+        if image_props is not None:
+            manifest.pages[page]["image_props"] = image_props
+        generated += 1
+
+    # An archive is always packed from scratch and carries no manifest.
+    if archive is not None:
+        return generated
+
+    for page in sorted(set(manifest.pages) - seen):
+        stale_file = dest_path / page
+        if stale_file.is_file():
+            print(f"Removing stale page: {stale_file}")
+            stale_file.unlink()
+            remove_empty_dirs(stale_file.parent, dest_path)
+        manifest.forget(page)
+
+    # Listing and feed pages come from the recorded metadata alone, so they
+    # are planned after every page's entry is up to date.
+    if listings is not None:
+        listings.update(manifest, template, template_hash, basepath, dest_path, seen, write_page)
+    else:
+        remove_listings(manifest, dest_path, content_pages=seen)
+
+    if search is not None:
+        for page in sorted(search.pages() - seen):
+            search.remove(page)
+        search.save()
+    manifest.save()
+    return generated
+
+def parse_widths(text: str) -> tuple[int, ...]:
+    try:
+        widths = tuple(sorted({int(part) for part in text.split(",")}))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated widths, got: {text}")
+    if not widths or widths[0] < 1:
+        raise argparse.ArgumentTypeError(f"widths must be positive, got: {text}")
+    return widths
+
+def extension_name(text: str) -> str:
+    try:
+        extension_loader(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return text
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the static site.")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="keep the output directory and only re-render changed pages",
+    )
+    parser.add_argument(
+        "--content",
+        default=CONTENT_DIR,
+        metavar="DIR",
+        help=f"markdown source directory (default {CONTENT_DIR})",
+    )
+    parser.add_argument(
+        "--static",
+        default=STATIC_DIR,
+        metavar="DIR",
+        help=f"static files copied into the output (default {STATIC_DIR})",
+    )
+    parser.add_argument(
+        "--template",
+        default=TEMPLATE_PATH,
+        metavar="FILE",
+        help=f"page template (default {TEMPLATE_PATH})",
+    )
+    parser.add_argument(
+        "-o", "--output",
+        metavar="DIR",
+        help=f"output directory (default {OUTPUT_DIR}, or {OUTPUT_DIR}-shard-K-of-N with --shard)",
+    )
+    parser.add_argument(
+        "--archive",
+        metavar="FILE",
+        help="pack every page and static file into one uncompressed zip instead of a directory",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="K/N",
+        help="only render the pages hashed to shard K of N, without static files",
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="render pages in N worker processes (0 uses every CPU)",
+    )
+    parser.add_argument(
+        "--io-workers",
+        type=int,
+        nargs="?",
+        const=DEFAULT_IO_WORKERS,
+        default=0,
+        metavar="N",
+        help=(
+            "read sources and write pages on N background threads, overlapping "
+            f"file I/O with rendering (default {DEFAULT_IO_WORKERS} when given)"
+        ),
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=DEFAULT_PREFETCH,
+        metavar="N",
+        help="with --io-workers, how many pages may be in flight at once",
+    )
+    parser.add_argument(
+        "--link",
+        choices=SYNC_MODES,
+        default="copy",
+        help="how --incremental places changed static files in the output",
+    )
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="compare static files by content hash instead of size and mtime",
+    )
+    parser.add_argument(
+        "--listings",
+        action="append",
+        default=[],
+        metavar="SECTION",
+        help=(
+            "generate paginated index and tag pages and an Atom feed for the pages under "
+            "content/SECTION from their front matter (repeatable)"
+        ),
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=LISTING_PAGE_SIZE,
+        metavar="N",
+        help="posts per listing page",
+    )
+    parser.add_argument(
+        "--site-url",
+        default="",
+        metavar="URL",
+        help="absolute site address used for links in feeds",
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help="write a search index sharded by term prefix to OUTPUT/search",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help=(
+            f"write {' and '.join(VARIANTS)} variants next to HTML, CSS, JS, SVG and XML "
+            "outputs, skipping unchanged files and ones that barely shrink"
+        ),
+    )
+    parser.add_argument(
+        "--extension",
+        dest="extensions",
+        action="append",
+        default=[],
+        type=extension_name,
+        metavar="NAME",
+        help=(
+            "enable a markdown extension: tables, admonitions, footnotes, strikethrough, "
+            "or a module with a register() function (repeatable)"
+        ),
+    )
+    parser.add_argument(
+        "--images",
+        action="store_true",
+        help=(
+            "give images under the static directory width, height and lazy loading, "
+            "and resized srcset variants when Pillow is installed"
+        ),
+    )
+    parser.add_argument(
+        "--image-widths",
+        type=parse_widths,
+        default=IMAGE_WIDTHS,
+        metavar="W,W,...",
+        help=f"widths of the resized variants (default {','.join(map(str, IMAGE_WIDTHS))})",
+    )
+    parser.add_argument(
+        "--image-cache",
+        default=DEFAULT_IMAGE_CACHE_DIR,
+        metavar="DIR",
+        help=f"keep resized variants here by source hash and width (default {DEFAULT_IMAGE_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        nargs="?",
+        const=DEFAULT_CACHE_DIR,
+        metavar="DIR",
+        help=f"reuse rendered page bodies from DIR (default {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_BYTES // (1024 * 1024),
+        metavar="MB",
+        help="evict least recently used cache entries above this size",
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="empty the render cache before building",
+    )
+    parser.add_argument(
+        "--inline-cache",
+        type=int,
+        default=INLINE_CACHE_SIZE,
+        metavar="N",
+        help="memoize the rendered HTML of up to N short inline fragments per process (0 disables)",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="build_profile.json",
+        metavar="REPORT",
+        help="time each page's stages and write a JSON report (default build_profile.json)",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="how many of the slowest pages to list",
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="FILE",
+        help="dump cProfile stats for the page generation to FILE",
+    )
+    parser.add_argument(
+        "--explain",
+        metavar="PAGE",
+        help="show what a built page depends on and exit (output path, source or URL)",
+    )
+    parser.add_argument(
+        "--dead-links",
+        action="store_true",
+        help="list internal links of the last build that resolve to nothing and exit",
+    )
+    parser.add_argument(
+        "--unused-assets",
+        action="store_true",
+        help="list static files no page or the template references and exit",
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 0:
+        parser.error("--jobs must be zero or a positive integer")
+    if args.inline_cache < 0:
+        parser.error("--inline-cache must not be negative")
+    if args.io_workers < 0 or args.prefetch < 1:
+        parser.error("--io-workers must not be negative and --prefetch must be positive")
+    if args.archive and (args.incremental or args.shard or args.io_workers):
+        parser.error("--archive always packs a full build; drop --incremental, --shard and --io-workers")
+    if args.page_size < 1:
+        parser.error("--page-size must be a positive integer")
+    if args.listings and (args.archive or args.shard):
+        parser.error("--listings needs every page's metadata, which --archive and --shard do not keep")
+    if args.search and (args.archive or args.shard):
+        parser.error("--search indexes a complete output directory, not --archive or --shard")
+    if args.compress and (args.archive or args.shard):
+        parser.error("--compress applies to a complete output directory, not --archive or --shard")
+    if args.images and (args.archive or args.shard):
+        parser.error("--images writes variants into a complete output directory, not --archive or --shard")
+    if args.jobs == 0:
+        args.jobs = os.cpu_count() or 1
+    if args.output is None and args.shard is not None:
+        args.output = f"{OUTPUT_DIR}-shard-{args.shard[0]}-of-{args.shard[1]}"
+    elif args.output is None:
+        args.output = OUTPUT_DIR
+    return args
+
+def query_graph(args: argparse.Namespace) -> int:
+    graph = DependencyGraph.load(args.output, args.template)
+    status = 0
+    if args.explain:
+        try:
+            explanation = graph.explain(args.explain)
+        except KeyError as e:
+            print(e.args[0])
+            return 1
+        print(f"{explanation['page']}:")
+        print(f"  source:   {explanation['source']}")
+        print(f"  template: {explanation['template']}")
+        print(f"  basepath: {explanation['basepath']}")
+        for key in ("images", "links", "linked_from"):
+            print(f"  {key}:")
+            for value in explanation[key]:
+                print(f"    {value}")
+    if args.dead_links:
+        dead = graph.dead_links()
+        for page, url in dead:
+            print(f"Dead link in {page}: {url}")
+        status = 1 if dead else status
+    if args.unused_assets:
+        for asset in graph.unused_assets():
+            print(f"Unused asset: {asset}")
+    return status
+
+def build_archive(args: argparse.Namespace, cache: RenderCache | None = None):
+    set_inline_cache_size(args.inline_cache)
+    start = time.perf_counter()
+    with ArchiveWriter(args.archive) as archive:
+        generated = generate_pages_recursive(
+            args.content,
+            args.template,
+            args.output,
+            args.basepath,
+            workers=args.jobs,
+            cache=cache,
+            archive=archive,
+        )
+        assets = archive.add_directory(args.static)
+    elapsed = time.perf_counter() - start
+    if cache is not None:
+        cache.prune()
+    print(
+        f"Packed {generated} page(s) and {assets} static file(s) into {args.archive} "
+        f"({os.path.getsize(args.archive)} bytes) in {elapsed:.2f}s"
+    )
+
+def main(argv: list[str] | None = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "serve":
+        from server import serve_main
+        return serve_main(argv[1:])
+    if argv and argv[0] == "daemon":
+        from daemon import daemon_main
+        return daemon_main(argv[1:])
+    if argv and argv[0] == "check":
+        from check import check_main
+        return check_main(argv[1:], CONTENT_DIR, STATIC_DIR, TEMPLATE_PATH)
+    if argv and argv[0] == "merge":
+        from shards import merge_main
+        return merge_main(argv[1:], CONTENT_DIR, STATIC_DIR, OUTPUT_DIR)
+
+    args = parse_args(argv)
+    if args.explain or args.dead_links or args.unused_assets:
+        return query_graph(args)
+    load_extensions(args.extensions)
+
+    cache_dir = args.cache_dir or DEFAULT_CACHE_DIR
+    if args.clear_cache:
+        print(f"Clearing render cache: {cache_dir}")
+        RenderCache(cache_dir).clear()
+    cache = None
+    if args.cache_dir:
+        cache = RenderCache(cache_dir, args.cache_size * 1024 * 1024)
+
+    if args.archive:
+        return build_archive(args, cache)
+
+    output_dir = args.output
+    if args.incremental:
+        manifest = Manifest.load(output_dir)
+    else:
+        manifest = Manifest(os.path.join(output_dir, MANIFEST_NAME))
+
+    if not args.incremental and os.path.exists(output_dir):
+        print(f"Removing existing directory: {output_dir}")
+        shutil.rmtree(output_dir)
+    # Shards only render pages; static files are placed once by the merge.
+    # Full builds sync into the emptied directory as well, so the manifest
+    # records their assets for --dead-links and --unused-assets.
+    if args.shard is None:
+        stats = sync_directory(args.static, output_dir, manifest, args.link, args.checksum)
+        print(
+            f"Synced static files: {stats.copied} copied, "
+            f"{stats.unchanged} unchanged, {stats.removed} removed"
+        )
+    if not args.compress:
+        removed = remove_compressed(output_dir, manifest)
+        if removed:
+            print(f"Removed {removed} compressed variant(s) of the previous build")
+
+    set_inline_cache_size(args.inline_cache)
+    inline_stats = Counter()
+    search = SearchIndex.load(output_dir) if args.search else None
+    listings = Listings(args.listings, args.page_size, args.site_url) if args.listings else None
+    images = None
+    if args.images:
+        images = ImagePipeline(args.static, args.image_cache, args.image_widths, args.link)
+    profile = BuildProfile() if args.profile else None
+    profiler = cProfile.Profile() if args.cprofile else None
+    if profiler is not None:
+        profiler.enable()
+
+    start = time.perf_counter()
+    generated = generate_pages_recursive(
+        args.content,
+        args.template,
+        output_dir,
+        args.basepath,
+        incremental=args.incremental,
+        workers=args.jobs,
+        manifest=manifest,
+        cache=cache,
+        profile=profile,
+        io_workers=args.io_workers,
+        prefetch=args.prefetch,
+        shard=args.shard,
+        inline_stats=inline_stats,
+        search=search,
+        listings=listings,
+        images=images,
+    )
+    elapsed = time.perf_counter() - start
+
+    if args.compress:
+        compress_start = time.perf_counter()
+        stats = compress_outputs(output_dir, manifest, args.jobs)
+        manifest.save()
+        print(
+            f"Compressed {stats.compressed} file(s) in {time.perf_counter() - compress_start:.2f}s: "
+            f"{stats.unchanged} unchanged, {stats.skipped} not worth compressing, "
+            f"{stats.removed} stale variant(s) removed"
+        )
 
-def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
-    copy_directory("static", "docs")
-    generate_pages_recursive("content", "template.html", "docs", basepath)
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.cprofile)
+        print(f"cProfile stats written to {args.cprofile}")
+    if profile is not None:
+        profile.print_summary(args.profile_top)
+        profile.write_json(args.profile, args.profile_top)
+        print(f"Profile report written to {args.profile}")
+    if cache is not None:
+        evicted = cache.prune()
+        if evicted:
+            print(f"Evicted {evicted} render cache entr{'y' if evicted == 1 else 'ies'}")
+    lookups = inline_stats["hits"] + inline_stats["misses"]
+    if lookups:
+        print(
+            f"Inline cache: {inline_stats['hits']} hit(s), {inline_stats['misses']} miss(es) "
+            f"({100 * inline_stats['hits'] / lookups:.1f}% hit rate)"
+        )
+    rate = generated / elapsed if elapsed > 0 else 0.0
+    print(
+        f"Generated {generated} page(s) in {elapsed:.2f}s "
+        f"({rate:.1f} pages/s, {args.jobs} job(s))"
+    )
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
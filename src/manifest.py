@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+
+MANIFEST_NAME = ".manifest.json"
+MANIFEST_VERSION = 2
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class Manifest:
+    def __init__(
+            self,
+            path: str,
+            pages: dict[str, dict] | None = None,
+            assets: dict[str, dict] | None = None
+        ):
+        self.path = path
+        self.pages = pages if pages is not None else {}
+        self.assets = assets if assets is not None else {}
+        self.compressed: dict[str, dict] = {}
+        self.listings: dict[str, str] = {}
+        self.image_variants: dict[str, dict] = {}
+        self.shard: list[int] | None = None
+
+    @classmethod
+    def load(cls, dest_dir: str) -> "Manifest":
+        path = os.path.join(dest_dir, MANIFEST_NAME)
+        try:
+            with open(path, "r") as manifest_file:
+                data = json.load(manifest_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return cls(path)
+
+        if data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        manifest = cls(path, data.get("pages", {}), data.get("assets", {}))
+        manifest.shard = data.get("shard")
+        manifest.compressed = data.get("compressed", {})
+        manifest.listings = data.get("listings", {})
+        manifest.image_variants = data.get("image_variants", {})
+        return manifest
+
+    def source_hash(self, page: str, source_path: str, stat: os.stat_result) -> str:
+        # Reuse the recorded hash while size and mtime are untouched, so an
+        # unchanged tree is checked with one stat per page instead of a read.
+        # stat must be taken before the source is read.
+        entry = self.pages.get(page)
+        if (
+            entry is not None
+            and entry.get("source") == source_path
+            and entry.get("mtime_ns") == stat.st_mtime_ns
+            and entry.get("size") == stat.st_size
+        ):
+            return entry["source_hash"]
+        return file_hash(source_path)
+
+    def is_fresh(
+            self,
+            page: str,
+            source_hash: str,
+            template_hash: str,
+            basepath: str,
+            parser: str
+        ) -> bool:
+        entry = self.pages.get(page)
+        if entry is None:
+            return False
+        return (
+            entry["source_hash"] == source_hash
+            and entry["template_hash"] == template_hash
+            and entry["basepath"] == basepath
+            and entry.get("parser") == parser
+        )
+
+    def record(
+            self,
+            page: str,
+            source_path: str,
+            source_hash: str,
+            stat: os.stat_result,
+            template_hash: str,
+            basepath: str,
+            template_path: str | None = None,
+            references: dict[str, list[str]] | None = None,
+            parser: str | None = None
+        ):
+        # The stat taken before the source was hashed, not a fresh one: a
+        # save during the build must leave the entry looking out of date.
+        entry = {
+            "source": source_path,
+            "source_hash": source_hash,
+            "template": template_path,
+            "template_hash": template_hash,
+            "basepath": basepath,
+            "parser": parser,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+        }
+        if references is not None:
+            entry["images"] = references["images"]
+            entry["links"] = references["links"]
+            if "meta" in references:
+                entry["meta"] = references["meta"]
+        self.pages[page] = entry
+
+    def forget(self, page: str):
+        self.pages.pop(page, None)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as manifest_file:
+            json.dump(
+                {
+                    "version": MANIFEST_VERSION,
+                    "pages": self.pages,
+                    "assets": self.assets,
+                    "compressed": self.compressed,
+                    "listings": self.listings,
+                    "image_variants": self.image_variants,
+                    "shard": self.shard,
+                },
+                manifest_file,
+                indent=1,
+                sort_keys=True,
+            )
+        os.replace(tmp_path, self.path)
@@ -1,10 +1,30 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import re
+from collections import Counter
+from functools import lru_cache
 from enum import Enum
+from typing import Callable, Iterable, Iterator
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
-from textnode import TextNode, TextType, text_node_to_html_node, text_to_textnodes
+from htmlnode import FragmentNode, HTMLNode, LeafNode, ParentNode
+from profiling import count_nodes
+from textnode import (
+    BUILTIN_INLINE_DELIMITERS,
+    IMAGE_ATTRIBUTES,
+    INLINE_DELIMITERS,
+    INLINE_PATTERNS,
+    InlineExtension,
+    TextNode,
+    TextType,
+    text_node_to_html_node,
+    text_to_textnodes,
+)
+
+# Bump whenever parsing or rendering output changes, so cached renders of
+# unchanged sources are not reused across incompatible versions.
+PARSER_VERSION = "2"
 
 class BlockType(Enum):
     HEADING = "heading"
@@ -14,73 +34,272 @@ class BlockType(Enum):
     UNORDERED_LIST = "unordered_list"
     ORDERED_LIST = "ordered_list"
 
-def block_to_block_type(block: str) -> BlockType:
-    lines = block.split("\n")
+HEADING_PATTERN = re.compile(r"#{1,6} ")
+CODE_PATTERN = re.compile(r"```.*\n(?:.*\n)*?```.*\Z")
+QUOTE_PATTERN = re.compile(r">.*(?:\n>.*)*\Z")
+UNORDERED_LIST_PATTERN = re.compile(r"- .*(?:\n- .*)*\Z")
+ORDERED_LIST_PATTERN = re.compile(r"1\. .*(?:\n\d+\. .*)*\Z")
+ORDERED_NUMBER_PATTERN = re.compile(r"\n(\d+)\. ")
+# Short inline runs (headings, list items, navigation snippets) repeat a lot
+# across a site, so their rendered HTML is memoized. Longer paragraphs are
+# nearly always unique and would only churn the cache.
+INLINE_CACHE_SIZE = 4096
+INLINE_CACHE_MAX_LENGTH = 256
+
+ORDINALS = [str(number) for number in range(1024)]
+
+def _is_ordered_list(block: str) -> bool:
+    # The pattern checks the shape; the items after the first must also
+    # count up from 2.
+    if not ORDERED_LIST_PATTERN.match(block):
+        return False
+    numbers = ORDERED_NUMBER_PATTERN.findall(block)
+    end = len(numbers) + 2
+    if end <= len(ORDINALS):
+        return numbers == ORDINALS[2:end]
+    return numbers == list(map(str, range(2, end)))
+
+class BlockExtension:
+    __slots__ = ("name", "prefixes", "match", "render", "version")
+
+    def __init__(
+            self,
+            name: str,
+            prefixes: tuple[str, ...],
+            match: Callable[[str], object],
+            render: Callable[[str], HTMLNode],
+            version: str = "1"
+        ):
+        if not prefixes or not all(prefixes):
+            raise ValueError(f"Block extension {name} needs at least one non-empty prefix")
+        self.name = name
+        self.prefixes = prefixes
+        self.match = match
+        self.render = render
+        self.version = version
+
+    def __repr__(self):
+        return f"BlockExtension({self.name}, {self.prefixes})"
+
+    @property
+    def value(self) -> str:
+        # Counted under this name in build profiles, like BlockType values.
+        return self.name
+
+BUILTIN_BLOCK_CLASSIFIERS = (
+    ("#", HEADING_PATTERN.match, BlockType.HEADING),
+    ("`", CODE_PATTERN.match, BlockType.CODE),
+    (">", QUOTE_PATTERN.match, BlockType.QUOTE),
+    ("-", UNORDERED_LIST_PATTERN.match, BlockType.UNORDERED_LIST),
+    ("1", _is_ordered_list, BlockType.ORDERED_LIST),
+)
+BLOCK_EXTENSIONS: list[BlockExtension] = []
 
-    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
-        return BlockType.HEADING
-    
-    if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
-        return BlockType.CODE
-    
-    if block.startswith(">"):
-        for line in lines:
-            if not line.startswith(">"):
-                return BlockType.PARAGRAPH
-        return BlockType.QUOTE
-    
-    if block.startswith("- "):
-        for line in lines:
-            if not line.startswith("- "):
-                return BlockType.PARAGRAPH
-        return BlockType.UNORDERED_LIST
-    
-    if block.startswith("1. "):
-        i = 1
-        for line in lines:
-            if not line.startswith(f"{i}. "):
-                return BlockType.PARAGRAPH
-            i += 1
-        return BlockType.ORDERED_LIST
-    
+# The first character decides which block types are even possible, and only
+# their recognizers run; anything else is a paragraph. Rebuilt whenever an
+# extension is registered, so a block only pays for the extensions sharing
+# its first character.
+BLOCK_CLASSIFIERS: dict[str, tuple[tuple[Callable, BlockType | BlockExtension], ...]] = {}
+
+def _prefixed(prefix: str, match: Callable) -> Callable:
+    # The table is keyed by the first character; a longer prefix is checked
+    # before the recognizer runs.
+    if len(prefix) == 1:
+        return match
+    return lambda block: block.startswith(prefix) and match(block)
+
+def _compile_block_classifiers():
+    table: dict[str, list] = {}
+    # Extensions are tried before the built-in type for the same character.
+    for extension in BLOCK_EXTENSIONS:
+        for prefix in extension.prefixes:
+            table.setdefault(prefix[0], []).append((_prefixed(prefix, extension.match), extension))
+    for prefix, match, block_type in BUILTIN_BLOCK_CLASSIFIERS:
+        table.setdefault(prefix[0], []).append((match, block_type))
+    BLOCK_CLASSIFIERS.clear()
+    BLOCK_CLASSIFIERS.update((char, tuple(entries)) for char, entries in table.items())
+
+_compile_block_classifiers()
+
+def block_to_block_type(block: str) -> BlockType | BlockExtension:
+    for match, block_type in BLOCK_CLASSIFIERS.get(block[:1], ()):
+        if match(block):
+            return block_type
     return BlockType.PARAGRAPH
 
 
+def is_fence_line(line: str, in_fence: bool) -> bool:
+    # Any ``` line closes an open fence, but a line such as "```x``` text"
+    # that closes its own span does not open one.
+    if not line.startswith("```"):
+        return False
+    return in_fence or "```" not in line[3:]
+
+def iter_blocks(lines: Iterable[str]) -> Iterator[str]:
+    # Blank lines end a block, except inside a fenced code block, so a file
+    # can be split while reading it one line at a time.
+    block: list[str] = []
+    in_fence = False
+    for line in lines:
+        line = line.rstrip("\n")
+        if is_fence_line(line, in_fence):
+            in_fence = not in_fence
+        if line or in_fence:
+            block.append(line)
+            continue
+
+        text = "\n".join(block).strip()
+        if text:
+            yield text
+        block = []
+
+    # A fence that never closes is not a code block; its blank lines split
+    # blocks as anywhere else.
+    parts = [block]
+    if in_fence:
+        parts = [[]]
+        for line in block:
+            if line:
+                parts[-1].append(line)
+            else:
+                parts.append([])
+    for part in parts:
+        text = "\n".join(part).strip()
+        if text:
+            yield text
+
 def markdown_to_blocks(markdown: str) -> list[str]:
-    return [block.strip() for block in markdown.split("\n\n") if block]
+    return list(iter_blocks(markdown.split("\n")))
+
+def block_to_html_node(
+        block: str,
+        block_type: BlockType | BlockExtension | None = None
+    ) -> HTMLNode:
+    block_type = block_type or block_to_block_type(block)
+    if isinstance(block_type, BlockExtension):
+        return block_type.render(block)
+    match block_type:
+        case BlockType.HEADING:
+            return heading_to_html_node(block)
+
+        case BlockType.PARAGRAPH:
+            return paragraph_to_html_node(block)
+
+        case BlockType.CODE:
+            return code_to_html_node(block)
 
-def markdown_to_html_node(markdown: str) -> HTMLNode:
-    blocks = markdown_to_blocks(markdown)
+        case BlockType.QUOTE:
+            return quote_to_html_node(block)
 
+        case BlockType.UNORDERED_LIST:
+            return ulist_to_html_node(block)
+
+        case BlockType.ORDERED_LIST:
+            return olist_to_html_node(block)
+
+        case _:
+            raise ValueError("invalid block type")
+
+def markdown_to_html_node(markdown: str, block_counts: Counter | None = None) -> HTMLNode:
     children = []
+    for block in markdown_to_blocks(markdown):
+        block_type = block_to_block_type(block)
+        if block_counts is not None:
+            block_counts[block_type.value] += 1
+        children.append(block_to_html_node(block, block_type))
+    return ParentNode("div", children, None)
 
-    for block in blocks:
-        match block_to_block_type(block):
-            case BlockType.HEADING:
-                children.append(heading_to_html_node(block))
-                
-            case BlockType.PARAGRAPH:
-                children.append(paragraph_to_html_node(block))
+def iter_markdown_html(lines: Iterable[str]) -> Iterator[str]:
+    # Only one block's nodes are alive at a time, so memory is bounded by the
+    # largest block rather than by the whole document.
+    yield "<div>"
+    for block in iter_blocks(lines):
+        yield from block_to_html_node(block).iter_html()
+    yield "</div>"
 
-            case BlockType.CODE:
-                children.append(code_to_html_node(block))
+def render_inline(text: str) -> str:
+    return "".join(text_node_to_html_node(node).to_html() for node in text_to_textnodes(text))
 
-            case BlockType.QUOTE:
-                children.append(quote_to_html_node(block))
+def _render_fragment(text: str) -> tuple[str, int]:
+    html_nodes = [text_node_to_html_node(node) for node in text_to_textnodes(text)]
+    return "".join(node.to_html() for node in html_nodes), sum(map(count_nodes, html_nodes))
 
+_render_inline_cached = lru_cache(maxsize=INLINE_CACHE_SIZE)(_render_fragment)
+# Texts up to this length go through the cache; -1 turns it off entirely.
+_inline_cache_limit = INLINE_CACHE_MAX_LENGTH if INLINE_CACHE_SIZE else -1
+_parser_signature = PARSER_VERSION
 
-            case BlockType.UNORDERED_LIST:
-                children.append(ulist_to_html_node(block))
+def set_inline_cache_size(size: int):
+    # Keeping the cache when its size is unchanged lets a long-lived build
+    # process carry rendered fragments over from one build to the next.
+    global _render_inline_cached, _inline_cache_limit
+    if _render_inline_cached.cache_info().maxsize != size:
+        _render_inline_cached = lru_cache(maxsize=size)(_render_fragment)
+    _inline_cache_limit = INLINE_CACHE_MAX_LENGTH if size else -1
 
-            case BlockType.ORDERED_LIST:
-                children.append(olist_to_html_node(block))
+def register_block(extension: BlockExtension):
+    BLOCK_EXTENSIONS.append(extension)
+    _compile_block_classifiers()
+    _extensions_changed()
 
-            case _:
-                raise ValueError("invalid block type")
-            
-    return ParentNode("div", children, None)
+def register_inline_delimiter(delimiter: str, extension: InlineExtension):
+    # Applied after the built-in delimiters, to the text they leave plain.
+    if not delimiter:
+        raise ValueError(f"Inline extension {extension.name} needs a delimiter")
+    INLINE_DELIMITERS.append((delimiter, extension))
+    _extensions_changed()
+
+def register_inline_pattern(trigger: str, pattern: re.Pattern, extension: InlineExtension):
+    # Matched in plain text before links and images; the pattern is only run
+    # on text containing the trigger, and group 1 becomes the node's text.
+    INLINE_PATTERNS.append((trigger, pattern, extension))
+    _extensions_changed()
+
+def reset_extensions():
+    BLOCK_EXTENSIONS.clear()
+    _compile_block_classifiers()
+    del INLINE_DELIMITERS[BUILTIN_INLINE_DELIMITERS:]
+    INLINE_PATTERNS.clear()
+    _extensions_changed()
+
+def _extensions_changed():
+    global _parser_signature
+    extensions = list(BLOCK_EXTENSIONS)
+    extensions += [extension for _, extension in INLINE_DELIMITERS[BUILTIN_INLINE_DELIMITERS:]]
+    extensions += [extension for _, _, extension in INLINE_PATTERNS]
+    _parser_signature = ";".join(
+        [PARSER_VERSION] + [f"{extension.name}:{extension.version}" for extension in extensions]
+    )
+    # Cached fragments were rendered with the previous set of extensions.
+    _render_inline_cached.cache_clear()
+
+def parser_signature() -> str:
+    # PARSER_VERSION plus the registered extensions, for keying rendered
+    # output that depends on both.
+    return _parser_signature
+
+def set_image_attributes(attributes: dict[str, dict[str, str]]):
+    # Cached fragments may hold <img> tags rendered with the old attributes.
+    if attributes != IMAGE_ATTRIBUTES:
+        IMAGE_ATTRIBUTES.clear()
+        IMAGE_ATTRIBUTES.update(attributes)
+        _render_inline_cached.cache_clear()
+
+def image_attributes_digest(urls: Iterable[str]) -> str | None:
+    # Identifies the attributes a page's images render with; None when it
+    # has none, so pages without responsive images compare as before.
+    attributes = [(url, IMAGE_ATTRIBUTES[url]) for url in urls if url in IMAGE_ATTRIBUTES]
+    if not attributes:
+        return None
+    return hashlib.sha256(json.dumps(attributes, sort_keys=True).encode()).hexdigest()
+
+def inline_cache_info():
+    return _render_inline_cached.cache_info()
 
 def text_to_childen(text: str):
+    if len(text) <= _inline_cache_limit:
+        html, nodes = _render_inline_cached(text)
+        return [FragmentNode(html, nodes)]
     text_nodes = text_to_textnodes(text)
     children = []
     for text_node in text_nodes:
@@ -0,0 +1,112 @@
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+from htmlnode import FragmentNode, HTMLNode, ParentNode
+
+STAGES = ("read", "parse", "to_html", "render", "write")
+
+def count_nodes(node: HTMLNode) -> int:
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        count += node.nodes if isinstance(node, FragmentNode) else 1
+        if isinstance(node, ParentNode):
+            stack.extend(node.children)
+    return count
+
+def untimed(stage: str):
+    return nullcontext()
+
+class PageProfile:
+    def __init__(self, path: str):
+        self.path = path
+        self.timings = dict.fromkeys(STAGES, 0.0)
+        self.blocks = Counter()
+        self.nodes = 0
+        self.cached = False
+        self.streamed = False
+
+    def __repr__(self):
+        return f"PageProfile({self.path}, {self.total:.4f}s)"
+
+    @property
+    def total(self) -> float:
+        return sum(self.timings.values())
+
+    @contextmanager
+    def stage(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] += time.perf_counter() - start
+
+    def as_dict(self) -> dict:
+        return {
+            "path": self.path,
+            "total": self.total,
+            "timings": self.timings,
+            "blocks": dict(self.blocks),
+            "nodes": self.nodes,
+            "cached": self.cached,
+            "streamed": self.streamed,
+        }
+
+class BuildProfile:
+    def __init__(self):
+        self.pages: list[PageProfile] = []
+
+    def __repr__(self):
+        return f"BuildProfile({len(self.pages)} pages)"
+
+    def add(self, page: PageProfile):
+        self.pages.append(page)
+
+    def totals(self) -> dict[str, float]:
+        totals = dict.fromkeys(STAGES, 0.0)
+        for page in self.pages:
+            for stage, seconds in page.timings.items():
+                totals[stage] += seconds
+        return totals
+
+    def block_counts(self) -> Counter:
+        counts = Counter()
+        for page in self.pages:
+            counts.update(page.blocks)
+        return counts
+
+    def slowest(self, count: int) -> list[PageProfile]:
+        return sorted(self.pages, key=lambda page: page.total, reverse=True)[:count]
+
+    def report(self, top: int) -> dict:
+        return {
+            "pages": len(self.pages),
+            "stages": self.totals(),
+            "blocks": dict(self.block_counts()),
+            "nodes": sum(page.nodes for page in self.pages),
+            "cached_pages": sum(page.cached for page in self.pages),
+            "streamed_pages": sum(page.streamed for page in self.pages),
+            "slowest": [page.as_dict() for page in self.slowest(top)],
+            "per_page": [page.as_dict() for page in self.pages],
+        }
+
+    def write_json(self, path: str, top: int):
+        with open(path, "w") as report_file:
+            json.dump(self.report(top), report_file, indent=2)
+
+    def print_summary(self, top: int):
+        totals = self.totals()
+        total = sum(totals.values()) or 1.0
+        print("Stage timings:")
+        for stage, seconds in totals.items():
+            print(f"  {stage:>8}: {seconds:.4f}s ({seconds / total:.0%})")
+        print("Blocks:")
+        for block_type, count in sorted(self.block_counts().items()):
+            print(f"  {block_type:>15}: {count}")
+        print(f"HTML nodes: {sum(page.nodes for page in self.pages)}")
+        print(f"Slowest {top} page(s):")
+        for page in self.slowest(top):
+            print(f"  {page.total:.4f}s {page.path}")
@@ -0,0 +1,217 @@
+import heapq
+import json
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Iterator
+
+# Layout of OUTPUT/search:
+#   docs.json   {"version": 1, "docs": [[page, url, title, shard keys, source hash] | null]}
+#               A document id is its position in "docs"; ids of removed pages
+#               are left empty and reused, so other shards keep their ids.
+#   <key>.bin   every term starting with <key> (its first PREFIX_LENGTH
+#               characters), sorted, each encoded as
+#                   varint(len(term)) term varint(count)
+#                   count * (varint(id - previous id) varint(term frequency))
+SEARCH_DIR = "search"
+SEARCH_VERSION = 1
+PREFIX_LENGTH = 2
+
+TAG_PATTERN = re.compile(r"<[^>]*>")
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def shard_key(term: str) -> str:
+    return term[:PREFIX_LENGTH]
+
+def tokenize(html: str) -> list[str]:
+    return TOKEN_PATTERN.findall(TAG_PATTERN.sub(" ", html).lower())
+
+def encode_varint(value: int, out: bytearray):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+def decode_varint(data: bytes, position: int) -> tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+def encode_shard(postings: dict[str, dict[int, int]]) -> bytes:
+    out = bytearray()
+    for term in sorted(postings):
+        term_bytes = term.encode()
+        encode_varint(len(term_bytes), out)
+        out += term_bytes
+        documents = postings[term]
+        encode_varint(len(documents), out)
+        previous = 0
+        for doc_id in sorted(documents):
+            encode_varint(doc_id - previous, out)
+            encode_varint(documents[doc_id], out)
+            previous = doc_id
+    return bytes(out)
+
+def decode_shard(data: bytes) -> dict[str, dict[int, int]]:
+    postings = {}
+    position = 0
+    while position < len(data):
+        length, position = decode_varint(data, position)
+        term = data[position:position + length].decode()
+        position += length
+        count, position = decode_varint(data, position)
+        documents = {}
+        doc_id = 0
+        for _ in range(count):
+            delta, position = decode_varint(data, position)
+            frequency, position = decode_varint(data, position)
+            doc_id += delta
+            documents[doc_id] = frequency
+        postings[term] = documents
+    return postings
+
+class PageText:
+    __slots__ = ("title", "terms")
+
+    def __init__(self):
+        self.title = ""
+        self.terms = Counter()
+
+    def __repr__(self):
+        return f"PageText({self.title}, {len(self.terms)} terms)"
+
+    def add(self, html: str):
+        self.terms.update(tokenize(html))
+
+    def collect(self, fragments: Iterable[str]) -> Iterator[str]:
+        # Tokenize a page's HTML fragments as they are written out.
+        for fragment in fragments:
+            self.add(fragment)
+            yield fragment
+
+class SearchIndex:
+    def __init__(self, directory: str, docs: list | None = None):
+        self.directory = Path(directory)
+        # Without a readable docs.json any shard files left behind are stale.
+        self.fresh = docs is None
+        self.docs = docs if docs is not None else []
+        self.ids = {doc[0]: doc_id for doc_id, doc in enumerate(self.docs) if doc is not None}
+        self.free = [doc_id for doc_id, doc in enumerate(self.docs) if doc is None]
+        heapq.heapify(self.free)
+
+        # Changes since the last save, applied only to the shards they touch.
+        self.added: dict[str, dict[str, dict[int, int]]] = {}
+        self.dropped: set[int] = set()
+        self.touched: set[str] = set()
+
+    @classmethod
+    def load(cls, dest_dir: str) -> "SearchIndex":
+        directory = os.path.join(dest_dir, SEARCH_DIR)
+        try:
+            with open(os.path.join(directory, "docs.json"), "r") as docs_file:
+                data = json.load(docs_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return cls(directory)
+
+        if data.get("version") != SEARCH_VERSION:
+            return cls(directory)
+        return cls(directory, data["docs"])
+
+    def __repr__(self):
+        return f"SearchIndex({self.directory}, {len(self.ids)} documents)"
+
+    def is_current(self, page: str, source_hash: str) -> bool:
+        doc_id = self.ids.get(page)
+        return doc_id is not None and self.docs[doc_id][4] == source_hash
+
+    def pages(self) -> set[str]:
+        return set(self.ids)
+
+    def remove(self, page: str):
+        doc_id = self.ids.pop(page, None)
+        if doc_id is None:
+            return
+        self.dropped.add(doc_id)
+        self.touched.update(self.docs[doc_id][3])
+        self.docs[doc_id] = None
+        heapq.heappush(self.free, doc_id)
+
+    def add(self, page: str, url: str, source_hash: str, text: PageText):
+        self.remove(page)
+        if self.free:
+            doc_id = heapq.heappop(self.free)
+        else:
+            doc_id = len(self.docs)
+            self.docs.append(None)
+
+        keys = set()
+        for term, frequency in text.terms.items():
+            key = shard_key(term)
+            keys.add(key)
+            self.added.setdefault(key, {}).setdefault(term, {})[doc_id] = frequency
+        self.touched.update(keys)
+        self.docs[doc_id] = [page, url, text.title, sorted(keys), source_hash]
+        self.ids[page] = doc_id
+
+    def lookup(self, term: str) -> dict[int, int]:
+        path = self.directory / f"{shard_key(term)}.bin"
+        try:
+            postings = decode_shard(path.read_bytes())
+        except FileNotFoundError:
+            return {}
+        return postings.get(term, {})
+
+    def _write(self, path: Path, data: bytes):
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    def save(self) -> int:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if self.fresh:
+            self.touched.update(path.stem for path in self.directory.glob("*.bin"))
+
+        for key in sorted(self.touched):
+            path = self.directory / f"{key}.bin"
+            postings = {}
+            if not self.fresh and path.exists():
+                postings = decode_shard(path.read_bytes())
+            if self.dropped:
+                for term in list(postings):
+                    documents = {
+                        doc_id: frequency
+                        for doc_id, frequency in postings[term].items()
+                        if doc_id not in self.dropped
+                    }
+                    if documents:
+                        postings[term] = documents
+                    else:
+                        del postings[term]
+            for term, documents in self.added.get(key, {}).items():
+                postings.setdefault(term, {}).update(documents)
+
+            if postings:
+                self._write(path, encode_shard(postings))
+            elif path.exists():
+                path.unlink()
+
+        while self.docs and self.docs[-1] is None:
+            self.docs.pop()
+        self.free = [doc_id for doc_id in self.free if doc_id < len(self.docs)]
+        heapq.heapify(self.free)
+        docs = json.dumps({"version": SEARCH_VERSION, "docs": self.docs}, separators=(",", ":"))
+        self._write(self.directory / "docs.json", docs.encode())
+
+        written = len(self.touched)
+        self.added = {}
+        self.dropped = set()
+        self.touched = set()
+        self.fresh = False
+        return written
@@ -0,0 +1,308 @@
+import argparse
+import functools
+import mimetypes
+import os
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+import main as site
+from archive import SiteArchive
+from assets import SYNC_MODES, place_file, remove_empty_dirs, sync_directory
+from compress import remove_compressed
+from manifest import Manifest, file_hash
+from markdown import parser_signature
+from template import Template
+
+class DevSite:
+    def __init__(
+            self,
+            content_dir: str,
+            static_dir: str,
+            template_path: str,
+            dest_dir: str,
+            basepath: str = "/",
+            link_mode: str = "copy"
+        ):
+        self.content_dir = Path(content_dir)
+        self.static_dir = Path(static_dir)
+        self.template_path = Path(template_path)
+        self.dest_dir = Path(dest_dir)
+        self.basepath = basepath
+        self.link_mode = link_mode
+
+        self.manifest = Manifest.load(dest_dir)
+        self.template = None
+        self.template_hash = None
+        self.snapshot = {}
+
+    def scan(self) -> dict[Path, tuple[int, int]]:
+        paths = list(self.content_dir.rglob("*.md"))
+        paths.extend(path for path in self.static_dir.rglob("*") if path.is_file())
+        paths.append(self.template_path)
+
+        snapshot = {}
+        for path in paths:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _load_template(self):
+        self.template = Template.from_file(str(self.template_path), self.basepath)
+        self.template_hash = file_hash(str(self.template_path))
+
+    def build_all(self):
+        self.snapshot = self.scan()
+        self._load_template()
+        sync_directory(str(self.static_dir), str(self.dest_dir), self.manifest, self.link_mode)
+        # Pages and assets change under watch without being compressed again.
+        remove_compressed(str(self.dest_dir), self.manifest)
+        return site.generate_pages_recursive(
+            str(self.content_dir),
+            str(self.template_path),
+            str(self.dest_dir),
+            self.basepath,
+            incremental=True,
+            manifest=self.manifest,
+        )
+
+    def poll(self) -> tuple[set[Path], set[Path]]:
+        snapshot = self.scan()
+        changed = {
+            path for path, state in snapshot.items() if self.snapshot.get(path) != state
+        }
+        removed = set(self.snapshot) - set(snapshot)
+        self.snapshot = snapshot
+        return changed, removed
+
+    def _page_for(self, md_file: Path) -> str:
+        return md_file.relative_to(self.content_dir).with_suffix(".html").as_posix()
+
+    def _update_page(self, md_file: Path):
+        page = self._page_for(md_file)
+        dest_file = self.dest_dir / page
+        try:
+            stat = md_file.stat()
+            source_hash = file_hash(str(md_file))
+            references = site.generate_page(
+                str(md_file),
+                str(self.template_path),
+                str(dest_file),
+                self.basepath,
+                self.template,
+            )
+        except Exception as e:
+            print(f"Error processing {md_file}: {e}")
+            self.manifest.forget(page)
+            return
+        self.manifest.record(
+            page,
+            str(md_file),
+            source_hash,
+            stat,
+            self.template_hash,
+            self.basepath,
+            str(self.template_path),
+            references,
+            parser_signature(),
+        )
+
+    def _remove_output(self, dest_file: Path):
+        if dest_file.is_file():
+            print(f"Removing {dest_file}")
+            dest_file.unlink()
+            remove_empty_dirs(dest_file.parent, self.dest_dir)
+
+    def rebuild(self, changed: set[Path], removed: set[Path]):
+        if self.template_path in changed:
+            print("Template changed, rebuilding every page")
+            self._load_template()
+            site.generate_pages_recursive(
+                str(self.content_dir),
+                str(self.template_path),
+                str(self.dest_dir),
+                self.basepath,
+                incremental=True,
+                manifest=self.manifest,
+            )
+            changed = {path for path in changed if not path.is_relative_to(self.content_dir)}
+            removed = {path for path in removed if not path.is_relative_to(self.content_dir)}
+
+        for path in sorted(changed):
+            if path.is_relative_to(self.content_dir):
+                self._update_page(path)
+            elif path.is_relative_to(self.static_dir):
+                relative_path = path.relative_to(self.static_dir).as_posix()
+                print(f"Copying {path}")
+                place_file(str(path), str(self.dest_dir / relative_path), self.link_mode)
+                stat = path.stat()
+                self.manifest.assets[relative_path] = {
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                }
+
+        for path in sorted(removed):
+            if path.is_relative_to(self.content_dir):
+                page = self._page_for(path)
+                self._remove_output(self.dest_dir / page)
+                self.manifest.forget(page)
+            elif path.is_relative_to(self.static_dir):
+                relative_path = path.relative_to(self.static_dir).as_posix()
+                self._remove_output(self.dest_dir / relative_path)
+                self.manifest.assets.pop(relative_path, None)
+
+        self.manifest.save()
+
+    def watch(self, interval: float, stop: threading.Event):
+        while not stop.wait(interval):
+            changed, removed = self.poll()
+            if changed or removed:
+                start = time.perf_counter()
+                self.rebuild(changed, removed)
+                print(f"Rebuilt in {time.perf_counter() - start:.3f}s")
+
+class SiteRequestHandler(SimpleHTTPRequestHandler):
+    basepath = "/"
+
+    def translate_path(self, path: str) -> str:
+        # Pages link to /basepath/..., so serve the output tree under it.
+        if self.basepath != "/" and path.startswith(self.basepath):
+            path = "/" + path[len(self.basepath):]
+        return super().translate_path(path)
+
+def make_server(directory: str, host: str, port: int, basepath: str) -> ThreadingHTTPServer:
+    handler = type("Handler", (SiteRequestHandler,), {"basepath": basepath})
+    return ThreadingHTTPServer(
+        (host, port), functools.partial(handler, directory=os.path.abspath(directory))
+    )
+
+class ArchiveRequestHandler(BaseHTTPRequestHandler):
+    archive: SiteArchive = None
+    basepath = "/"
+
+    def _member(self) -> tuple[str | None, str | None]:
+        path = unquote(urlsplit(self.path).path)
+        if not path.startswith(self.basepath):
+            return None, None
+        name = path[len(self.basepath):].lstrip("/")
+        if name == "" or name.endswith("/"):
+            name += "index.html"
+        if name in self.archive:
+            return name, None
+        if f"{name}/index.html" in self.archive:
+            return None, path + "/"
+        return None, None
+
+    def _respond(self, send_body: bool):
+        name, redirect = self._member()
+        if redirect is not None:
+            self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+            self.send_header("Location", redirect)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if name is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        body = self.archive.get(name)
+        try:
+            self.send_response(HTTPStatus.OK)
+            self.send_header(
+                "Content-Type", mimetypes.guess_type(name)[0] or "application/octet-stream"
+            )
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+        finally:
+            body.release()
+
+    def do_GET(self):
+        self._respond(True)
+
+    def do_HEAD(self):
+        self._respond(False)
+
+def make_archive_server(
+        archive: SiteArchive,
+        host: str,
+        port: int,
+        basepath: str
+    ) -> ThreadingHTTPServer:
+    handler = type(
+        "Handler", (ArchiveRequestHandler,), {"archive": archive, "basepath": basepath}
+    )
+    return ThreadingHTTPServer((host, port), handler)
+
+def serve_archive(args: argparse.Namespace):
+    archive = SiteArchive(args.archive)
+    server = make_archive_server(archive, args.host, args.port, args.basepath)
+    print(f"Serving {args.archive} at http://{args.host}:{args.port}{args.basepath}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        archive.close()
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="main.py serve", description="Build the site and serve it locally."
+    )
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument("--watch", action="store_true", help="rebuild on changes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument(
+        "--interval", type=float, default=0.5, help="seconds between change polls"
+    )
+    parser.add_argument("--link", choices=SYNC_MODES, default="copy")
+    parser.add_argument(
+        "--archive",
+        metavar="FILE",
+        help="serve a site packed with 'main.py --archive' from a memory map instead of building",
+    )
+    args = parser.parse_args(argv)
+    if args.archive and args.watch:
+        parser.error("--watch rebuilds the output directory and cannot be used with --archive")
+    return args
+
+def serve_main(argv: list[str]):
+    args = parse_args(argv)
+    if args.archive:
+        return serve_archive(args)
+
+    dev_site = DevSite(
+        site.CONTENT_DIR,
+        site.STATIC_DIR,
+        site.TEMPLATE_PATH,
+        site.OUTPUT_DIR,
+        args.basepath,
+        args.link,
+    )
+    generated = dev_site.build_all()
+    print(f"Generated {generated} page(s)")
+
+    server = make_server(site.OUTPUT_DIR, args.host, args.port, args.basepath)
+    stop = threading.Event()
+    if args.watch:
+        threading.Thread(
+            target=dev_site.watch, args=(args.interval, stop), daemon=True
+        ).start()
+
+    print(f"Serving {site.OUTPUT_DIR} at http://{args.host}:{args.port}{args.basepath}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
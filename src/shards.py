@@ -0,0 +1,128 @@
+import argparse
+import hashlib
+import os
+from pathlib import Path
+
+from assets import SYNC_MODES, place_file, remove_empty_dirs, sync_directory
+from compress import remove_compressed
+from images import remove_image_variants
+from listings import remove_listings
+from manifest import Manifest
+
+def parse_shard(text: str) -> tuple[int, int]:
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected K/N, got: {text}")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard must satisfy 1 <= K <= N, got: {text}")
+    return index, count
+
+def shard_of(relative_path: str, count: int) -> int:
+    # A stable hash of the path, not hash(), so every machine agrees.
+    digest = hashlib.sha1(relative_path.encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+def expected_pages(content_dir: str) -> set[str]:
+    content_path = Path(content_dir)
+    return {
+        md_file.relative_to(content_path).with_suffix(".html").as_posix()
+        for md_file in content_path.rglob("*.md")
+    }
+
+def check_shards(manifests: list[Manifest], content_dir: str) -> list[str]:
+    problems = []
+    if any(manifest.shard is None for manifest in manifests):
+        return ["Every directory to merge must come from a --shard build"]
+    counts = {manifest.shard[1] for manifest in manifests}
+    if len(counts) != 1:
+        return [f"Shard outputs disagree on the shard count: {sorted(counts)}"]
+    count = counts.pop()
+
+    indices = sorted(manifest.shard[0] for manifest in manifests)
+    for index in sorted(set(range(1, count + 1)) - set(indices)):
+        problems.append(f"Missing shard {index}/{count}")
+    for index in sorted({index for index in indices if indices.count(index) > 1}):
+        problems.append(f"Shard {index}/{count} given more than once")
+
+    # Shards built with a different basepath, template or parser would
+    # merge into a site whose pages do not fit together.
+    for key, name in [
+        ("basepath", "basepath"),
+        ("template_hash", "template"),
+        ("parser", "parser and extensions"),
+    ]:
+        values = {entry.get(key) for manifest in manifests for entry in manifest.pages.values()}
+        if len(values) > 1:
+            problems.append(f"Shard outputs disagree on the {name}: {sorted(values, key=str)}")
+
+    owners: dict[str, list[str]] = {}
+    for manifest in manifests:
+        for page in manifest.pages:
+            owners.setdefault(page, []).append(os.path.dirname(manifest.path))
+
+    expected = expected_pages(content_dir)
+    for page in sorted(expected - set(owners)):
+        problems.append(f"Missing page: {page}")
+    for page in sorted(set(owners) - expected):
+        problems.append(f"Page has no source: {page}")
+    for page, dirs in sorted(owners.items()):
+        if len(dirs) > 1:
+            problems.append(f"Duplicate page {page} in: {', '.join(dirs)}")
+    return problems
+
+def merge_shards(
+        shard_dirs: list[str],
+        content_dir: str,
+        static_dir: str,
+        dest_dir: str,
+        mode: str = "copy"
+    ) -> list[str]:
+    manifests = [Manifest.load(shard_dir) for shard_dir in shard_dirs]
+    problems = check_shards(manifests, content_dir)
+    if problems:
+        return problems
+
+    merged = Manifest.load(dest_dir)
+    previous_pages = merged.pages
+    merged.shard = None
+    merged.pages = {}
+    # Shard builds never compress, resize images or generate listings, so
+    # whatever an earlier build left of those would be stale after the merge.
+    remove_compressed(dest_dir, merged)
+    remove_image_variants(merged, dest_dir)
+    for shard_dir, manifest in zip(shard_dirs, manifests):
+        for page, entry in manifest.pages.items():
+            place_file(os.path.join(shard_dir, page), os.path.join(dest_dir, page), mode)
+            merged.pages[page] = entry
+
+    for page in sorted(set(previous_pages) - set(merged.pages)):
+        stale_file = Path(dest_dir) / page
+        if stale_file.is_file():
+            print(f"Removing stale page: {stale_file}")
+            stale_file.unlink()
+            remove_empty_dirs(stale_file.parent, Path(dest_dir))
+    remove_listings(merged, Path(dest_dir), content_pages=set(merged.pages))
+
+    sync_directory(static_dir, dest_dir, merged, mode)
+    merged.save()
+    return []
+
+def merge_main(argv: list[str], content_dir: str, static_dir: str, output_dir: str) -> int:
+    parser = argparse.ArgumentParser(
+        prog="main.py merge",
+        description="Combine the outputs of --shard builds into one site.",
+    )
+    parser.add_argument("shard_dirs", nargs="+", metavar="SHARD_DIR")
+    parser.add_argument("-o", "--output", default=output_dir)
+    parser.add_argument("--link", choices=SYNC_MODES, default="copy")
+    args = parser.parse_args(argv)
+
+    problems = merge_shards(args.shard_dirs, content_dir, static_dir, args.output, args.link)
+    for problem in problems:
+        print(problem)
+    if problems:
+        print("Merge aborted")
+        return 1
+    print(f"Merged {len(args.shard_dirs)} shard(s) into {args.output}")
+    return 0
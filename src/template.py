@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import os
+import re
+from typing import Iterable, TextIO
+
+# Only these names are slots; any other {{ ... }} in the template, such as
+# markup for a client-side framework, is kept as literal text.
+TEMPLATE_SLOTS = ("Title", "Content")
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(" + "|".join(TEMPLATE_SLOTS) + r")\s*\}\}")
+
+SRCSET_PATTERN = re.compile(r'srcset="([^"]*)"')
+
+def _rebase_srcset(match: re.Match, basepath: str) -> str:
+    candidates = [
+        basepath + candidate[1:] if candidate.startswith("/") else candidate
+        for candidate in match.group(1).split(", ")
+    ]
+    return 'srcset="' + ", ".join(candidates) + '"'
+
+def rebase_links(html: str, basepath: str) -> str:
+    if basepath == "/":
+        return html
+    html = html.replace('href="/', f'href="{basepath}')
+    html = html.replace('src="/', f'src="{basepath}')
+    if 'srcset="' in html:
+        html = SRCSET_PATTERN.sub(lambda match: _rebase_srcset(match, basepath), html)
+    return html
+
+class Template:
+    def __init__(self, source: str, basepath: str = "/"):
+        self.basepath = basepath
+        self.literals: list[str] = []
+        self.slots: list[str] = []
+
+        # The basepath rewrite is applied to the literals once here, so
+        # rendering a page never has to scan the template text again.
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            self.literals.append(rebase_links(source[position:match.start()], basepath))
+            self.slots.append(match.group(1))
+            position = match.end()
+        self.literals.append(rebase_links(source[position:], basepath))
+
+    @classmethod
+    def from_file(cls, path: str, basepath: str = "/") -> Template:
+        with open(path, "r") as template_file:
+            return cls(template_file.read(), basepath)
+
+    def __repr__(self):
+        return f"Template(slots: {self.slots}, {self.basepath})"
+
+    def _value(self, values: dict, slot: str):
+        if slot not in values:
+            raise ValueError(f"No value for template placeholder: {slot}")
+        return values[slot]
+
+    def render(self, **values: str) -> str:
+        parts = [self.literals[0]]
+        for slot, literal in zip(self.slots, self.literals[1:]):
+            parts.append(self._value(values, slot))
+            parts.append(literal)
+        return "".join(parts)
+
+    def write(self, fp: TextIO, **values: str | Iterable[str]):
+        fp.write(self.literals[0])
+        for slot, literal in zip(self.slots, self.literals[1:]):
+            value = self._value(values, slot)
+            if isinstance(value, str):
+                fp.write(value)
+            else:
+                fp.writelines(value)
+            fp.write(literal)
+
+# Compiled templates by path and basepath, reused while the file's mtime and
+# size are unchanged, so a long-lived build process parses each one once.
+_compiled: dict[tuple[str, str], tuple[tuple[int, int], Template]] = {}
+
+def load_template(path: str, basepath: str = "/") -> Template:
+    stat = os.stat(path)
+    state = (stat.st_mtime_ns, stat.st_size)
+    key = (os.path.abspath(path), basepath)
+    cached = _compiled.get(key)
+    if cached is not None and cached[0] == state:
+        return cached[1]
+    template = Template.from_file(path, basepath)
+    _compiled[key] = (state, template)
+    return template
@@ -1,6 +1,7 @@
 from __future__ import annotations
 import re
 from enum import Enum
+from typing import Callable
 
 from htmlnode import HTMLNode, LeafNode
 #from src.markdown import extract_markdown_images, extract_markdown_links
@@ -11,13 +12,14 @@ def _match_markdown_groups(text: str, split_pattern: re.Pattern):
         lst.append((match.group(1), match.group(2)))
     return lst
 
+IMAGE_PATTERN = re.compile(r'\!\[(.*?)\]\((.*?)\)')
+LINK_PATTERN = re.compile(r'(?<!!)\[(.*?)\]\((.*?)\)')
+
 def extract_markdown_images(text: str) -> list[str]:
-    split_pattern = re.compile(r'\!\[(.*?)\]\((.*?)\)')
-    return _match_markdown_groups(text, split_pattern)
+    return _match_markdown_groups(text, IMAGE_PATTERN)
 
 def extract_markdown_links(text: str) -> list[str]:
-    split_pattern = re.compile(r'(?<!!)\[(.*?)\]\((.*?)\)')
-    return _match_markdown_groups(text, split_pattern)
+    return _match_markdown_groups(text, LINK_PATTERN)
 
 class TextType(Enum):
     TEXT = "text"
@@ -27,7 +29,29 @@ class TextType(Enum):
     LINK = "link"
     IMAGE = "image"
 
+class InlineExtension:
+    __slots__ = ("name", "render", "version")
+
+    def __init__(
+            self,
+            name: str,
+            render: Callable[["TextNode"], HTMLNode],
+            version: str = "1"
+        ):
+        self.name = name
+        self.render = render
+        self.version = version
+
+    def __repr__(self):
+        return f"InlineExtension({self.name})"
+
+    @property
+    def value(self) -> str:
+        return self.name
+
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type: TextType, url=None):
         self.text = text
         self.text_type = text_type
@@ -136,6 +160,10 @@ def split_nodes_link(old_nodes: list[TextNode]) -> list[TextNode]:
     
     return new_nodes
 
+# Extra <img> attributes by image URL, e.g. width, height and srcset from
+# the responsive image pipeline; see markdown.set_image_attributes.
+IMAGE_ATTRIBUTES: dict[str, dict[str, str]] = {}
+
 def text_node_to_html_node(text_node: TextNode) -> HTMLNode:
     match text_node.text_type:
         case TextType.TEXT:
@@ -158,18 +186,112 @@ def text_node_to_html_node(text_node: TextNode) -> HTMLNode:
         case TextType.IMAGE:
             if text_node.url is None:
                 raise ValueError("TextNode misssing url value")
-            return LeafNode(
-                "img", 
-                "", 
-                {"src": text_node.url, "alt": text_node.text}
-            )
+            props = {"src": text_node.url, "alt": text_node.text}
+            props.update(IMAGE_ATTRIBUTES.get(text_node.url, ()))
+            return LeafNode("img", "", props)
+    if isinstance(text_node.text_type, InlineExtension):
+        return text_node.text_type.render(text_node)
     raise Exception("Invalid TextType")
 
+# Applied in this order, each one only to the text left plain by the
+# previous ones; links and then images are matched in whatever remains.
+INLINE_DELIMITERS: list[tuple[str, TextType | InlineExtension]] = [
+    ("**", TextType.BOLD),
+    ("_", TextType.ITALIC),
+    ("`", TextType.CODE),
+]
+BUILTIN_INLINE_DELIMITERS = len(INLINE_DELIMITERS)
+# Extension patterns, each (trigger, pattern, extension), matched in the
+# plain text left by the delimiters before links and images.
+INLINE_PATTERNS: list[tuple[str, re.Pattern, InlineExtension]] = []
+
+def _append_text(text: str, nodes: list[TextNode]):
+    nodes.append(TextNode(text, TextType.TEXT))
+
+def _lex_spans(
+        text: str,
+        pattern: re.Pattern,
+        text_type: TextType,
+        nodes: list[TextNode],
+        on_text
+    ):
+    position = 0
+    for match in pattern.finditer(text):
+        if match.start() > position:
+            on_text(text[position:match.start()], nodes)
+        nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+        position = match.end()
+    if position < len(text):
+        on_text(text[position:], nodes)
+
+def _lex_images(text: str, nodes: list[TextNode]):
+    if "![" not in text:
+        nodes.append(TextNode(text, TextType.TEXT))
+        return
+    _lex_spans(text, IMAGE_PATTERN, TextType.IMAGE, nodes, _append_text)
+
+def _lex_links(text: str, nodes: list[TextNode]):
+    if "](" not in text:
+        nodes.append(TextNode(text, TextType.TEXT))
+        return
+    _lex_spans(text, LINK_PATTERN, TextType.LINK, nodes, _lex_images)
+
+def _lex_patterns(text: str, level: int, nodes: list[TextNode]):
+    if level == len(INLINE_PATTERNS):
+        _lex_links(text, nodes)
+        return
+
+    trigger, pattern, extension = INLINE_PATTERNS[level]
+    position = 0
+    if trigger in text:
+        for match in pattern.finditer(text):
+            if match.start() > position:
+                _lex_patterns(text[position:match.start()], level + 1, nodes)
+            nodes.append(TextNode(match.group(1), extension))
+            position = match.end()
+    if position < len(text):
+        _lex_patterns(text[position:], level + 1, nodes)
+
+def _lex_delimited(text: str, start: int, end: int, level: int, nodes: list[TextNode]):
+    if level == len(INLINE_DELIMITERS):
+        if INLINE_PATTERNS:
+            _lex_patterns(text[start:end], 0, nodes)
+        else:
+            _lex_links(text[start:end], nodes)
+        return
+
+    delimiter, text_type = INLINE_DELIMITERS[level]
+    position = start
+    inside = False
+    while True:
+        found = text.find(delimiter, position, end)
+        stop = end if found == -1 else found
+        if inside:
+            nodes.append(TextNode(text[position:stop], text_type))
+        elif stop > position:
+            _lex_delimited(text, position, stop, level + 1, nodes)
+        else:
+            # split_nodes_delimiter turns an empty plain part into an empty
+            # node of the delimiter's type; keep that so output is unchanged.
+            nodes.append(TextNode("", text_type))
+
+        if found == -1:
+            break
+        position = found + len(delimiter)
+        inside = not inside
+
+    if inside:
+        raise ValueError(
+            f"Unmatched delimiter '{delimiter}' in text:\n\t{text[start:end]}"
+        )
+
+def tokenize_inline(text: str) -> list[TextNode]:
+    # One left-to-right walk over index ranges of the original string that
+    # yields the same nodes as chaining split_nodes_delimiter,
+    # split_nodes_link and split_nodes_image, without the intermediate lists.
+    nodes: list[TextNode] = []
+    _lex_delimited(text, 0, len(text), 0, nodes)
+    return nodes
+
 def text_to_textnodes(text: str) -> list[TextNode]:
-    node = TextNode(text=text, text_type=TextType.TEXT)
-    nodes = split_nodes_delimiter([node], "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_link(nodes)
-    nodes = split_nodes_image(nodes)
-    return nodes
\ No newline at end of file
+    return tokenize_inline(text)
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+from src.aio import run_pipeline
+
+
+class TestRunPipeline(unittest.TestCase):
+    def test_results_keep_job_order_and_errors(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            jobs = [(f"src{i}", os.path.join(tmp, f"d{i % 3}", f"out{i}")) for i in range(20)]
+
+            def read(job):
+                if job[0] == "src7":
+                    raise OSError("unreadable")
+                return job[0].upper()
+
+            def render(job, data):
+                if job[0] == "src3":
+                    return None, "skipped"
+                return data + "!", f"ok {job[0]}"
+
+            def write(job, output):
+                with open(job[1], "w") as output_file:
+                    output_file.write(output)
+
+            results, stats = run_pipeline(
+                jobs,
+                read,
+                render,
+                write,
+                lambda job: job[1],
+                lambda job, error: f"error {job[0]}: {error}",
+                io_workers=3,
+                prefetch=4,
+            )
+
+            self.assertEqual(results[0], "ok src0")
+            self.assertEqual(results[3], "skipped")
+            self.assertEqual(results[7], "error src7: unreadable")
+            self.assertEqual(len(results), 20)
+            self.assertEqual(stats.reads, 19)
+            self.assertEqual(stats.writes, 18)
+            self.assertEqual(stats.directories, 3)
+            with open(jobs[5][1]) as output_file:
+                self.assertEqual(output_file.read(), "SRC5!")
+
+
+if __name__ == "__main__":
+    unittest.main()
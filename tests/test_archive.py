@@ -0,0 +1,100 @@
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+import zipfile
+from pathlib import Path
+
+from src.archive import ArchiveWriter, SiteArchive
+from src.main import generate_pages_recursive
+from src.server import make_archive_server
+
+
+class TestSiteArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        self.static = self.root / "static"
+        self.template = self.root / "template.html"
+        (self.content / "blog").mkdir(parents=True)
+        self.static.mkdir()
+        (self.content / "index.md").write_text("# Home\n\n[Blog](/blog/)")
+        (self.content / "blog" / "index.md").write_text("# Blog\n\n- one\n- two")
+        (self.static / "index.css").write_text("body {}")
+        (self.static / "index.html").write_text("static loses to the page")
+        self.template.write_text('<link href="/index.css"><title>{{ Title }}</title>{{ Content }}')
+        self.archive_path = str(self.root / "site.zip")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def pack(self, workers=1):
+        with ArchiveWriter(self.archive_path) as archive:
+            generated = generate_pages_recursive(
+                str(self.content), str(self.template), "", "/x/", workers=workers, archive=archive
+            )
+            archive.add_directory(str(self.static))
+        return generated
+
+    def test_archive_matches_directory_build(self):
+        self.assertEqual(self.pack(workers=2), 2)
+        dest = self.root / "docs"
+        generate_pages_recursive(str(self.content), str(self.template), str(dest), "/x/")
+
+        site = SiteArchive(self.archive_path)
+        try:
+            self.assertEqual(sorted(site.entries), ["blog/index.html", "index.css", "index.html"])
+            for page in ("index.html", "blog/index.html"):
+                view = site.get(page)
+                self.assertEqual(bytes(view), (dest / page).read_bytes())
+                view.release()
+            self.assertIsNone(site.get("missing.html"))
+        finally:
+            site.close()
+        with zipfile.ZipFile(self.archive_path) as archive:
+            self.assertIsNone(archive.testzip())
+
+    def test_archive_is_reproducible(self):
+        self.pack()
+        first = Path(self.archive_path).read_bytes()
+        self.pack()
+        self.assertEqual(Path(self.archive_path).read_bytes(), first)
+
+    def test_failed_pack_leaves_no_archive(self):
+        with self.assertRaises(RuntimeError):
+            with ArchiveWriter(self.archive_path) as archive:
+                archive.write_text("index.html", "partial")
+                raise RuntimeError("boom")
+        self.assertFalse(Path(self.archive_path).exists())
+        self.assertFalse(Path(self.archive_path + ".tmp").exists())
+
+    def test_server_serves_from_archive(self):
+        self.pack()
+        site = SiteArchive(self.archive_path)
+        server = make_archive_server(site, "127.0.0.1", 0, "/x/")
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            with urllib.request.urlopen(f"{base}/x/blog/") as response:
+                self.assertEqual(response.headers["Content-Type"], "text/html")
+                self.assertIn(b"<li>one</li>", response.read())
+            with urllib.request.urlopen(f"{base}/x/blog") as response:
+                self.assertEqual(response.url, f"{base}/x/blog/")
+            with urllib.request.urlopen(f"{base}/x/index.css") as response:
+                self.assertEqual(response.read(), b"body {}")
+            with self.assertRaises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(f"{base}/x/missing.html")
+            self.assertEqual(error.exception.code, 404)
+            error.exception.close()
+        finally:
+            server.shutdown()
+            thread.join()
+            server.server_close()
+            site.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
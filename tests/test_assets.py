@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.assets import sync_directory
+from src.manifest import Manifest
+
+
+class TestSyncDirectory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.src = root / "static"
+        self.dst = root / "docs"
+        (self.src / "images").mkdir(parents=True)
+        (self.src / "index.css").write_text("body {}")
+        (self.src / "images" / "a.png").write_bytes(b"png")
+        self.manifest = Manifest(str(self.dst / ".manifest.json"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_only_changed_files_are_copied(self):
+        stats = sync_directory(str(self.src), str(self.dst), self.manifest)
+        self.assertEqual(stats.copied, 2)
+
+        stats = sync_directory(str(self.src), str(self.dst), self.manifest)
+        self.assertEqual((stats.copied, stats.unchanged), (0, 2))
+
+        (self.src / "index.css").write_text("body { color: red; }")
+        stats = sync_directory(str(self.src), str(self.dst), self.manifest, checksum=True)
+        self.assertEqual(stats.copied, 2)
+        self.assertEqual((self.dst / "index.css").read_text(), "body { color: red; }")
+
+        stats = sync_directory(str(self.src), str(self.dst), self.manifest, checksum=True)
+        self.assertEqual(stats.copied, 0)
+
+    def test_prune_keeps_other_outputs(self):
+        sync_directory(str(self.src), str(self.dst), self.manifest)
+        (self.dst / "index.html").write_text("<html></html>")
+        os.remove(self.src / "images" / "a.png")
+
+        stats = sync_directory(str(self.src), str(self.dst), self.manifest)
+        self.assertEqual(stats.removed, 1)
+        self.assertFalse((self.dst / "images").exists())
+        self.assertTrue((self.dst / "index.html").is_file())
+
+    def test_hardlink_mode(self):
+        sync_directory(str(self.src), str(self.dst), self.manifest, mode="hardlink")
+        self.assertTrue(os.path.samefile(self.src / "index.css", self.dst / "index.css"))
+
+
+if __name__ == "__main__":
+    unittest.main()
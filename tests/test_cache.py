@@ -0,0 +1,42 @@
+import os
+import tempfile
+import unittest
+
+from src.cache import RenderCache
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = RenderCache(os.path.join(self.tmp.name, "pages"), max_bytes=1000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_get_and_put(self):
+        self.assertIsNone(self.cache.get("# Title"))
+        self.cache.put("# Title", "<div><h1>Title</h1></div>")
+        self.assertEqual(self.cache.get("# Title"), "<div><h1>Title</h1></div>")
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_prune_evicts_least_recently_used(self):
+        for i in range(4):
+            self.cache.put(f"doc {i}", "x" * 400)
+            path = self.cache._path(self.cache.key(f"doc {i}"))
+            os.utime(path, ns=(i * 10**9, i * 10**9))
+        self.cache.get("doc 0")
+
+        self.assertEqual(self.cache.prune(), 2)
+        self.assertIsNotNone(self.cache.get("doc 0"))
+        self.assertIsNone(self.cache.get("doc 1"))
+        self.assertIsNone(self.cache.get("doc 2"))
+        self.assertIsNotNone(self.cache.get("doc 3"))
+
+    def test_clear(self):
+        self.cache.put("doc", "html")
+        self.cache.clear()
+        self.assertIsNone(self.cache.get("doc"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.check import check_site, site_path
+from src.depgraph import resolve_url
+from src.listings import Listings
+
+
+class TestSitePath(unittest.TestCase):
+    def test_matches_resolve_url(self):
+        for url, page in [
+            ("/blog/tom/", "index.html"),
+            ("/", "blog/index.html"),
+            ("/images/a%20b.png", ""),
+            ("/blog/../contact/?x=1#top", "blog/index.html"),
+            ("../tom/", "blog/glorfindel/index.html"),
+            ("notes.html#part", "blog/index.html"),
+        ]:
+            expected = resolve_url(url, page).replace("%20", " ")
+            self.assertEqual(site_path(url, page), expected, url)
+
+    def test_external_and_fragments(self):
+        self.assertIsNone(site_path("https://example.com/", ""))
+        self.assertIsNone(site_path("//cdn.example.com/x.js", ""))
+        self.assertIsNone(site_path("#top", ""))
+
+
+class TestCheckSite(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.content = root / "content"
+        (self.content / "blog" / "tom").mkdir(parents=True)
+        (self.content / "index.md").write_text(
+            "# Home\n\n"
+            "[Tom](/blog/tom/) and [Gone](/blog/gone/)\n\n"
+            "![Tom](/images/tom.png) ![Missing](/images/missing.png)\n\n"
+            "```\n[Not a link](/nowhere)\n```\n\n"
+            "[Elsewhere](https://example.com/) [Top](#top)\n"
+        )
+        (self.content / "blog" / "tom" / "index.md").write_text(
+            "# Tom\n\n[Back](../../) [Sibling](../jerry/)\n"
+        )
+        self.static = root / "static"
+        (self.static / "images").mkdir(parents=True)
+        (self.static / "images" / "tom.png").write_bytes(b"")
+        self.template = root / "template.html"
+        self.template.write_text('<link href="/index.css"><a href="/">{{ Title }}</a>{{ Content }}')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reports_broken_targets(self):
+        stats, broken, targets = check_site(
+            str(self.content), str(self.static), str(self.template), "/sub/"
+        )
+        self.assertEqual(targets, 3)
+        self.assertEqual((stats.files, stats.images, stats.external), (3, 2, 1))
+        self.assertEqual(
+            [(Path(p["source"]).name, p["line"], p["kind"], p["url"]) for p in broken],
+            [
+                ("template.html", 1, "link", "/index.css"),
+                ("index.md", 3, "link", "../jerry/"),
+                ("index.md", 3, "link", "/blog/gone/"),
+                ("index.md", 5, "image", "/images/missing.png"),
+            ],
+        )
+        self.assertEqual(broken[2]["rendered"], "/sub/blog/gone/")
+
+    def test_fences(self):
+        (self.content / "index.md").write_text(
+            "```x``` [Gone](/gone/)\n\n```\n[Hidden](/hidden/)\n```\n\n```\n\n[Open](/open/)\n"
+        )
+        _, broken, _ = check_site(str(self.content), str(self.static))
+        self.assertEqual(
+            [(p["line"], p["url"]) for p in broken if p["source"] == str(self.content / "index.md")],
+            [(1, "/gone/"), (9, "/open/")],
+        )
+
+    def test_listing_pages_are_targets(self):
+        (self.content / "blog" / "tom" / "index.md").write_text(
+            "---\ndate: 2024-01-02\ntags: Elves\n---\n# Tom\n"
+        )
+        (self.content / "index.md").write_text(
+            "[Blog](/blog/) [Elves](/blog/tags/elves/) [Feed](/blog/feed.xml) [Men](/blog/tags/men/)\n"
+        )
+        _, broken, _ = check_site(str(self.content), str(self.static))
+        self.assertEqual(len(broken), 4)
+        _, broken, targets = check_site(
+            str(self.content), str(self.static), listings=Listings(["blog"])
+        )
+        self.assertEqual(targets, 6)
+        self.assertEqual([p["url"] for p in broken], ["/blog/tags/men/"])
+
+    def test_workers_agree(self):
+        serial = check_site(str(self.content), str(self.static), str(self.template))
+        parallel = check_site(str(self.content), str(self.static), str(self.template), workers=2)
+        self.assertEqual(serial[1], parallel[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import gzip
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.compress import compress_outputs, remove_compressed
+from src.manifest import Manifest
+
+
+class TestCompressOutputs(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = Path(self.tmp.name)
+        (self.dest / "blog").mkdir()
+        self.page = self.dest / "blog" / "index.html"
+        self.page.write_text("<p>repeated words</p>" * 100)
+        (self.dest / "index.css").write_text("body { color: red; }\n" * 50)
+        (self.dest / "tiny.html").write_text("<p>hi</p>")
+        (self.dest / "noise.svg").write_bytes(os.urandom(4096))
+        (self.dest / "photo.png").write_bytes(b"\x89PNG" * 200)
+        self.manifest = Manifest(str(self.dest / ".manifest.json"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_compresses_only_where_it_pays_off(self):
+        stats = compress_outputs(str(self.dest), self.manifest, workers=2)
+        self.assertEqual((stats.compressed, stats.skipped), (2, 2))
+        self.assertEqual(
+            gzip.decompress((self.dest / "blog" / "index.html.gz").read_bytes()),
+            self.page.read_bytes(),
+        )
+        self.assertTrue((self.dest / "index.css.gz").is_file())
+        self.assertFalse((self.dest / "tiny.html.gz").exists())
+        self.assertFalse((self.dest / "noise.svg.gz").exists())
+        self.assertFalse((self.dest / "photo.png.gz").exists())
+
+    def test_unchanged_outputs_are_skipped(self):
+        compress_outputs(str(self.dest), self.manifest)
+        before = (self.dest / "index.css.gz").stat().st_mtime_ns
+        self.page.write_text("<p>other words</p>" * 100)
+
+        stats = compress_outputs(str(self.dest), self.manifest)
+        self.assertEqual((stats.compressed, stats.unchanged), (1, 3))
+        self.assertEqual((self.dest / "index.css.gz").stat().st_mtime_ns, before)
+        self.assertEqual(
+            gzip.decompress((self.dest / "blog" / "index.html.gz").read_bytes()),
+            self.page.read_bytes(),
+        )
+
+    def test_variants_of_removed_outputs_are_removed(self):
+        compress_outputs(str(self.dest), self.manifest)
+        self.page.unlink()
+        (self.dest / "index.css").write_text("x")
+
+        stats = compress_outputs(str(self.dest), self.manifest)
+        self.assertGreaterEqual(stats.removed, 1)
+        self.assertFalse((self.dest / "blog" / "index.html.gz").exists())
+        self.assertFalse((self.dest / "index.css.gz").exists())
+        self.assertNotIn("blog/index.html", self.manifest.compressed)
+
+    def test_uncompressed_builds_remove_recorded_variants(self):
+        compress_outputs(str(self.dest), self.manifest)
+        self.assertEqual(remove_compressed(str(self.dest), self.manifest), 2)
+        self.assertFalse((self.dest / "blog" / "index.html.gz").exists())
+        self.assertFalse((self.dest / "index.css.gz").exists())
+        self.assertTrue(self.page.is_file())
+        self.assertEqual(self.manifest.compressed, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import io
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from src.client import request_build
+from src.daemon import make_daemon
+
+
+class TestBuildDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        (self.root / "content").mkdir()
+        (self.root / "static").mkdir()
+        (self.root / "content" / "index.md").write_text("# Home\n\nHello **there** friend")
+        (self.root / "static" / "index.css").write_text("body {}")
+        (self.root / "template.html").write_text("<title>{{ Title }}</title>{{ Content }}")
+
+        self.socket_path = str(self.root / "site.sock")
+        self.daemon = make_daemon(self.socket_path)
+        self.thread = threading.Thread(target=self.daemon.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.daemon.shutdown()
+        self.thread.join()
+        self.daemon.server_close()
+        self.tmp.cleanup()
+
+    def build(self, argv, cwd=None):
+        out = io.StringIO()
+        status = request_build(self.socket_path, argv, cwd or str(self.root), out)
+        return status, out.getvalue()
+
+    def test_builds_relative_to_client_directory(self):
+        cwd = os.getcwd()
+        status, output = self.build(["/blog/", "-o", "public"])
+        self.assertEqual(status, 0)
+        self.assertEqual(os.getcwd(), cwd)
+        self.assertIn("Generated 1 page(s)", output)
+        self.assertEqual(
+            (self.root / "public" / "index.html").read_text(),
+            "<title>Home</title><div><h1>Home</h1><p>Hello <b>there</b> friend</p></div>",
+        )
+        self.assertTrue((self.root / "public" / "index.css").is_file())
+
+        status, output = self.build(["/blog/", "--incremental", "-o", "public"])
+        self.assertEqual(status, 0)
+        self.assertIn("Generated 0 page(s)", output)
+
+    def test_reports_errors_and_refuses_serve(self):
+        status, output = self.build(["--jobs", "-1"])
+        self.assertEqual(status, 2)
+        self.assertIn("--jobs must be zero or a positive integer", output)
+
+        status, output = self.build(["serve"])
+        self.assertEqual(status, 2)
+
+    def test_second_daemon_on_same_socket_is_refused(self):
+        with self.assertRaises(RuntimeError):
+            make_daemon(self.socket_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
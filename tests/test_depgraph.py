@@ -0,0 +1,72 @@
+import unittest
+
+from src.depgraph import DependencyGraph, page_references, resolve_url
+from src.manifest import Manifest
+
+
+def _entry(source, images=(), links=()):
+    return {
+        "source": source,
+        "source_hash": "x",
+        "template": "template.html",
+        "template_hash": "y",
+        "basepath": "/",
+        "images": list(images),
+        "links": list(links),
+    }
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def setUp(self):
+        manifest = Manifest(
+            "docs/.manifest.json",
+            pages={
+                "index.html": _entry(
+                    "content/index.md",
+                    images=["/images/logo.png"],
+                    links=["/blog/post", "/missing", "https://example.com"],
+                ),
+                "blog/post/index.html": _entry(
+                    "content/blog/post/index.md", links=["/", "../other.html#top"]
+                ),
+            },
+            assets={"images/logo.png": {}, "images/unused.png": {}, "index.css": {}},
+        )
+        self.graph = DependencyGraph(manifest)
+        self.graph.template_references = ["/index.css"]
+
+    def test_page_references(self):
+        self.assertEqual(
+            page_references("![a](/a.png) [b](/b) [c](/b) ![d](/a.png)"),
+            {"images": ["/a.png"], "links": ["/b"]},
+        )
+
+    def test_resolve_url(self):
+        self.assertEqual(resolve_url("/", "blog/post/index.html"), "")
+        self.assertEqual(resolve_url("/blog/post?x#y", "index.html"), "blog/post")
+        self.assertEqual(resolve_url("../other.html", "blog/post/index.html"), "blog/other.html")
+
+    def test_explain(self):
+        explanation = self.graph.explain("/blog/post")
+        self.assertEqual(explanation["page"], "blog/post/index.html")
+        self.assertEqual(explanation["source"], "content/blog/post/index.md")
+        self.assertEqual(explanation["linked_from"], ["index.html"])
+        with self.assertRaises(KeyError):
+            self.graph.explain("nowhere.html")
+
+    def test_dependents(self):
+        self.assertEqual(self.graph.dependents("images/logo.png"), ["index.html"])
+        self.assertEqual(
+            self.graph.dependents("template.html"), ["blog/post/index.html", "index.html"]
+        )
+
+    def test_dead_links_and_unused_assets(self):
+        self.assertEqual(
+            self.graph.dead_links(),
+            [("blog/post/index.html", "../other.html#top"), ("index.html", "/missing")],
+        )
+        self.assertEqual(self.graph.unused_assets(), ["images/unused.png"])
+
+
+if __name__ == "__main__":
+    unittest.main()
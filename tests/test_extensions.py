@@ -0,0 +1,170 @@
+import contextlib
+import io
+import re
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.extensions import load_extensions, loaded_extensions, table_to_html_node
+from src.extensions import reset_extensions as reset_site_extensions
+from src.htmlnode import LeafNode
+from src.main import generate_page, generate_pages_recursive
+from src.markdown import (
+    BLOCK_CLASSIFIERS,
+    BlockExtension,
+    BlockType,
+    InlineExtension,
+    block_to_block_type,
+    markdown_to_html_node,
+    parser_signature,
+    register_block,
+    register_inline_delimiter,
+    register_inline_pattern,
+    reset_extensions,
+)
+
+
+class TestRegistry(unittest.TestCase):
+    def tearDown(self):
+        reset_extensions()
+
+    def test_blocks_dispatch_on_their_first_character(self):
+        before = {char: len(entries) for char, entries in BLOCK_CLASSIFIERS.items()}
+        signature = parser_signature()
+        aside = BlockExtension(
+            "asides",
+            (":::",),
+            lambda block: block.endswith(":::"),
+            lambda block: LeafNode("aside", block[3:-3]),
+        )
+        register_block(aside)
+
+        self.assertEqual(block_to_block_type(":::hi:::"), aside)
+        self.assertEqual(block_to_block_type(":::hi"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type("::hi:::"), BlockType.PARAGRAPH)
+        self.assertEqual(
+            {char: len(entries) for char, entries in BLOCK_CLASSIFIERS.items() if char != ":"},
+            before,
+        )
+        self.assertEqual(markdown_to_html_node(":::hi:::").to_html(), "<div><aside>hi</aside></div>")
+        self.assertNotEqual(parser_signature(), signature)
+
+        reset_extensions()
+        self.assertEqual(block_to_block_type(":::hi:::"), BlockType.PARAGRAPH)
+        self.assertEqual(parser_signature(), signature)
+
+    def test_extensions_take_precedence_over_built_ins(self):
+        register_block(BlockExtension(
+            "todo", ("- [ ] ",), lambda block: True, lambda block: LeafNode("p", "todo")
+        ))
+        self.assertEqual(block_to_block_type("- [ ] task").name, "todo")
+        self.assertEqual(block_to_block_type("- item"), BlockType.UNORDERED_LIST)
+
+    def test_inline_delimiters_and_patterns(self):
+        mark = InlineExtension("mark", lambda node: LeafNode("mark", node.text))
+        mention = InlineExtension("mention", lambda node: LeafNode("span", node.text))
+        register_inline_delimiter("==", mark)
+        register_inline_pattern("@", re.compile(r"@(\w+)"), mention)
+        html = markdown_to_html_node("**bold** ==marked== @tom [link](/x)").to_html()
+        self.assertEqual(
+            html,
+            '<div><p><b></b><b>bold</b> <mark>marked</mark> <span>tom</span> <a href="/x">link</a></p></div>',
+        )
+
+    def test_block_extensions_need_a_prefix(self):
+        with self.assertRaises(ValueError):
+            BlockExtension("broken", ("",), bool, str)
+
+
+class TestBundledExtensions(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.source = root / "page.md"
+        self.template = root / "template.html"
+        self.template.write_text("{{ Content }}")
+        self.dest = root / "page.html"
+
+    def tearDown(self):
+        load_extensions([])
+        self.tmp.cleanup()
+
+    def render(self, markdown):
+        self.source.write_text("# Page\n\n" + markdown)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_page(str(self.source), str(self.template), str(self.dest), "/")
+        return self.dest.read_text()
+
+    def test_table(self):
+        html = table_to_html_node("| a | b |\n|:-:|--:|\n| 1 |").to_html()
+        self.assertEqual(
+            html,
+            '<table><thead><tr><th style="text-align: center">a</th>'
+            '<th style="text-align: right">b</th></tr></thead>'
+            '<tbody><tr><td style="text-align: center">1</td>'
+            '<td style="text-align: right"></td></tr></tbody></table>',
+        )
+
+    def test_bundled_extensions_render_when_loaded(self):
+        markdown = (
+            "| a |\n|---|\n| 1 |\n\n"
+            '!!! tip "Read this"\n    - one\n\n'
+            "Text[^1] and ~~old~~.\n\n"
+            "[^1]: The note."
+        )
+        plain = self.render(markdown)
+        self.assertNotIn("<table>", plain)
+
+        load_extensions(["tables", "admonitions", "footnotes", "strikethrough"])
+        self.assertEqual(loaded_extensions(), ["tables", "admonitions", "footnotes", "strikethrough"])
+        html = self.render(markdown)
+        self.assertIn(
+            "<table><thead><tr><th>a</th></tr></thead><tbody><tr><td>1</td></tr></tbody></table>",
+            html,
+        )
+        self.assertIn(
+            '<div class="admonition tip"><p class="admonition-title">Read this</p>'
+            "<ul><li>one</li></ul></div>",
+            html,
+        )
+        self.assertIn('Text<sup id="fnref-1"><a href="#fn-1">1</a></sup> and <del>old</del>.', html)
+        self.assertIn(
+            '<ol class="footnotes"><li id="fn-1">The note.<a href="#fnref-1">&#8617;</a></li></ol>',
+            html,
+        )
+
+        load_extensions([])
+        self.assertEqual(self.render(markdown), plain)
+
+    def test_incremental_builds_follow_the_extensions(self):
+        content = self.source.parent / "content"
+        content.mkdir()
+        (content / "index.md").write_text("# Home\n\n~~old~~")
+        dest = self.source.parent / "docs"
+
+        def build():
+            with contextlib.redirect_stdout(io.StringIO()):
+                return generate_pages_recursive(str(content), str(self.template), str(dest), "/", True)
+
+        self.assertEqual(build(), 1)
+        self.assertEqual(build(), 0)
+        load_extensions(["strikethrough"])
+        self.assertEqual(build(), 1)
+        self.assertIn("<del>old</del>", (dest / "index.html").read_text())
+        self.assertEqual(build(), 0)
+
+    def test_reset_forgets_loaded_extensions(self):
+        load_extensions(["strikethrough"])
+        reset_site_extensions()
+        self.assertEqual(loaded_extensions(), [])
+        load_extensions(["strikethrough"])
+        self.assertIn("<del>old</del>", self.render("~~old~~"))
+
+    def test_unknown_extension(self):
+        with self.assertRaises(ValueError):
+            load_extensions(["no_such_extension_module"])
+        self.assertEqual(loaded_extensions(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from src.htmlnode import HTMLNode, LeafNode, ParentNode
@@ -71,3 +72,30 @@ class TestParentNode(unittest.TestCase):
             expected_html,
         )
 
+    def test_to_html_deep_nesting(self):
+        node = LeafNode("b", "core")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertEqual(html.count("</span>"), 5000)
+
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode(None, "text "), LeafNode("b", "bold")]),
+                LeafNode("a", "link", {"href": "/x"}),
+            ],
+            {"class": "body"},
+        )
+        expected = '<div class="body"><p>text <b>bold</b></p><a href="/x">link</a></div>'
+        self.assertEqual("".join(node.iter_html()), expected)
+
+        buffer = io.StringIO()
+        node.write_html(buffer)
+        self.assertEqual(buffer.getvalue(), expected)
+
+    def test_to_html_without_children(self):
+        with self.assertRaises(ValueError):
+            ParentNode("div", []).to_html()
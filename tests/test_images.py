@@ -0,0 +1,146 @@
+import struct
+import tempfile
+import unittest
+import zlib
+from pathlib import Path
+
+from src.images import Image, ImagePipeline, derivative_name, image_size, remove_image_variants
+from src.manifest import Manifest
+from src.markdown import image_attributes_digest, markdown_to_html_node, set_image_attributes
+from src.template import rebase_links
+
+
+def png_bytes(width, height):
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    rows = b"".join(b"\x00" + b"\x80\x40\x20" * width for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+class TestImageSize(unittest.TestCase):
+    def test_reads_png_and_gif_headers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            png = Path(tmp) / "a.png"
+            png.write_bytes(png_bytes(640, 320))
+            gif = Path(tmp) / "b.gif"
+            gif.write_bytes(b"GIF89a" + struct.pack("<HH", 12, 34) + b"\x00" * 8)
+            self.assertEqual(image_size(str(png)), (640, 320))
+            self.assertEqual(image_size(str(gif)), (12, 34))
+
+    def test_derivative_name(self):
+        self.assertEqual(derivative_name("/images/tom.png", 480), "/images/tom-480w.png")
+        self.assertEqual(derivative_name("a.b.jpg", 960), "a.b-960w.jpg")
+
+
+class TestImageAttributes(unittest.TestCase):
+    def tearDown(self):
+        set_image_attributes({})
+
+    def test_attributes_are_emitted_on_matching_images(self):
+        set_image_attributes({"/a.png": {"width": "10", "height": "5", "loading": "lazy"}})
+        html = markdown_to_html_node("![A](/a.png) and ![B](/b.png)").to_html()
+        self.assertIn('<img src="/a.png" alt="A" width="10" height="5" loading="lazy">', html)
+        self.assertIn('<img src="/b.png" alt="B">', html)
+
+        set_image_attributes({})
+        html = markdown_to_html_node("![A](/a.png)").to_html()
+        self.assertIn('<img src="/a.png" alt="A">', html)
+
+    def test_digest_only_covers_images_with_attributes(self):
+        self.assertIsNone(image_attributes_digest(["/a.png"]))
+        set_image_attributes({"/a.png": {"width": "10"}})
+        digest = image_attributes_digest(["/a.png", "/b.png"])
+        self.assertIsNotNone(digest)
+        set_image_attributes({"/a.png": {"width": "20"}})
+        self.assertNotEqual(image_attributes_digest(["/a.png"]), digest)
+
+    def test_srcset_is_rebased(self):
+        html = '<img src="/a.png" srcset="/a-480w.png 480w, /a.png 960w">'
+        self.assertEqual(
+            rebase_links(html, "/sub/"),
+            '<img src="/sub/a.png" srcset="/sub/a-480w.png 480w, /sub/a.png 960w">',
+        )
+
+
+class TestImagePipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.static = root / "static"
+        (self.static / "images").mkdir(parents=True)
+        self.source = self.static / "images" / "wide.png"
+        self.source.write_bytes(png_bytes(1000, 500))
+        self.dest = root / "public"
+        self.dest.mkdir()
+        self.cache = root / "cache"
+        self.manifest = Manifest(str(self.dest / ".manifest.json"))
+        self.pipeline = ImagePipeline(str(self.static), str(self.cache), (300, 600, 1200))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_size_and_lazy_loading(self):
+        stats = self.pipeline.prepare(
+            {"/images/wide.png", "/images/missing.png", "https://example.com/x.png"},
+            str(self.dest),
+            self.manifest,
+        )
+        self.assertEqual(stats.images, 1)
+        props = self.pipeline.attributes["/images/wide.png"]
+        self.assertEqual((props["width"], props["height"], props["loading"]), ("1000", "500", "lazy"))
+        self.assertEqual(list(self.pipeline.attributes), ["/images/wide.png"])
+
+    @unittest.skipIf(Image is None, "Pillow is not installed")
+    def test_variants_are_encoded_once(self):
+        stats = self.pipeline.prepare({"/images/wide.png"}, str(self.dest), self.manifest)
+        self.assertEqual(stats.encoded, 2)
+        self.assertEqual(
+            self.pipeline.attributes["/images/wide.png"]["srcset"],
+            "/images/wide-300w.png 300w, /images/wide-600w.png 600w, /images/wide.png 1000w",
+        )
+        variant = self.dest / "images" / "wide-600w.png"
+        self.assertEqual(image_size(str(variant)), (600, 300))
+
+        # A fresh output directory and manifest still reuse the cached variants.
+        variant.unlink()
+        stats = self.pipeline.prepare(
+            {"/images/wide.png"}, str(self.dest), Manifest(str(self.dest / ".manifest.json"))
+        )
+        self.assertEqual((stats.encoded, stats.cached), (0, 2))
+        self.assertTrue(variant.is_file())
+
+    @unittest.skipIf(Image is None, "Pillow is not installed")
+    def test_stale_variants_are_removed(self):
+        self.pipeline.prepare({"/images/wide.png"}, str(self.dest), self.manifest)
+        stats = self.pipeline.prepare(set(), str(self.dest), self.manifest)
+        self.assertEqual(stats.removed, 2)
+        self.assertFalse((self.dest / "images" / "wide-300w.png").exists())
+        self.assertEqual(self.manifest.image_variants, {})
+
+    @unittest.skipIf(Image is None, "Pillow is not installed")
+    def test_variants_from_another_source_are_replaced(self):
+        self.pipeline.prepare({"/images/wide.png"}, str(self.dest), self.manifest)
+        variant = self.dest / "images" / "wide-300w.png"
+        expected = variant.read_bytes()
+        variant.write_bytes(b"x" * len(expected))
+        self.manifest.image_variants["/images/wide.png"]["source_hash"] = "older"
+
+        self.pipeline.prepare({"/images/wide.png"}, str(self.dest), self.manifest)
+        self.assertEqual(variant.read_bytes(), expected)
+
+    @unittest.skipIf(Image is None, "Pillow is not installed")
+    def test_builds_without_images_remove_variants(self):
+        self.pipeline.prepare({"/images/wide.png"}, str(self.dest), self.manifest)
+        self.assertEqual(remove_image_variants(self.manifest, str(self.dest)), 2)
+        self.assertFalse((self.dest / "images" / "wide-300w.png").exists())
+        self.assertEqual(self.manifest.image_variants, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
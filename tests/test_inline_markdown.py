@@ -7,8 +7,11 @@ from src.textnode import (
     )
 from src.markdown import (
     markdown_to_blocks, BlockType, 
-    block_to_block_type, markdown_to_html_node
+    block_to_block_type, markdown_to_html_node,
+    iter_blocks, iter_markdown_html,
+    inline_cache_info, set_inline_cache_size, INLINE_CACHE_SIZE
     )
+from src.profiling import count_nodes
 
 
 class TestInlineMarkdown(unittest.TestCase):
@@ -175,6 +178,42 @@ This is the same paragraph on a new line
             ],
         )
 
+    def test_fenced_code_keeps_blank_lines(self):
+        md = "# Title\n\n```\nfirst\n\nsecond\n```\n\n\n\nafter"
+        self.assertEqual(
+            markdown_to_blocks(md),
+            ["# Title", "```\nfirst\n\nsecond\n```", "after"],
+        )
+
+    def test_inline_code_line_does_not_open_a_fence(self):
+        md = "Para one\n\n```inline code``` in text\n\n# Heading\n\n- item"
+        self.assertEqual(
+            markdown_to_blocks(md),
+            ["Para one", "```inline code``` in text", "# Heading", "- item"],
+        )
+
+    def test_unclosed_fence_splits_on_blank_lines(self):
+        md = "Intro\n\n```\ncode\n\n# Heading\n\n- item"
+        self.assertEqual(
+            markdown_to_blocks(md),
+            ["Intro", "```\ncode", "# Heading", "- item"],
+        )
+        self.assertEqual(list(iter_blocks(md.split("\n"))), markdown_to_blocks(md))
+
+    def test_iter_blocks_reads_lines(self):
+        lines = ["# Title\n", "\n", "- a\n", "- b\n", "\n", "\n", "text"]
+        self.assertEqual(list(iter_blocks(lines)), ["# Title", "- a\n- b", "text"])
+
+    def test_iter_markdown_html_matches_tree(self):
+        md = (
+            "# Title\n\nSome **bold** text\n\n> quote\n\n"
+            "1. one\n2. two\n\n```\ncode\n\nmore\n```\n"
+        )
+        self.assertEqual(
+            "".join(iter_markdown_html(md.splitlines(keepends=True))),
+            markdown_to_html_node(md).to_html(),
+        )
+
     def test_block_to_block_type(self):
         block =  "# Heading"
         self.assertEqual(block_to_block_type(block), BlockType.HEADING)
@@ -189,6 +228,27 @@ This is the same paragraph on a new line
         block = "1. ordered list item\n2. another list item"
         self.assertEqual(block_to_block_type(block), BlockType.ORDERED_LIST)    
 
+    def test_block_to_block_type_edge_cases(self):
+        cases = {
+            "###### six": BlockType.HEADING,
+            "####### seven": BlockType.PARAGRAPH,
+            "#no space": BlockType.PARAGRAPH,
+            "```\n```": BlockType.CODE,
+            "```py\ncode": BlockType.PARAGRAPH,
+            "```one line```": BlockType.PARAGRAPH,
+            ">\n> quote": BlockType.QUOTE,
+            "> quote\nplain": BlockType.PARAGRAPH,
+            "- item\n-no space": BlockType.PARAGRAPH,
+            "1. one\n3. three": BlockType.PARAGRAPH,
+            "2. two": BlockType.PARAGRAPH,
+            "1. one\n02. two": BlockType.PARAGRAPH,
+            "\n".join(f"{i}. item" for i in range(1, 1500)): BlockType.ORDERED_LIST,
+            "": BlockType.PARAGRAPH,
+        }
+        for block, expected in cases.items():
+            with self.subTest(block=block[:20]):
+                self.assertEqual(block_to_block_type(block), expected)
+
     def test_paragraphs(self):
         md = """
 This is **bolded** paragraph
@@ -219,4 +279,122 @@ the **same** even with inline stuff
         self.assertEqual(
             html,
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
-        )
\ No newline at end of file
+        )
+
+def _legacy_text_to_textnodes(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_link(nodes)
+    nodes = split_nodes_image(nodes)
+    return nodes
+
+
+def _outcome(function, text):
+    try:
+        return function(text)
+    except ValueError:
+        return ValueError
+
+
+class TestInlineLexer(unittest.TestCase):
+    samples = [
+        "",
+        "plain text",
+        "**bold** at the start",
+        "ends with **bold**",
+        "**",
+        "****",
+        "a ** b ** c",
+        "***triple*** stars",
+        "mixed **bold _not italic_** and _italic `not code`_ and `code **x**`",
+        "__ empty italic and `` empty code",
+        "snake_case_names are_split",
+        "![img](/a.png) then [link](/b) then ![img2](/c.png)",
+        "[first](/1)[second](/2)![third](/3.png)",
+        "[x] ![c](d) odd brackets",
+        "link with **[bold text](/x)** inside",
+        "_[italic link](/y)_ and `[code link](/z)`",
+        "trailing text after [link](https://example.com) done",
+        "![](/empty-alt.png) and [](/empty-text)",
+        "nested [outer [inner](/in)](/out)",
+        "Disney _didn't ruin it_ (okay, but Amazon might have)",
+    ]
+
+    def test_matches_legacy_pipeline(self):
+        for text in self.samples:
+            with self.subTest(text=text):
+                self.assertEqual(
+                    _outcome(text_to_textnodes, text),
+                    _outcome(_legacy_text_to_textnodes, text),
+                )
+
+    def test_matches_legacy_on_generated_text(self):
+        pieces = ["word ", "**b**", "_i_", "`c`", "[l](/u)", "![i](/p.png)", " ", "x"]
+        for seed in range(300):
+            parts = []
+            value = seed
+            for _ in range(8):
+                parts.append(pieces[value % len(pieces)])
+                value = value * 7 + 3
+            text = "".join(parts)
+            with self.subTest(text=text):
+                self.assertEqual(text_to_textnodes(text), _legacy_text_to_textnodes(text))
+
+    def test_unmatched_delimiter(self):
+        for text in ["**open bold", "_open italic", "`open code", "**a** _b"]:
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    _legacy_text_to_textnodes(text)
+                with self.assertRaises(ValueError):
+                    text_to_textnodes(text)
+
+
+class TestInlineCache(unittest.TestCase):
+    def tearDown(self):
+        set_inline_cache_size(INLINE_CACHE_SIZE)
+
+    def test_repeated_fragments_hit_the_cache(self):
+        set_inline_cache_size(0)
+        set_inline_cache_size(16)
+        md = "- **Home** and [docs](/docs)\n- `code` item\n\n# **Home** and [docs](/docs)"
+        first = markdown_to_html_node(md).to_html()
+        second = markdown_to_html_node(md).to_html()
+        info = inline_cache_info()
+        self.assertEqual(first, second)
+        self.assertEqual((info.hits, info.misses), (4, 2))
+
+    def test_cached_output_matches_uncached(self):
+        md = (
+            "## Heading with _italic_\n\n"
+            "Short **bold** text\n\n"
+            + "A long paragraph with `code` and ![img](/a.png). " * 10
+            + "\n\n1. one\n2. **two**"
+        )
+        set_inline_cache_size(0)
+        uncached = markdown_to_html_node(md).to_html()
+        set_inline_cache_size(16)
+        self.assertEqual(markdown_to_html_node(md).to_html(), uncached)
+        self.assertEqual(markdown_to_html_node(md).to_html(), uncached)
+
+    def test_disabled_cache_is_bypassed(self):
+        md = "Short **bold** and [link](/x) text\n\n- `code` item"
+        set_inline_cache_size(0)
+        node = markdown_to_html_node(md)
+        info = inline_cache_info()
+        self.assertEqual((info.hits, info.misses), (0, 0))
+        self.assertEqual(
+            [child.tag for child in node.children[0].children], [None, "b", None, "a", None]
+        )
+        uncached = count_nodes(node)
+
+        set_inline_cache_size(16)
+        self.assertEqual(count_nodes(markdown_to_html_node(md)), uncached)
+        self.assertEqual(count_nodes(markdown_to_html_node(md)), uncached)
+
+    def test_errors_are_not_cached(self):
+        set_inline_cache_size(16)
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                markdown_to_html_node("**open bold")
@@ -0,0 +1,158 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.frontmatter import page_metadata, split_front_matter, split_front_matter_lines
+from src.listings import Listings
+from src.main import generate_pages_recursive
+from src.manifest import Manifest
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_split_front_matter(self):
+        markdown = "---\ntitle: \"Hi: there\"\ndate: 2024-03-01\ntags: [Elves, 'Old Lore']\n---\n# Body"
+        front_matter, body = split_front_matter(markdown)
+        self.assertEqual(
+            front_matter, {"title": "Hi: there", "date": "2024-03-01", "tags": ["Elves", "Old Lore"]}
+        )
+        self.assertEqual(body, "# Body")
+        self.assertEqual(split_front_matter("# No front matter"), ({}, "# No front matter"))
+
+    def test_split_front_matter_lines(self):
+        front_matter, lines = split_front_matter_lines(iter(["---\n", "tags: a, b\n", "---\n", "# T\n"]))
+        self.assertEqual(front_matter, {"tags": ["a", "b"]})
+        self.assertEqual(list(lines), ["# T\n"])
+
+    def test_invalid_front_matter(self):
+        with self.assertRaises(ValueError):
+            split_front_matter("---\ntitle: x\n# never closed")
+        with self.assertRaises(ValueError):
+            split_front_matter("---\nnot a pair\n---\n")
+        with self.assertRaises(ValueError):
+            page_metadata({"date": "yesterday"}, "T")
+
+    def test_summary_defaults_to_first_prose_paragraph(self):
+        markdown = "# Title\n\n[< Back](/)\n\n![img](/a.png)\n\nThe **real** start.\n\nMore."
+        self.assertEqual(page_metadata({}, "Title", markdown)["summary"], "The **real** start.")
+        self.assertEqual(page_metadata({"summary": "Given"}, "Title", markdown)["summary"], "Given")
+        self.assertNotIn("summary", page_metadata({}, "Title"))
+
+
+class TestListings(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        self.template = self.root / "template.html"
+        self.dest = self.root / "docs"
+        self.blog = self.content / "blog"
+        self.blog.mkdir(parents=True)
+        self.template.write_text("<title>{{ Title }}</title>{{ Content }}")
+        for day in range(1, 6):
+            self.write_post(f"post{day}", f"Post {day}", f"2024-01-0{day}", "elves" if day % 2 else "men")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_post(self, name, title, date, tags, body="Some text."):
+        (self.blog / f"{name}.md").write_text(
+            f"---\ntitle: {title}\ndate: {date}\ntags: {tags}\n---\n\n{body}\n"
+        )
+
+    def build(self):
+        return generate_pages_recursive(
+            str(self.content), str(self.template), str(self.dest), "/site/",
+            incremental=True, listings=Listings(["blog"], page_size=2, site_url="https://example.org"),
+        )
+
+    def mtimes(self):
+        return {
+            path.relative_to(self.dest).as_posix(): path.stat().st_mtime_ns
+            for path in self.dest.rglob("*")
+            if path.is_file() and "post" not in path.name and path.suffix in (".html", ".xml")
+        }
+
+    def test_listing_pages_tags_and_feed(self):
+        self.build()
+        first = (self.dest / "blog" / "index.html").read_text()
+        self.assertIn('<a href="/site/blog/post5.html">Post 5</a>', first)
+        self.assertIn('<a href="/site/blog/post4.html">Post 4</a>', first)
+        self.assertNotIn("Post 3", first)
+        self.assertIn('href="/site/blog/page/2/" rel="next"', first)
+        third = (self.dest / "blog" / "page" / "3" / "index.html").read_text()
+        self.assertIn("Post 1", third)
+        self.assertNotIn("rel=\"next\"", third)
+        elves = (self.dest / "blog" / "tags" / "elves" / "index.html").read_text()
+        self.assertIn("Posts tagged elves", elves)
+        feed = (self.dest / "blog" / "feed.xml").read_text()
+        self.assertIn("<updated>2024-01-05T00:00:00Z</updated>", feed)
+        self.assertIn('<link href="https://example.org/site/blog/post1.html"/>', feed)
+
+    def test_summaries_are_only_read_for_listed_pages(self):
+        (self.content / "about.md").write_text("# About\n\nNot a post.")
+        self.build()
+        pages = Manifest.load(str(self.dest)).pages
+        self.assertNotIn("summary", pages["about.html"]["meta"])
+        self.assertEqual(pages["blog/post1.html"]["meta"]["summary"], "Some text.")
+        self.assertIn("<p>Some text.</p>", (self.dest / "blog" / "page" / "3" / "index.html").read_text())
+
+        generate_pages_recursive(
+            str(self.content), str(self.template), str(self.dest), "/site/", incremental=True
+        )
+        self.write_post("post1", "Post 1", "2024-01-01", "elves", body="Changed text.")
+        generate_pages_recursive(
+            str(self.content), str(self.template), str(self.dest), "/site/", incremental=True
+        )
+        self.assertNotIn("summary", Manifest.load(str(self.dest)).pages["blog/post1.html"]["meta"])
+        self.build()
+        self.assertIn("<p>Changed text.</p>", (self.dest / "blog" / "page" / "3" / "index.html").read_text())
+
+    def test_nested_sections(self):
+        posts = self.content / "docs" / "posts"
+        posts.mkdir(parents=True)
+        (posts / "first.md").write_text("---\ndate: 2024-02-01\ntags: X Y\n---\n# First\n")
+        generate_pages_recursive(
+            str(self.content), str(self.template), str(self.dest), "/",
+            listings=Listings(["/docs/posts/"], site_url="https://ex.com"),
+        )
+        index = (self.dest / "docs" / "posts" / "index.html").read_text()
+        self.assertIn('<a href="/docs/posts/tags/x-y/">X Y</a>', index)
+        self.assertTrue((self.dest / "docs" / "posts" / "tags" / "x-y" / "index.html").is_file())
+        feed = (self.dest / "docs" / "posts" / "feed.xml").read_text()
+        self.assertIn('<link href="https://ex.com/docs/posts/"/>', feed)
+        self.assertIn('<link rel="self" href="https://ex.com/docs/posts/feed.xml"/>', feed)
+
+    def test_only_affected_listings_are_regenerated(self):
+        self.build()
+        before = self.mtimes()
+
+        self.write_post("post1", "Post 1", "2024-01-01", "elves", body="Some text.\n\nA new later paragraph.")
+        self.assertEqual(self.build(), 1)
+        self.assertEqual(self.mtimes(), before)
+
+        self.write_post("post1", "Post 1 renamed", "2024-01-01", "elves")
+        self.build()
+        after = self.mtimes()
+        changed = {page for page in after if after[page] != before.get(page)}
+        self.assertEqual(
+            changed,
+            {"blog/page/3/index.html", "blog/tags/elves/page/2/index.html", "blog/feed.xml"},
+        )
+
+    def test_removed_tags_and_pages_disappear(self):
+        self.build()
+        self.write_post("post2", "Post 2", "2024-01-02", "elves")
+        self.write_post("post4", "Post 4", "2024-01-04", "elves")
+        self.build()
+        self.assertFalse((self.dest / "blog" / "tags" / "men").exists())
+
+        generate_pages_recursive(
+            str(self.content), str(self.template), str(self.dest), "/site/", incremental=True
+        )
+        self.assertFalse((self.dest / "blog" / "index.html").exists())
+        self.assertFalse((self.dest / "blog" / "feed.xml").exists())
+        self.assertTrue((self.dest / "blog" / "post1.html").is_file())
+
+
+if __name__ == "__main__":
+    unittest.main()
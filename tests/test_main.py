@@ -0,0 +1,190 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from collections import Counter
+from pathlib import Path
+from unittest import mock
+
+import src.main
+from src.main import generate_page, generate_pages_recursive, main
+from src.manifest import Manifest
+from src.profiling import BuildProfile
+
+
+TEMPLATE = "<html><title>{{ Title }}</title><body>{{ Content }}</body></html>"
+
+
+class TestIncrementalBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.content = root / "content"
+        self.dest = root / "docs"
+        self.template = root / "template.html"
+
+        (self.content / "blog").mkdir(parents=True)
+        (self.content / "index.md").write_text("# Home\n\nWelcome")
+        (self.content / "blog" / "post.md").write_text("# Post\n\nHello")
+        self.template.write_text(TEMPLATE)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, basepath="/"):
+        return generate_pages_recursive(
+            str(self.content), str(self.template), str(self.dest), basepath, True
+        )
+
+    def test_unchanged_pages_are_skipped(self):
+        self.assertEqual(self.build(), 2)
+        self.assertEqual(self.build(), 0)
+
+    def test_changed_inputs_are_rebuilt(self):
+        self.build()
+        (self.content / "index.md").write_text("# Home\n\nChanged again")
+        self.assertEqual(self.build(), 1)
+        self.assertEqual(self.build("/site/"), 2)
+        self.template.write_text(TEMPLATE + "\n")
+        self.assertEqual(self.build("/site/"), 2)
+
+    def test_source_saved_during_the_build_is_rebuilt_next_time(self):
+        source = self.content / "index.md"
+
+        def save_while_rendering(*args, **kwargs):
+            references = generate_page(*args, **kwargs)
+            if args[0] == str(source):
+                source.write_text("# Home\n\nSaved mid-build")
+            return references
+
+        with mock.patch.object(src.main, "generate_page", save_while_rendering):
+            self.assertEqual(self.build(), 2)
+        self.assertEqual(self.build(), 1)
+        self.assertIn("Saved mid-build", (self.dest / "index.html").read_text())
+
+    def test_removed_sources_are_pruned(self):
+        self.build()
+        os.remove(self.content / "blog" / "post.md")
+        self.build()
+        self.assertFalse((self.dest / "blog").exists())
+        self.assertTrue((self.dest / "index.html").is_file())
+
+    def test_full_build_records_assets(self):
+        static = Path(self.tmp.name) / "static"
+        (static / "images").mkdir(parents=True)
+        (static / "images" / "a.png").write_bytes(b"png")
+        (self.dest / "old.html").parent.mkdir(parents=True)
+        (self.dest / "old.html").write_text("left over")
+        with contextlib.redirect_stdout(io.StringIO()):
+            main([
+                "--content", str(self.content),
+                "--static", str(static),
+                "--template", str(self.template),
+                "-o", str(self.dest),
+            ])
+        self.assertFalse((self.dest / "old.html").exists())
+        self.assertTrue((self.dest / "images" / "a.png").is_file())
+        self.assertEqual(list(Manifest.load(str(self.dest)).assets), ["images/a.png"])
+
+
+class TestParallelBuild(unittest.TestCase):
+    def test_parallel_output_matches_serial(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            content = root / "content"
+            template = root / "template.html"
+            content.mkdir()
+            template.write_text(TEMPLATE)
+            for i in range(6):
+                (content / f"page{i}.md").write_text(
+                    f"# Page {i}\n\nSee [home](/index.html) and **{i}**"
+                )
+            (content / "broken.md").write_text("no title here")
+
+            serial_stats = Counter()
+            parallel_stats = Counter()
+            serial = generate_pages_recursive(
+                str(content), str(template), str(root / "serial"), "/x/", workers=1,
+                inline_stats=serial_stats,
+            )
+            parallel = generate_pages_recursive(
+                str(content), str(template), str(root / "parallel"), "/x/", workers=3,
+                inline_stats=parallel_stats,
+            )
+            async_io = generate_pages_recursive(
+                str(content),
+                str(template),
+                str(root / "async"),
+                "/x/",
+                io_workers=2,
+                prefetch=2,
+            )
+
+            self.assertEqual((serial, parallel, async_io), (6, 6, 6))
+            self.assertEqual(serial_stats.total(), 12)
+            self.assertEqual(parallel_stats.total(), 12)
+            for i in range(6):
+                name = f"page{i}.html"
+                expected = (root / "serial" / name).read_bytes()
+                self.assertEqual((root / "parallel" / name).read_bytes(), expected)
+                self.assertEqual((root / "async" / name).read_bytes(), expected)
+
+
+class TestProfiledBuild(unittest.TestCase):
+    def test_profile_collects_stages_and_blocks(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            content = root / "content"
+            template = root / "template.html"
+            content.mkdir()
+            template.write_text(TEMPLATE)
+            (content / "a.md").write_text("# A\n\n- one\n- two\n\ntext")
+            (content / "b.md").write_text("# B\n\n> quote")
+
+            profile = BuildProfile()
+            generate_pages_recursive(
+                str(content), str(template), str(root / "docs"), "/", profile=profile
+            )
+
+            report = profile.report(1)
+            self.assertEqual(report["pages"], 2)
+            self.assertEqual(
+                report["blocks"],
+                {"heading": 2, "unordered_list": 1, "paragraph": 1, "quote": 1},
+            )
+            self.assertEqual(len(report["slowest"]), 1)
+            self.assertGreater(report["nodes"], 0)
+            self.assertEqual(
+                (root / "docs" / "b.html").read_text(),
+                "<html><title>B</title><body><div><h1>B</h1>"
+                "<blockquote>quote</blockquote></div></body></html>",
+            )
+
+
+class TestStreamingPage(unittest.TestCase):
+    def test_streamed_page_matches_in_memory_page(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            source = root / "big.md"
+            template = root / "template.html"
+            source.write_text(
+                "# Big\n\n" + "\n\n".join(f"Para [{i}](/p{i}) _x_" for i in range(50))
+            )
+            template.write_text(TEMPLATE)
+
+            generate_page(str(source), str(template), str(root / "memory.html"), "/b/")
+            threshold = src.main.STREAM_THRESHOLD
+            src.main.STREAM_THRESHOLD = 0
+            try:
+                generate_page(str(source), str(template), str(root / "stream.html"), "/b/")
+            finally:
+                src.main.STREAM_THRESHOLD = threshold
+
+            self.assertEqual(
+                (root / "memory.html").read_text(), (root / "stream.html").read_text()
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.main import generate_pages_recursive
+from src.search import (
+    PageText, SearchIndex, decode_shard, decode_varint, encode_shard, encode_varint, tokenize
+)
+
+
+class TestEncoding(unittest.TestCase):
+    def test_varint_round_trip(self):
+        out = bytearray()
+        values = [0, 1, 127, 128, 300, 16384, 2**40]
+        for value in values:
+            encode_varint(value, out)
+        self.assertEqual(out[:4], bytes([0, 1, 127, 0x80]))
+        position = 0
+        for value in values:
+            decoded, position = decode_varint(out, position)
+            self.assertEqual(decoded, value)
+        self.assertEqual(position, len(out))
+
+    def test_shard_round_trip(self):
+        postings = {"tolkien": {0: 3, 7: 1, 300: 2}, "to": {5: 1}}
+        self.assertEqual(decode_shard(encode_shard(postings)), postings)
+
+    def test_tokenize_skips_markup(self):
+        self.assertEqual(
+            tokenize('<p>Hello <a href="/x">World</a>, 3rd<img src="a.png" alt="alt"></p>'),
+            ["hello", "world", "3rd"],
+        )
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        self.template = self.root / "template.html"
+        self.dest = self.root / "docs"
+        (self.content / "blog").mkdir(parents=True)
+        self.template.write_text("<title>{{ Title }}</title>{{ Content }}")
+        (self.content / "index.md").write_text("# Home\n\nWelcome to the **elves** site")
+        (self.content / "blog" / "index.md").write_text("# Blog\n\nElves and elves and dwarves")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, incremental=True, workers=1):
+        search = SearchIndex.load(str(self.dest))
+        generated = generate_pages_recursive(
+            str(self.content), str(self.template), str(self.dest), "/x/",
+            incremental=incremental, workers=workers, search=search,
+        )
+        return generated, SearchIndex.load(str(self.dest))
+
+    def urls(self, index, term):
+        return {index.docs[doc_id][1]: count for doc_id, count in index.lookup(term).items()}
+
+    def test_index_collects_terms_and_titles(self):
+        generated, index = self.build(workers=2)
+        self.assertEqual(generated, 2)
+        self.assertEqual(self.urls(index, "elves"), {"/x/": 1, "/x/blog/": 2})
+        self.assertEqual(self.urls(index, "dwarves"), {"/x/blog/": 1})
+        self.assertEqual(self.urls(index, "hobbits"), {})
+        titles = sorted(doc[2] for doc in index.docs)
+        self.assertEqual(titles, ["Blog", "Home"])
+
+    def test_incremental_update_touches_only_changed_shards(self):
+        self.build()
+        dwarves = self.dest / "search" / "dw.bin"
+        elves = self.dest / "search" / "el.bin"
+        welcome = (self.dest / "search" / "we.bin").stat().st_mtime_ns
+        (self.content / "blog" / "index.md").write_text("# Blog\n\nElves and hobbits")
+
+        generated, index = self.build()
+        self.assertEqual(generated, 1)
+        self.assertFalse(dwarves.exists())
+        self.assertTrue(elves.exists())
+        self.assertEqual((self.dest / "search" / "we.bin").stat().st_mtime_ns, welcome)
+        self.assertEqual(self.urls(index, "elves"), {"/x/": 1, "/x/blog/": 1})
+        self.assertEqual(self.urls(index, "hobbits"), {"/x/blog/": 1})
+
+    def test_removed_pages_leave_the_index_and_free_their_id(self):
+        self.build()
+        (self.content / "index.md").unlink()
+        _, index = self.build()
+        self.assertEqual(self.urls(index, "elves"), {"/x/blog/": 2})
+        self.assertEqual(self.urls(index, "welcome"), {})
+
+        (self.content / "about.md").write_text("# About\n\nElves")
+        _, index = self.build()
+        self.assertEqual(len(index.docs), 2)
+        self.assertEqual(self.urls(index, "elves"), {"/x/blog/": 2, "/x/about.html": 1})
+
+    def test_pages_built_without_an_index_are_indexed_later(self):
+        generate_pages_recursive(str(self.content), str(self.template), str(self.dest), "/x/")
+        generated, index = self.build()
+        self.assertEqual(generated, 2)
+        self.assertEqual(self.urls(index, "dwarves"), {"/x/blog/": 1})
+
+    def test_page_text_collects_streamed_fragments(self):
+        text = PageText()
+        self.assertEqual(list(text.collect(["<p>", "One <b>two</b>", "</p>"])), ["<p>", "One <b>two</b>", "</p>"])
+        self.assertEqual(text.terms, {"one": 1, "two": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
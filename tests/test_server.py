@@ -0,0 +1,66 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from src.server import DevSite
+
+
+class TestDevSite(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.content = root / "content"
+        self.static = root / "static"
+        self.template = root / "template.html"
+        self.dest = root / "docs"
+
+        self.content.mkdir()
+        self.static.mkdir()
+        (self.content / "index.md").write_text("# Home\n\nWelcome")
+        (self.content / "about.md").write_text("# About\n\nUs")
+        (self.static / "index.css").write_text("body {}")
+        self.template.write_text("<title>{{ Title }}</title>{{ Content }}")
+
+        self.site = DevSite(
+            str(self.content), str(self.static), str(self.template), str(self.dest)
+        )
+        self.site.build_all()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def touch_later(self, path: Path, text: str):
+        path.write_text(text)
+        future = time.time() + 5
+        os.utime(path, (future, future))
+
+    def test_content_change_rebuilds_only_that_page(self):
+        before = (self.dest / "about.html").stat().st_mtime_ns
+        self.touch_later(self.content / "index.md", "# Home\n\nChanged")
+
+        changed, removed = self.site.poll()
+        self.assertEqual(changed, {self.content / "index.md"})
+        self.site.rebuild(changed, removed)
+
+        self.assertIn("Changed", (self.dest / "index.html").read_text())
+        self.assertEqual((self.dest / "about.html").stat().st_mtime_ns, before)
+
+    def test_template_change_rebuilds_every_page(self):
+        self.touch_later(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.site.rebuild(*self.site.poll())
+        self.assertTrue((self.dest / "about.html").read_text().startswith("<h1>About</h1>"))
+        self.assertTrue((self.dest / "index.html").read_text().startswith("<h1>Home</h1>"))
+
+    def test_removals(self):
+        os.remove(self.content / "about.md")
+        os.remove(self.static / "index.css")
+        self.site.rebuild(*self.site.poll())
+        self.assertFalse((self.dest / "about.html").exists())
+        self.assertFalse((self.dest / "index.css").exists())
+        self.assertNotIn("about.html", self.site.manifest.pages)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.compress import compress_outputs
+from src.listings import Listings
+from src.main import generate_pages_recursive
+from src.manifest import Manifest
+from src.shards import merge_shards, parse_shard, shard_of
+
+
+class TestSharding(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for text in ["0/4", "5/4", "1/0", "x/2", "3"]:
+            with self.subTest(text=text):
+                with self.assertRaises(Exception):
+                    parse_shard(text)
+
+    def test_shard_of_is_stable_and_spread(self):
+        paths = [f"blog/post{i}/index.md" for i in range(400)]
+        shards = [shard_of(path, 4) for path in paths]
+        self.assertEqual(shards, [shard_of(path, 4) for path in paths])
+        self.assertTrue(all(1 <= shard <= 4 for shard in shards))
+        for shard in range(1, 5):
+            self.assertGreater(shards.count(shard), 50)
+
+
+class TestMergeShards(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        self.static = self.root / "static"
+        self.template = self.root / "template.html"
+        self.content.mkdir()
+        self.static.mkdir()
+        (self.static / "index.css").write_text("body {}")
+        self.template.write_text("<title>{{ Title }}</title>{{ Content }}")
+        for i in range(12):
+            (self.content / f"page{i}.md").write_text(f"# Page {i}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build_shard(self, index, count, basepath="/"):
+        shard_dir = self.root / f"shard{index}"
+        generate_pages_recursive(
+            str(self.content), str(self.template), str(shard_dir), basepath, shard=(index, count)
+        )
+        return str(shard_dir)
+
+    def test_merge_combines_all_pages(self):
+        shard_dirs = [self.build_shard(index, 3) for index in (1, 2, 3)]
+        dest = self.root / "docs"
+        problems = merge_shards(shard_dirs, str(self.content), str(self.static), str(dest))
+        self.assertEqual(problems, [])
+        for i in range(12):
+            self.assertEqual((dest / f"page{i}.html").read_text(), f"<title>Page {i}</title><div><h1>Page {i}</h1></div>")
+        self.assertTrue((dest / "index.css").is_file())
+
+    def test_merge_reports_missing_and_duplicate_shards(self):
+        first = self.build_shard(1, 3)
+        second = self.build_shard(2, 3)
+        problems = merge_shards([first, second, second], str(self.content), str(self.static), str(self.root / "docs"))
+        self.assertIn("Missing shard 3/3", problems)
+        self.assertIn("Shard 2/3 given more than once", problems)
+        self.assertTrue(any(problem.startswith("Missing page") for problem in problems))
+        self.assertTrue(any(problem.startswith("Duplicate page") for problem in problems))
+        self.assertFalse((self.root / "docs").exists())
+
+    def test_merge_removes_outputs_shards_do_not_build(self):
+        dest = self.root / "docs"
+        (self.content / "blog").mkdir()
+        (self.content / "blog" / "post.md").write_text(
+            "---\ndate: 2024-01-01\n---\n# Post\n\n" + "Words repeated. " * 50
+        )
+        generate_pages_recursive(
+            str(self.content), str(self.template), str(dest), "/", listings=Listings(["blog"])
+        )
+        manifest = Manifest.load(str(dest))
+        compress_outputs(str(dest), manifest)
+        manifest.save()
+        self.assertTrue((dest / "blog" / "index.html").is_file())
+        self.assertTrue((dest / "blog" / "post.html.gz").is_file())
+
+        shard_dirs = [self.build_shard(index, 2) for index in (1, 2)]
+        self.assertEqual(merge_shards(shard_dirs, str(self.content), str(self.static), str(dest)), [])
+        self.assertEqual(list(dest.rglob("*.gz")), [])
+        self.assertFalse((dest / "blog" / "index.html").exists())
+        self.assertFalse((dest / "blog" / "feed.xml").exists())
+        merged = Manifest.load(str(dest))
+        self.assertEqual((merged.compressed, merged.listings), ({}, {}))
+
+    def test_merge_rejects_mismatched_builds(self):
+        first = self.build_shard(1, 2)
+        self.template.write_text("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        second = self.build_shard(2, 2, "/site/")
+        problems = merge_shards([first, second], str(self.content), str(self.static), str(self.root / "docs"))
+        self.assertEqual(
+            [problem.split(":")[0] for problem in problems],
+            ["Shard outputs disagree on the basepath", "Shard outputs disagree on the template"],
+        )
+        self.assertFalse((self.root / "docs").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import io
+import os
+import tempfile
+import unittest
+
+from src.template import Template, load_template, rebase_links
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render_fills_every_slot(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.assertEqual(template.slots, ["Title", "Content"])
+        self.assertEqual(
+            template.render(Title="Home", Content="<p>hi</p>"),
+            "<title>Home</title><main><p>hi</p></main>",
+        )
+
+    def test_basepath_is_applied_to_literals(self):
+        template = Template(
+            '<link href="/index.css"><img src="/logo.png">{{ Content }}',
+            "/site/",
+        )
+        self.assertEqual(
+            template.render(Content='<a href="/raw">'),
+            '<link href="/site/index.css"><img src="/site/logo.png"><a href="/raw">',
+        )
+
+    def test_write_streams_fragments(self):
+        template = Template("<h1>{{ Title }}</h1>{{ Content }}!")
+        buffer = io.StringIO()
+        template.write(buffer, Title="T", Content=iter(["<p>", "a", "</p>"]))
+        self.assertEqual(buffer.getvalue(), "<h1>T</h1><p>a</p>!")
+
+    def test_unknown_placeholders_are_literal_text(self):
+        template = Template('<script>let t = "{{ user }}";</script>{{x}}{{ Content }}')
+        self.assertEqual(template.slots, ["Content"])
+        self.assertEqual(
+            template.render(Content="<p>hi</p>"),
+            '<script>let t = "{{ user }}";</script>{{x}}<p>hi</p>',
+        )
+
+    def test_missing_value(self):
+        with self.assertRaises(ValueError):
+            Template("{{ Title }}").render()
+
+    def test_rebase_links(self):
+        self.assertEqual(rebase_links('<a href="/x">', "/"), '<a href="/x">')
+        self.assertEqual(rebase_links('<a href="/x">', "/b/"), '<a href="/b/x">')
+
+
+    def test_load_template_reuses_until_the_file_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as template_file:
+                template_file.write("<title>{{ Title }}</title>")
+            first = load_template(path, "/x/")
+            self.assertIs(load_template(path, "/x/"), first)
+            self.assertIsNot(load_template(path, "/"), first)
+
+            with open(path, "w") as template_file:
+                template_file.write("<h1>{{ Title }}</h1>{{ Content }}")
+            changed = load_template(path, "/x/")
+            self.assertEqual(changed.slots, ["Title", "Content"])
+
+
+if __name__ == "__main__":
+    unittest.main()